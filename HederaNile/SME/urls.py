@@ -25,5 +25,5 @@ urlpatterns = [
 # Additional endpoints:
 # - POST /api/startups/{id}/update_onboarding_status/ (admin)
 # - POST /api/startups/{id}/recalculate_score/
-# - POST /api/startups/{id}/upload_document/
+# - POST /api/startups/{id}/upload_document/ (202, staged for background IPFS upload)
 # - GET /api/startups/my_startup/
\ No newline at end of file
@@ -20,9 +20,10 @@ from .serializers import (
 from accounts.permissions import (
     IsAdminUser, IsStartupOrAdmin, IsOwnerOrAdmin, IsOwnerOrAdminOrReadOnly
 )
-from scoring.services.scoring_service import calculate_credit_score
-from ipfs_storage.services.storage_service import upload_file_to_ipfs
-from blockchain.services.hcs_service import log_event_to_hcs
+from scoring.services.scoring_service import calculate_credit_score, startup_scoring_data
+from ipfs_storage.services.upload_queue import stage_document
+from ipfs_storage.serializers import StoredDocumentSerializer
+from blockchain.services.hcs_outbox import enqueue_hcs_event
 
 
 class StartupViewSet(viewsets.ModelViewSet):
@@ -64,13 +65,7 @@ class StartupViewSet(viewsets.ModelViewSet):
         
         # Calculate initial credit score
         try:
-            scoring_result = calculate_credit_score({
-                'revenue': float(startup.revenue),
-                'monthly_sales': float(startup.monthly_sales),
-                'business_age': startup.business_age,
-                'sector': startup.sector,
-                'docs_uploaded': len(startup.ipfs_docs) if startup.ipfs_docs else 0
-            })
+            scoring_result = calculate_credit_score(startup_scoring_data(startup))
             
             startup.credit_score = scoring_result['score']
             startup.save(update_fields=['credit_score'])
@@ -91,10 +86,21 @@ class StartupViewSet(viewsets.ModelViewSet):
         startup.onboarding_status = new_status
         startup.save(update_fields=['onboarding_status'])
         
-        # Log status change to HCS
+        # Log in audit trail
+        from investments.models import AuditLog
+        audit_log = AuditLog.objects.create(
+            event_type='STARTUP_STATUS_UPDATE',
+            user=request.user,
+            payload={
+                'startup_id': str(startup.id),
+                'old_status': old_status,
+                'new_status': new_status
+            }
+        )
+        
+        # Queue status change for the platform HCS topic
         try:
-            hcs_message_id = log_event_to_hcs(
-                topic_id=startup.hcs_create_message_id,  # Use existing topic
+            enqueue_hcs_event(
                 event_type='STATUS_UPDATE',
                 payload={
                     'startup_id': str(startup.id),
@@ -102,23 +108,14 @@ class StartupViewSet(viewsets.ModelViewSet):
                     'new_status': new_status,
                     'admin_id': str(request.user.id),
                     'timestamp': timezone.now().isoformat()
-                }
+                },
+                audit_log=audit_log,
+                target=startup,
+                target_field='hcs_message_id'
             )
         except Exception as e:
             print(f"HCS logging failed: {e}")
         
-        # Log in audit trail
-        from investments.models import AuditLog
-        AuditLog.objects.create(
-            event_type='STARTUP_STATUS_UPDATE',
-            user=request.user,
-            payload={
-                'startup_id': str(startup.id),
-                'old_status': old_status,
-                'new_status': new_status
-            }
-        )
-        
         return Response({
             'message': f'Startup status updated from {old_status} to {new_status}',
             'startup': StartupDetailSerializer(startup).data
@@ -137,13 +134,7 @@ class StartupViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            scoring_result = calculate_credit_score({
-                'revenue': float(startup.revenue),
-                'monthly_sales': float(startup.monthly_sales),
-                'business_age': startup.business_age,
-                'sector': startup.sector,
-                'docs_uploaded': len(startup.ipfs_docs) if startup.ipfs_docs else 0
-            })
+            scoring_result = calculate_credit_score(startup_scoring_data(startup))
             
             old_score = startup.credit_score
             startup.credit_score = scoring_result['score']
@@ -171,7 +162,7 @@ class StartupViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'], parser_classes=[MultiPartParser, FormParser])
     def upload_document(self, request, pk=None):
-        """Upload document to IPFS for startup."""
+        """Queue a document for IPFS upload; poll /api/documents/{id}/ for the CID."""
         startup = self.get_object()
         
         # Check permissions
@@ -188,61 +179,19 @@ class StartupViewSet(viewsets.ModelViewSet):
         document_type = serializer.validated_data['document_type']
         description = serializer.validated_data.get('description', '')
         
-        try:
-            # Upload to IPFS
-            cid = upload_file_to_ipfs(file, {
-                'startup_id': str(startup.id),
-                'document_type': document_type,
-                'description': description,
-                'uploaded_at': timezone.now().isoformat()
-            })
-            
-            # Add to startup's IPFS docs
-            if not startup.ipfs_docs:
-                startup.ipfs_docs = []
-            
-            startup.ipfs_docs.append({
-                'cid': cid,
-                'filename': file.name,
-                'document_type': document_type,
-                'description': description,
-                'uploaded_at': timezone.now().isoformat()
-            })
-            
-            startup.save(update_fields=['ipfs_docs'])
-            
-            # Recalculate credit score with new document count
-            try:
-                scoring_result = calculate_credit_score({
-                    'revenue': float(startup.revenue),
-                    'monthly_sales': float(startup.monthly_sales),
-                    'business_age': startup.business_age,
-                    'sector': startup.sector,
-                    'docs_uploaded': len(startup.ipfs_docs)
-                })
-                
-                startup.credit_score = scoring_result['score']
-                startup.save(update_fields=['credit_score'])
-            except Exception as e:
-                print(f"Credit score recalculation failed: {e}")
-            
-            return Response({
-                'message': 'Document uploaded successfully',
-                'cid': cid,
-                'document': {
-                    'cid': cid,
-                    'filename': file.name,
-                    'document_type': document_type,
-                    'description': description
-                },
-                'new_credit_score': startup.credit_score
-            })
-            
-        except Exception as e:
-            return Response(
-                {'error': f'Document upload failed: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        # Stage locally; the upload worker pins it and rescores the startup
+        document = stage_document(
+            file,
+            startup,
+            document_type,
+            description,
+            user=request.user
+        )
+        
+        return Response({
+            'message': 'Document accepted for upload',
+            'document': StoredDocumentSerializer(document).data
+        }, status=status.HTTP_202_ACCEPTED)
     
     @action(detail=False, methods=['get'])
     def my_startup(self, request):
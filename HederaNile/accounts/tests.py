@@ -1,3 +1,46 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from .models import AuthNonce, User
+from .views import PasswordResetAPIView, account_key_resolver
+
+
+@override_settings(WALLET_SIGNATURE_VERIFICATION=True)
+class PasswordResetTests(TestCase):
+    """Wallet signature checks on emergency token reset"""
+
+    def setUp(self):
+        User.objects.create_user('0.0.1001', role='STARTUP')
+        AuthNonce.objects.create(
+            hedera_account_id='0.0.1001',
+            nonce='abc123',
+            expires_at=timezone.now() + timedelta(minutes=5)
+        )
+
+    def reset(self, signature):
+        request = APIRequestFactory().post('/api/auth/reset-password/', {
+            'hedera_account_id': '0.0.1001',
+            'new_signature': signature,
+            'nonce': 'abc123'
+        }, format='json')
+        return PasswordResetAPIView.as_view()(request)
+
+    def test_invalid_signature_is_rejected(self):
+        with mock.patch.object(account_key_resolver, 'verify', return_value=False):
+            response = self.reset('00' * 64)
+
+        self.assertEqual(response.status_code, 401)
+        self.assertNotIn('access_token', response.data)
+        self.assertTrue(AuthNonce.objects.filter(nonce='abc123').exists())
+
+    def test_valid_signature_issues_tokens(self):
+        with mock.patch.object(account_key_resolver, 'verify', return_value=True) as verify:
+            response = self.reset('00' * 64)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access_token', response.data)
+        verify.assert_called_once_with('0.0.1001', b'abc123', bytes(64))
@@ -9,6 +9,8 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import timedelta
+import base64
+import binascii
 import secrets
 import hashlib
 import jwt
@@ -21,6 +23,7 @@ from .serializers import (
     RoleUpdateSerializer, UserStatsSerializer
 )
 from .permissions import IsAdminUser, IsOwnerOrReadOnly
+from blockchain.services.key_resolver import account_key_resolver
 
 
 User = get_user_model()
@@ -95,9 +98,13 @@ class WalletAuthAPIView(generics.CreateAPIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # TODO: Implement Hedera signature verification
-        # This would verify the signature against the nonce using the user's public key
-        # For MVP, we'll assume signature is valid if nonce exists
+        # Verify the nonce signature against the account's public key.
+        # Disabled by default for the MVP, where the nonce alone is trusted.
+        if not _wallet_signature_valid(hedera_account_id, nonce, signature):
+            return Response(
+                {'error': 'Invalid wallet signature'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
         
         try:
             # Get or create user
@@ -135,6 +142,34 @@ class WalletAuthAPIView(generics.CreateAPIView):
             )
 
 
+def _wallet_signature_valid(hedera_account_id, nonce, signature):
+    """
+    True if `signature` signs `nonce` with the account's key, or if
+    WALLET_SIGNATURE_VERIFICATION is off.
+    """
+    if not getattr(settings, 'WALLET_SIGNATURE_VERIFICATION', False):
+        return True
+    signature_bytes = _decode_signature(signature)
+    return signature_bytes is not None and account_key_resolver.verify(
+        hedera_account_id, nonce.encode(), signature_bytes
+    )
+
+
+def _decode_signature(signature):
+    """Wallet signatures arrive hex- or base64-encoded"""
+    value = signature.strip()
+    if value.startswith('0x'):
+        value = value[2:]
+    try:
+        return bytes.fromhex(value)
+    except ValueError:
+        pass
+    try:
+        return base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+
+
 class UserRegistrationAPIView(generics.CreateAPIView):
     """
     Complete user registration after wallet auth.
@@ -321,8 +356,12 @@ class PasswordResetAPIView(generics.CreateAPIView):
             # Get user
             user = User.objects.get(hedera_account_id=hedera_account_id)
             
-            # TODO: Verify new signature
-            # This would implement signature verification for password reset
+            # Same wallet signature check as wallet login
+            if not _wallet_signature_valid(hedera_account_id, nonce, new_signature):
+                return Response(
+                    {'error': 'Invalid wallet signature'},
+                    status=status.HTTP_401_UNAUTHORIZED
+                )
             
             # Delete nonce
             auth_nonce.delete()
@@ -1,3 +1,94 @@
+"""
+Django admin configuration for blockchain app.
+"""
+
 from django.contrib import admin
+from .models import HCSOutboxMessage, HCSAnchorBatch, HCSTopic, EscrowJob, EscrowTransaction
+
+
+@admin.register(HCSOutboxMessage)
+class HCSOutboxMessageAdmin(admin.ModelAdmin):
+    """Admin interface for HCSOutboxMessage model"""
+    
+    list_display = ['event_type', 'topic_id', 'status', 'attempts', 'message_id', 'created_at']
+    list_filter = ['status', 'event_type', 'created_at']
+    search_fields = ['message_id', 'topic_id', 'target_pk']
+    ordering = ['-created_at']
+    readonly_fields = ['created_at', 'submitted_at', 'confirmed_at', 'claimed_at']
+    
+    fieldsets = (
+        ('Event Details', {
+            'fields': ('event_type', 'topic_id', 'payload')
+        }),
+        ('Write-back Target', {
+            'fields': ('audit_log', 'target_model', 'target_pk', 'target_field'),
+            'classes': ('collapse',)
+        }),
+        ('Submission', {
+            'fields': ('status', 'message_id', 'attempts', 'last_error', 'next_attempt_at')
+        }),
+        ('Timestamps', {
+            'fields': ('created_at', 'claimed_at', 'submitted_at', 'confirmed_at'),
+            'classes': ('collapse',)
+        }),
+    )
+    
+    actions = ['retry_messages']
+    
+    def retry_messages(self, request, queryset):
+        """Requeue failed messages"""
+        count = queryset.filter(status='FAILED').update(status='PENDING', attempts=0)
+        self.message_user(request, f"{count} messages requeued.")
+    retry_messages.short_description = "Requeue failed messages"
+
+
+@admin.register(HCSAnchorBatch)
+class HCSAnchorBatchAdmin(admin.ModelAdmin):
+    """Admin interface for HCSAnchorBatch model"""
+    
+    list_display = ['merkle_root', 'leaf_count', 'hcs_message_id', 'window_end']
+    search_fields = ['merkle_root', 'hcs_message_id']
+    ordering = ['-window_end']
+    readonly_fields = ['merkle_root', 'leaf_count', 'window_start', 'window_end', 'created_at']
+
+
+@admin.register(HCSTopic)
+class HCSTopicAdmin(admin.ModelAdmin):
+    """Admin interface for HCSTopic model"""
+    
+    list_display = ['topic_id', 'status', 'funding_request', 'created_at', 'claimed_at']
+    list_filter = ['status']
+    search_fields = ['topic_id', 'funding_request__title']
+    ordering = ['created_at']
+    readonly_fields = ['created_at', 'claimed_at']
+
+
+@admin.register(EscrowJob)
+class EscrowJobAdmin(admin.ModelAdmin):
+    """Admin interface for EscrowJob model"""
+    
+    list_display = ['job_type', 'investment', 'status', 'tx_hash', 'created_at', 'finished_at']
+    list_filter = ['job_type', 'status', 'created_at']
+    search_fields = ['idempotency_key', 'tx_hash', 'investment__id']
+    ordering = ['-created_at']
+    readonly_fields = ['idempotency_key', 'created_at', 'started_at', 'finished_at']
+    
+    actions = ['requeue_jobs']
+    
+    def requeue_jobs(self, request, queryset):
+        """Requeue failed jobs that did not produce a transaction"""
+        count = queryset.filter(status='FAILED', tx_hash__isnull=True).update(status='PENDING')
+        self.message_user(request, f"{count} jobs requeued.")
+    requeue_jobs.short_description = "Requeue failed jobs without a transaction"
+
 
-# Register your models here.
+@admin.register(EscrowTransaction)
+class EscrowTransactionAdmin(admin.ModelAdmin):
+    """Admin interface for EscrowTransaction model"""
+    
+    list_display = ['transaction_id', 'sender_account', 'amount_tinybars', 'memo', 'matched_investment', 'consensus_timestamp']
+    list_filter = ['result']
+    search_fields = ['transaction_id', 'sender_account', 'memo']
+    ordering = ['-consensus_timestamp']
+    readonly_fields = ['transaction_id', 'consensus_timestamp', 'sender_account', 'amount_tinybars',
+                       'memo', 'result', 'match_error', 'created_at']
@@ -0,0 +1,51 @@
+"""
+Tail the escrow account on the mirror node and confirm matching deposits.
+
+Usage:
+    python manage.py ingest_escrow_transactions              # run continuously
+    python manage.py ingest_escrow_transactions --once       # ingest new records and exit
+    python manage.py ingest_escrow_transactions --rematch    # also retry all unmatched transfers
+"""
+
+import time
+from django.core.management.base import BaseCommand
+
+from blockchain.services.escrow_ingest import EscrowIngestor
+
+
+class Command(BaseCommand):
+    help = "Ingest escrow account transactions from the mirror node and match them to investments"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Transactions stored and matched per database transaction')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Seconds to sleep when no new transactions arrive')
+        parser.add_argument('--rematch', action='store_true',
+                            help='Retry matching previously ingested unmatched transfers first')
+        parser.add_argument('--once', action='store_true',
+                            help='Ingest once and exit')
+
+    def handle(self, *args, **options):
+        ingestor = EscrowIngestor(batch_size=options['batch_size'])
+
+        if options['rematch']:
+            self.stdout.write(f"Matched {ingestor.match()} previously ingested deposit(s)")
+
+        while True:
+            try:
+                counts = ingestor.ingest()
+            except Exception as e:
+                self.stderr.write(f"Escrow ingestion failed: {e}")
+                counts = {'ingested': 0, 'matched': 0}
+
+            if counts['ingested']:
+                self.stdout.write(
+                    f"Ingested {counts['ingested']} escrow transfer(s), "
+                    f"confirmed {counts['matched']} deposit(s)"
+                )
+
+            if options['once']:
+                break
+            if not counts['ingested']:
+                time.sleep(options['interval'])
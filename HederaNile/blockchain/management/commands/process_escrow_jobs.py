@@ -0,0 +1,39 @@
+"""
+Execute queued escrow deposit and release jobs.
+
+Usage:
+    python manage.py process_escrow_jobs            # run continuously
+    python manage.py process_escrow_jobs --once     # process one batch and exit
+"""
+
+import time
+from django.core.management.base import BaseCommand
+
+from blockchain.services.escrow_jobs import EscrowJobWorker
+
+
+class Command(BaseCommand):
+    help = "Execute queued escrow transfers with a pool of workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=20,
+                            help='Maximum jobs claimed per batch')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Concurrent transfers (default: ESCROW_JOB_WORKERS)')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds to sleep when no jobs are queued')
+        parser.add_argument('--once', action='store_true',
+                            help='Process a single batch and exit')
+
+    def handle(self, *args, **options):
+        worker = EscrowJobWorker(workers=options['workers'])
+
+        while True:
+            processed = worker.run_batch(options['batch_size'])
+            if processed:
+                self.stdout.write(f"Processed {processed} escrow job(s)")
+
+            if options['once']:
+                break
+            if not processed:
+                time.sleep(options['interval'])
@@ -0,0 +1,38 @@
+"""
+Keep a pool of pre-created HCS topics for new funding requests.
+
+Usage:
+    python manage.py provision_hcs_topics                 # top up continuously
+    python manage.py provision_hcs_topics --size 50 --once
+"""
+
+import time
+from django.core.management.base import BaseCommand
+
+from blockchain.services.topic_pool import topic_pool_service
+
+
+class Command(BaseCommand):
+    help = "Create HCS topics ahead of time so funding requests can claim them instantly"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=None,
+                            help='Available topics to maintain (default: HCS_TOPIC_POOL_SIZE)')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Concurrent topic creations')
+        parser.add_argument('--interval', type=float, default=10.0,
+                            help='Seconds between pool checks')
+        parser.add_argument('--once', action='store_true',
+                            help='Top up the pool once and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            created = topic_pool_service.replenish(options['size'], options['workers'])
+            if created:
+                self.stdout.write(
+                    f"Created {created} topic(s); {topic_pool_service.available_count()} available"
+                )
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,42 @@
+"""
+Reconcile the local escrow ledger against the on-chain escrow balance.
+
+Usage:
+    python manage.py reconcile_escrow_ledger             # run periodically
+    python manage.py reconcile_escrow_ledger --once      # reconcile once and exit
+"""
+
+import time
+from django.core.management.base import BaseCommand
+
+from blockchain.services.escrow_ledger import escrow_ledger
+
+
+class Command(BaseCommand):
+    help = "Compare the escrow ledger total with the escrow account's on-chain balance"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=300.0,
+                            help='Seconds between reconciliations')
+        parser.add_argument('--once', action='store_true',
+                            help='Reconcile once and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                result = escrow_ledger.reconcile()
+            except Exception as e:
+                self.stderr.write(f"Escrow reconciliation failed: {e}")
+            else:
+                message = (
+                    f"Ledger {result['ledger_balance']} HBAR, "
+                    f"on-chain {result['onchain_balance']} HBAR, drift {result['drift']}"
+                )
+                if result['solvent']:
+                    self.stdout.write(message)
+                else:
+                    self.stderr.write(f"Escrow shortfall! {message}")
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,44 @@
+"""
+Confirm submitted HCS outbox messages against the mirror node.
+
+Needed when HCS_SUBMIT_MODE = 'precheck', where the relay returns without
+waiting for receipts.
+
+Usage:
+    python manage.py reconcile_hcs_outbox            # run continuously
+    python manage.py reconcile_hcs_outbox --once     # check one batch and exit
+"""
+
+import time
+from django.core.management.base import BaseCommand
+
+from blockchain.services.hcs_outbox import HCSOutboxReconciler
+
+
+class Command(BaseCommand):
+    help = "Confirm consensus of submitted HCS messages and requeue the ones that did not land"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Maximum messages checked per batch')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Concurrent mirror-node lookups (default: HCS_OUTBOX_WORKERS)')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Seconds to sleep between batches')
+        parser.add_argument('--once', action='store_true',
+                            help='Process a single batch and exit')
+
+    def handle(self, *args, **options):
+        reconciler = HCSOutboxReconciler(workers=options['workers'])
+
+        while True:
+            counts = reconciler.reconcile_batch(options['batch_size'])
+            if counts['confirmed'] or counts['resubmitted']:
+                self.stdout.write(
+                    f"Confirmed {counts['confirmed']}, requeued {counts['resubmitted']}, "
+                    f"awaiting {counts['pending']} HCS message(s)"
+                )
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,39 @@
+"""
+Relay queued HCS events from the outbox to Hedera.
+
+Usage:
+    python manage.py relay_hcs_outbox            # run continuously
+    python manage.py relay_hcs_outbox --once     # drain one batch and exit
+"""
+
+import time
+from django.core.management.base import BaseCommand
+
+from blockchain.services.hcs_outbox import HCSOutboxRelay
+
+
+class Command(BaseCommand):
+    help = "Submit pending HCS outbox messages to Hedera concurrently"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Maximum messages claimed per batch')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Concurrent submissions (default: HCS_OUTBOX_WORKERS)')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds to sleep when the outbox is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Process a single batch and exit')
+
+    def handle(self, *args, **options):
+        relay = HCSOutboxRelay(workers=options['workers'])
+
+        while True:
+            processed = relay.relay_batch(options['batch_size'])
+            if processed:
+                self.stdout.write(f"Relayed {processed} HCS message(s)")
+
+            if options['once']:
+                break
+            if not processed:
+                time.sleep(options['interval'])
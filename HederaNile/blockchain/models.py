@@ -1,3 +1,353 @@
+"""
+Blockchain models for NileFi - durable queues for Hedera submissions.
+"""
+
+import uuid
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+
+class OutboxStatus(models.TextChoices):
+    """HCS outbox message status choices"""
+    PENDING = 'PENDING', 'Pending Submission'
+    BATCHED = 'BATCHED', 'Awaiting Merkle Anchor'
+    PROCESSING = 'PROCESSING', 'Being Submitted'
+    SUBMITTED = 'SUBMITTED', 'Submitted to HCS'
+    CONFIRMED = 'CONFIRMED', 'Consensus Confirmed'
+    FAILED = 'FAILED', 'Failed'
+
+
+class HCSOutboxMessage(models.Model):
+    """
+    Durable outbox entry for an HCS event.
+    Written in the request path and submitted to Hedera by the relay worker
+    (`manage.py relay_hcs_outbox`), which writes the resulting message ID
+    back onto the linked audit log and target record. Messages submitted
+    without waiting for a receipt stay SUBMITTED until the reconciler
+    (`manage.py reconcile_hcs_outbox`) finds them on the mirror node.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    # Event details
+    event_type = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    topic_id = models.CharField(
+        max_length=100,
+        blank=True,
+        null=True,
+        help_text="HCS topic ID (defaults to platform topic)"
+    )
+
+    status = models.CharField(
+        max_length=20,
+        choices=OutboxStatus.choices,
+        default=OutboxStatus.PENDING
+    )
+
+    # Submitted only after this message succeeds; an empty topic_id is
+    # then taken from its result (used to wait for async topic creation)
+    depends_on = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='dependents'
+    )
+
+    # Write-back targets
+    audit_log = models.ForeignKey(
+        'investments.AuditLog',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='outbox_messages'
+    )
+    target_model = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+        help_text="Model label of the record to update, e.g. investments.Investment"
+    )
+    target_pk = models.CharField(max_length=64, blank=True, default='')
+    target_field = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+        help_text="Field on the target record that receives the message ID"
+    )
+
+    # Submission result
+    message_id = models.CharField(
+        max_length=100,
+        blank=True,
+        null=True,
+        help_text="HCS message ID (the new topic ID for CREATE_TOPIC entries)"
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+
+    # Relay lease; PROCESSING rows whose lease has expired are reclaimed
+    claim_token = models.UUIDField(null=True, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    # Timestamps
+    created_at = models.DateTimeField(default=timezone.now)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    submitted_at = models.DateTimeField(null=True, blank=True)
+    confirmed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'hcs_outbox'
+        verbose_name = 'HCS Outbox Message'
+        verbose_name_plural = 'HCS Outbox Messages'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['target_model', 'target_pk']),
+            models.Index(fields=['status', 'submitted_at']),
+            models.Index(fields=['status', 'claimed_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} ({self.status})"
+
+
+class HCSAnchorBatch(models.Model):
+    """
+    Merkle batch of audit events anchored to HCS as a single message.
+    Each AuditLog in the batch stores its leaf index and sibling path.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    merkle_root = models.CharField(max_length=64, db_index=True)
+    leaf_count = models.PositiveIntegerField()
+
+    # Collection window
+    window_start = models.DateTimeField()
+    window_end = models.DateTimeField()
+
+    # Blockchain reference
+    topic_id = models.CharField(max_length=100, blank=True, null=True)
+    hcs_message_id = models.CharField(
+        max_length=100,
+        blank=True,
+        null=True,
+        help_text="HCS message ID of the root submission"
+    )
+
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'hcs_anchor_batches'
+        verbose_name = 'HCS Anchor Batch'
+        verbose_name_plural = 'HCS Anchor Batches'
+        ordering = ['-window_end']
+
+    def __str__(self):
+        return f"{self.merkle_root[:16]}... ({self.leaf_count} events)"
+
+
+class TopicStatus(models.TextChoices):
+    """Pre-provisioned HCS topic status choices"""
+    AVAILABLE = 'AVAILABLE', 'Available'
+    CLAIMED = 'CLAIMED', 'Claimed'
+
+
+class HCSTopic(models.Model):
+    """
+    HCS topic created ahead of time by `manage.py provision_hcs_topics`.
+    New funding requests claim one instead of creating a topic inline.
+    """
+
+    topic_id = models.CharField(max_length=100, unique=True)
+    status = models.CharField(
+        max_length=20,
+        choices=TopicStatus.choices,
+        default=TopicStatus.AVAILABLE
+    )
+    funding_request = models.OneToOneField(
+        'fund.FundingRequest',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='pooled_topic'
+    )
+
+    created_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'hcs_topics'
+        verbose_name = 'HCS Topic'
+        verbose_name_plural = 'HCS Topics'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.topic_id} ({self.status})"
+
+
+class EscrowJobType(models.TextChoices):
+    """Escrow job type choices"""
+    DEPOSIT = 'DEPOSIT', 'Deposit to Escrow'
+    RELEASE = 'RELEASE', 'Release from Escrow'
+
+
+class EscrowJobStatus(models.TextChoices):
+    """Escrow job status choices"""
+    PENDING = 'PENDING', 'Queued'
+    PROCESSING = 'PROCESSING', 'Executing Transfer'
+    SUCCEEDED = 'SUCCEEDED', 'Succeeded'
+    FAILED = 'FAILED', 'Failed'
+
+
+class EscrowJob(models.Model):
+    """
+    Escrow transfer requested over HTTP and executed by the job worker
+    (`manage.py process_escrow_jobs`), so request handlers never wait on
+    the network. The idempotency key makes retried requests return the
+    original job instead of moving funds twice.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    idempotency_key = models.CharField(max_length=200, unique=True)
+    job_type = models.CharField(max_length=20, choices=EscrowJobType.choices)
+    status = models.CharField(
+        max_length=20,
+        choices=EscrowJobStatus.choices,
+        default=EscrowJobStatus.PENDING
+    )
+
+    investment = models.ForeignKey(
+        'investments.Investment',
+        on_delete=models.CASCADE,
+        related_name='escrow_jobs'
+    )
+    milestone = models.ForeignKey(
+        'fund.Milestone',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='escrow_jobs'
+    )
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='escrow_jobs'
+    )
+    params = models.JSONField(
+        default=dict,
+        help_text="Validated request data, e.g. release_amount and recipient_account"
+    )
+
+    # Outcome
+    tx_hash = models.CharField(max_length=100, blank=True, null=True)
+    last_error = models.TextField(blank=True, default='')
+
+    # Timestamps
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'escrow_jobs'
+        verbose_name = 'Escrow Job'
+        verbose_name_plural = 'Escrow Jobs'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.job_type} {self.investment_id} ({self.status})"
+
+
+class MirrorTransaction(models.Model):
+    """
+    Finalised transaction record fetched from the mirror node.
+    Consensus records never change, so they are kept indefinitely and
+    served instead of repeating the network lookup.
+    """
+
+    transaction_id = models.CharField(
+        max_length=100,
+        primary_key=True,
+        help_text="Mirror-node format: 0.0.X-seconds-nanos"
+    )
+    result = models.CharField(max_length=50)
+    consensus_timestamp = models.CharField(max_length=30, blank=True, default='')
+    record = models.JSONField()
+    fetched_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'mirror_transactions'
+        verbose_name = 'Mirror Transaction'
+        verbose_name_plural = 'Mirror Transactions'
+
+    def __str__(self):
+        return f"{self.transaction_id} ({self.result})"
+
+
+class IngestionCursor(models.Model):
+    """Consensus-timestamp position of a mirror-node ingestion stream"""
+
+    name = models.CharField(max_length=100, unique=True)
+    last_timestamp = models.CharField(
+        max_length=30,
+        blank=True,
+        default='',
+        help_text="Consensus timestamp of the last ingested record"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'ingestion_cursors'
+        verbose_name = 'Ingestion Cursor'
+        verbose_name_plural = 'Ingestion Cursors'
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_timestamp or 'start'}"
+
+
+class EscrowTransaction(models.Model):
+    """
+    Incoming transfer to the escrow account, ingested from the mirror node
+    by `manage.py ingest_escrow_transactions` and matched to investments.
+    """
+
+    transaction_id = models.CharField(max_length=100, primary_key=True)
+    consensus_timestamp = models.CharField(max_length=30, db_index=True)
+    sender_account = models.CharField(max_length=50)
+    amount_tinybars = models.BigIntegerField(help_text="Amount credited to escrow")
+    memo = models.CharField(max_length=100, blank=True, default='')
+    result = models.CharField(max_length=50)
+
+    matched_investment = models.OneToOneField(
+        'investments.Investment',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='escrow_transaction'
+    )
+    match_error = models.TextField(blank=True, default='')
+
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'escrow_transactions'
+        verbose_name = 'Escrow Transaction'
+        verbose_name_plural = 'Escrow Transactions'
+        ordering = ['consensus_timestamp']
+        indexes = [
+            models.Index(fields=['memo']),
+            models.Index(fields=['sender_account', 'amount_tinybars']),
+        ]
 
-# Create your models here.
+    def __str__(self):
+        return f"{self.transaction_id}: {self.sender_account} -> escrow ({self.amount_tinybars} tinybars)"
@@ -1,8 +1,9 @@
 """
 Blockchain services package for NileFi.
-Provides Hedera integration: HCS, Escrow, Mirror Node, and OFD stubs.
+Provides Hedera integration: HCS, HCS outbox, Escrow, Mirror Node, and OFD stubs.
 """
 
+from .client_pool import client_pool
 from .hcs_service import (
     hcs_service,
     log_funding_request_created,
@@ -10,11 +11,14 @@ from .hcs_service import (
     log_milestone_verification,
     log_funds_release,
 )
+from .hcs_outbox import enqueue_hcs_event
 from .escrow_service import escrow_service, ofd_service
 from .mirror_node_service import mirror_node_service
 
 __all__ = [
+    'client_pool',
     'hcs_service',
+    'enqueue_hcs_event',
     'escrow_service',
     'ofd_service',
     'mirror_node_service',
@@ -0,0 +1,235 @@
+"""
+Shared Hedera client pool for NileFi services.
+Clients are created lazily on first use, keyed by network and operator,
+and leased to one thread at a time so concurrent submissions don't
+serialise on a single client. Node health is tracked across leases from
+the outcome of each call: latency on success and transport or timeout
+errors only, charged to the node that served the call. Precheck and
+receipt errors say nothing about a node's health and are not counted.
+"""
+
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from django.conf import settings
+
+try:
+    from hiero_sdk_python import Client, PrivateKey, AccountId
+    from hiero_sdk_python.exceptions import MaxAttemptsError
+    HIERO_AVAILABLE = True
+except ImportError:
+    HIERO_AVAILABLE = False
+
+try:
+    import grpc
+    GRPC_AVAILABLE = True
+except ImportError:
+    GRPC_AVAILABLE = False
+
+
+# Errors that mean a node could not be reached or did not answer in time
+TRANSPORT_ERRORS = (TimeoutError, ConnectionError)
+if HIERO_AVAILABLE:
+    TRANSPORT_ERRORS += (MaxAttemptsError,)
+if GRPC_AVAILABLE:
+    TRANSPORT_ERRORS += (grpc.RpcError,)
+
+
+class ClientPoolTimeout(RuntimeError):
+    """No pooled client became free within HEDERA_CLIENT_CHECKOUT_TIMEOUT"""
+
+
+class NodeHealth:
+    """Rolling health record for a single consensus node"""
+
+    def __init__(self):
+        self.latency = 0.0
+        self.failures = 0
+        self.ejected_until = 0.0
+
+    @property
+    def is_healthy(self) -> bool:
+        return time.monotonic() >= self.ejected_until
+
+
+class ClientLease:
+    """A pooled client plus the node account IDs selected for this use"""
+
+    def __init__(self, client, node_account_ids: List[str], pool: 'HederaClientPool'):
+        self.client = client
+        self.node_account_ids = node_account_ids
+        self.pool = pool
+
+    def pin_nodes(self, transaction):
+        """Restrict a transaction to the selected healthy nodes"""
+        if self.node_account_ids:
+            transaction.setNodeAccountIds(
+                [AccountId.fromString(node_id) for node_id in self.node_account_ids]
+            )
+        return transaction
+
+    def execute(self, request):
+        """
+        Execute a transaction or query with the leased client and record
+        the serving node's latency, or its failure if the node could not
+        be reached.
+        """
+        started = time.monotonic()
+        try:
+            response = request.execute(self.client)
+        except TRANSPORT_ERRORS as e:
+            node_id = getattr(e, 'node_id', None)
+            if node_id is None and len(self.node_account_ids) == 1:
+                node_id = self.node_account_ids[0]
+            if node_id is not None:
+                self.pool.report(str(node_id), False, time.monotonic() - started)
+            raise
+
+        node_id = getattr(response, 'node_id', None)
+        if node_id is not None:
+            self.pool.report(str(node_id), True, time.monotonic() - started)
+        return response
+
+
+class HederaClientPool:
+    """
+    Lazily-initialised pool of Hedera clients shared by HCS and escrow services.
+    """
+
+    def __init__(self):
+        self._pools: Dict[Tuple[str, str], queue.LifoQueue] = {}
+        self._created: Dict[Tuple[str, str], int] = {}
+        self._nodes: Dict[str, NodeHealth] = {}
+        self._lock = threading.Lock()
+        self._warned = False
+
+    @property
+    def size(self) -> int:
+        return getattr(settings, 'HEDERA_CLIENT_POOL_SIZE', 4)
+
+    def is_available(self, operator_id: Optional[str], operator_key: Optional[str]) -> bool:
+        """True when live clients can be created for this operator"""
+        if HIERO_AVAILABLE and operator_id and operator_key:
+            return True
+        if not self._warned:
+            self._warned = True
+            reason = "hiero-sdk-python not available" if not HIERO_AVAILABLE else "no operator configured"
+            print(f"Warning: {reason}. Hedera services running in mock mode.")
+        return False
+
+    @contextmanager
+    def lease(self, network: str, operator_id: str, operator_key: str):
+        """
+        Lease a client for the duration of a `with` block.
+
+        Yields:
+            ClientLease with the client and the healthiest node account IDs
+
+        Raises:
+            ClientPoolTimeout: if every client stays leased for
+            HEDERA_CLIENT_CHECKOUT_TIMEOUT seconds
+        """
+        key = (network, operator_id)
+        pool = self._get_pool(key)
+        client = self._checkout(key, pool, operator_key)
+        try:
+            yield ClientLease(client, self.select_nodes(), self)
+        finally:
+            pool.put(client)
+
+    def select_nodes(self) -> List[str]:
+        """
+        Healthiest configured nodes, fastest first.
+        Returns an empty list when no node list is configured, leaving
+        node selection to the SDK.
+        """
+        node_ids = getattr(settings, 'HEDERA_NODE_ACCOUNT_IDS', None) or []
+        fanout = getattr(settings, 'HEDERA_NODE_FANOUT', 3)
+
+        with self._lock:
+            health = [(node_id, self._nodes.setdefault(node_id, NodeHealth())) for node_id in node_ids]
+        healthy = [item for item in health if item[1].is_healthy] or health
+        healthy.sort(key=lambda item: (item[1].failures, item[1].latency))
+        return [node_id for node_id, _ in healthy[:fanout]]
+
+    def report(self, node_id: str, ok: bool, latency: float):
+        """Record the outcome of a request sent to `node_id`"""
+        cooldown = getattr(settings, 'HEDERA_NODE_COOLDOWN', 30)
+        max_failures = getattr(settings, 'HEDERA_NODE_MAX_FAILURES', 3)
+
+        with self._lock:
+            node = self._nodes.setdefault(node_id, NodeHealth())
+            if ok:
+                node.failures = 0
+                node.latency = latency if not node.latency else 0.8 * node.latency + 0.2 * latency
+            else:
+                node.failures += 1
+                if node.failures >= max_failures:
+                    node.ejected_until = time.monotonic() + cooldown
+                    print(f"Hedera node {node_id} ejected for {cooldown}s after {node.failures} failures")
+
+    def close(self):
+        """Close all pooled clients (e.g. on worker shutdown)"""
+        with self._lock:
+            pools, self._pools, self._created = self._pools, {}, {}
+        for pool in pools.values():
+            while not pool.empty():
+                client = pool.get_nowait()
+                if hasattr(client, 'close'):
+                    client.close()
+
+    def _get_pool(self, key: Tuple[str, str]) -> queue.LifoQueue:
+        with self._lock:
+            if key not in self._pools:
+                self._pools[key] = queue.LifoQueue()
+                self._created[key] = 0
+            return self._pools[key]
+
+    def _checkout(self, key: Tuple[str, str], pool: queue.LifoQueue, operator_key: str):
+        """Reuse an idle client, create one if under the limit, or wait for one"""
+        try:
+            return pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = self._created[key] < self.size
+            if create:
+                self._created[key] += 1
+
+        if create:
+            try:
+                return self._create_client(key[0], key[1], operator_key)
+            except Exception:
+                with self._lock:
+                    self._created[key] -= 1
+                raise
+
+        timeout = getattr(settings, 'HEDERA_CLIENT_CHECKOUT_TIMEOUT', 30)
+        try:
+            return pool.get(timeout=timeout)
+        except queue.Empty:
+            raise ClientPoolTimeout(
+                f"No Hedera client free after {timeout}s ({self.size} in use for {key[1]})"
+            )
+
+    def _create_client(self, network: str, operator_id: str, operator_key: str):
+        """Initialize Hedera client"""
+        if network == 'testnet':
+            client = Client.forTestnet()
+        elif network == 'mainnet':
+            client = Client.forMainnet()
+        else:
+            raise ValueError(f"Unknown network: {network}")
+
+        client.setOperator(
+            AccountId.fromString(operator_id),
+            PrivateKey.fromStringED25519(operator_key)
+        )
+        return client
+
+
+# Singleton instance
+client_pool = HederaClientPool()
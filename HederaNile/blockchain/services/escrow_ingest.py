@@ -0,0 +1,177 @@
+"""
+Incremental ingestion of the escrow account's transactions.
+Tails the mirror node from a persisted consensus-timestamp cursor, stores
+incoming transfers in the `escrow_transactions` table and confirms the
+PENDING investments they pay for, so deposit confirmation costs
+O(new transactions) instead of one lookup per investment.
+"""
+
+import base64
+from typing import Dict, List, Optional
+from django.conf import settings
+from django.db import transaction
+
+from blockchain.models import EscrowTransaction, IngestionCursor
+from .mirror_node_service import mirror_node_service
+from .simulator import tinybars
+
+
+class EscrowIngestor:
+    """
+    Escrow-account ingestion and deposit matching.
+
+    An incoming transfer pays for a PENDING investment when it comes from
+    the lender's account for exactly the investment amount and either its
+    memo is the investment ID or it is the only such candidate.
+    """
+
+    def __init__(self, batch_size: Optional[int] = None):
+        self.escrow_account_id = settings.HEDERA_ESCROW_ACCOUNT_ID
+        self.batch_size = batch_size or getattr(settings, 'ESCROW_INGEST_BATCH_SIZE', 500)
+
+    @property
+    def cursor_name(self) -> str:
+        return f"escrow:{self.escrow_account_id}"
+
+    def ingest(self, max_records: Optional[int] = None) -> Dict[str, int]:
+        """
+        Ingest new escrow transactions since the cursor.
+
+        Args:
+            max_records: Optional cap on transactions read in this call
+
+        Returns:
+            Counts of ingested transactions and matched deposits
+        """
+        cursor, _ = IngestionCursor.objects.get_or_create(name=self.cursor_name)
+        stream = mirror_node_service.iter_account_transactions(
+            self.escrow_account_id,
+            transaction_type='CRYPTOTRANSFER',
+            start=cursor.last_timestamp or None,
+            order='asc'
+        )
+
+        counts = {'ingested': 0, 'matched': 0}
+        batch: List[Dict] = []
+        read = 0
+        for tx in stream:
+            # `start` is inclusive; skip the record the cursor points at
+            if tx.get('consensus_timestamp') == cursor.last_timestamp:
+                continue
+            batch.append(tx)
+            read += 1
+            if len(batch) >= self.batch_size:
+                self._commit(cursor, batch, counts)
+                batch = []
+            if max_records and read >= max_records:
+                break
+
+        if batch:
+            self._commit(cursor, batch, counts)
+        return counts
+
+    def _commit(self, cursor: IngestionCursor, batch: List[Dict], counts: Dict[str, int]):
+        """Store a batch, match it and advance the cursor in one transaction"""
+        rows = [row for row in (self._parse(tx) for tx in batch) if row]
+
+        with transaction.atomic():
+            EscrowTransaction.objects.bulk_create(rows, ignore_conflicts=True)
+            counts['matched'] += self.match([row.transaction_id for row in rows])
+            cursor.last_timestamp = batch[-1]['consensus_timestamp']
+            cursor.save(update_fields=['last_timestamp', 'updated_at'])
+
+        counts['ingested'] += len(rows)
+
+    def _parse(self, tx: Dict) -> Optional[EscrowTransaction]:
+        """Incoming transfer to escrow, or None for other transactions"""
+        if tx.get('result') != 'SUCCESS':
+            return None
+
+        transfers = tx.get('transfers', [])
+        credited = sum(
+            t.get('amount', 0) for t in transfers
+            if t.get('account') == self.escrow_account_id
+        )
+        if credited <= 0:
+            return None
+
+        # The sender is the largest debit (the payer's debit includes fees)
+        debits = [t for t in transfers if t.get('amount', 0) < 0]
+        if not debits:
+            return None
+        sender = min(debits, key=lambda t: t['amount'])['account']
+
+        memo = base64.b64decode(tx.get('memo_base64') or '').decode(errors='replace')
+        return EscrowTransaction(
+            transaction_id=tx['transaction_id'],
+            consensus_timestamp=tx['consensus_timestamp'],
+            sender_account=sender,
+            amount_tinybars=credited,
+            memo=memo[:100],
+            result=tx['result'],
+        )
+
+    def match(self, transaction_ids: Optional[List[str]] = None) -> int:
+        """
+        Match unmatched escrow transactions to PENDING investments in bulk
+        and confirm the deposits.
+
+        Args:
+            transaction_ids: Restrict to these transactions (default: all unmatched)
+
+        Returns:
+            Number of investments confirmed
+        """
+        from investments.models import Investment
+
+        unmatched = EscrowTransaction.objects.filter(matched_investment__isnull=True)
+        if transaction_ids is not None:
+            unmatched = unmatched.filter(transaction_id__in=transaction_ids)
+        unmatched = list(unmatched.order_by('consensus_timestamp'))
+        if not unmatched:
+            return 0
+
+        pending = Investment.objects.filter(
+            status='PENDING',
+            lender__hedera_account_id__in={tx.sender_account for tx in unmatched}
+        ).select_related('lender', 'funding_request').order_by('created_at')
+
+        by_id = {}
+        by_sender_amount: Dict = {}
+        for investment in pending:
+            by_id[str(investment.id)] = investment
+            key = (investment.lender.hedera_account_id, tinybars(investment.amount))
+            by_sender_amount.setdefault(key, []).append(investment)
+
+        matched = 0
+        for escrow_tx in unmatched:
+            key = (escrow_tx.sender_account, escrow_tx.amount_tinybars)
+            investment = by_id.get(escrow_tx.memo.strip())
+            if investment is None or key != (investment.lender.hedera_account_id, tinybars(investment.amount)):
+                candidates = by_sender_amount.get(key, [])
+                investment = candidates[0] if len(candidates) == 1 else None
+            if investment is None:
+                continue
+
+            # Each match runs in its own savepoint, so one failure does not
+            # roll back the batch and hold the cursor back
+            try:
+                with transaction.atomic():
+                    confirmed = investment.confirm_deposit(
+                        escrow_tx.transaction_id, investment.hcs_deposit_message_id
+                    )
+                    if confirmed:
+                        escrow_tx.matched_investment = investment
+                        escrow_tx.match_error = ''
+                        escrow_tx.save(update_fields=['matched_investment', 'match_error'])
+            except Exception as e:
+                print(f"Matching escrow transaction {escrow_tx.transaction_id} failed: {e}")
+                EscrowTransaction.objects.filter(pk=escrow_tx.pk).update(match_error=str(e))
+                continue
+
+            by_id.pop(str(investment.id), None)
+            by_sender_amount[(investment.lender.hedera_account_id, tinybars(investment.amount))].remove(investment)
+            if confirmed:
+                matched += 1
+
+        return matched
@@ -0,0 +1,316 @@
+"""
+Asynchronous escrow jobs for NileFi.
+Deposit and release endpoints persist a job and return immediately; the
+job worker executes the transfer and applies the resulting state changes,
+so HTTP workers are never held by network latency.
+"""
+
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from blockchain.models import EscrowJob, EscrowJobStatus, EscrowJobType
+from fund.models import FundingRequest, Milestone
+from investments.models import EscrowLegKind, EscrowLegStatus, EscrowReleaseLeg
+from .escrow_ledger import escrow_ledger
+from .escrow_service import escrow_service
+from .topic_pool import topic_pool_service
+
+
+def escrow_idempotency_key(
+    job_type: str,
+    investment,
+    milestone=None,
+    user=None,
+    client_key: Optional[str] = None,
+) -> str:
+    """
+    Build the stored idempotency key for an escrow job.
+
+    Without a client key the job is keyed by its type, investment and
+    milestone. A client-supplied Idempotency-Key is scoped to the same
+    values plus the requesting user, so a key reused by another user or
+    for another investment never returns someone else's job.
+    """
+    scope = f"{job_type.lower()}:{investment.id}"
+    if milestone is not None:
+        scope = f"{scope}:{milestone.id}"
+    if not client_key:
+        return scope
+    digest = hashlib.sha256(client_key.encode()).hexdigest()[:32]
+    return f"{scope}:{user.id if user else '-'}:{digest}"
+
+
+def enqueue_escrow_job(
+    job_type: str,
+    investment,
+    params: Optional[Dict] = None,
+    milestone=None,
+    user=None,
+    client_key: Optional[str] = None,
+) -> Tuple[EscrowJob, bool]:
+    """
+    Persist an escrow job, or return the existing job for this key.
+
+    Args:
+        job_type: EscrowJobType value
+        investment: Investment the transfer belongs to
+        params: JSON-serialisable request data for the worker
+        milestone: Milestone being released (RELEASE jobs)
+        user: Requesting user
+        client_key: Optional Idempotency-Key header; repeated requests
+            with the same key return the original job
+
+    A FAILED job whose transfer never produced a transaction is queued
+    again with the new request's parameters, so a retry does not keep
+    returning the dead job.
+
+    Returns:
+        (job, created); `created` is also True for a requeued job
+    """
+    job, created = EscrowJob.objects.get_or_create(
+        idempotency_key=escrow_idempotency_key(job_type, investment, milestone, user, client_key),
+        defaults={
+            'job_type': job_type,
+            'investment': investment,
+            'milestone': milestone,
+            'requested_by': user,
+            'params': params or {},
+        }
+    )
+    if created or job.status != EscrowJobStatus.FAILED or job.tx_hash:
+        return job, created
+
+    requeued = EscrowJob.objects.filter(
+        pk=job.pk, status=EscrowJobStatus.FAILED, tx_hash__isnull=True
+    ).update(
+        status=EscrowJobStatus.PENDING,
+        params=params or {},
+        requested_by=user,
+        last_error='',
+        started_at=None,
+        finished_at=None
+    )
+    job.refresh_from_db()
+    return job, bool(requeued)
+
+
+class EscrowJobWorker:
+    """
+    Worker pool that executes queued escrow jobs.
+    Jobs are claimed with a conditional update, as in the HCS outbox relay.
+    Transfers are not idempotent on-chain, so failed jobs are not retried
+    automatically; an admin requeues them after checking the mirror node.
+    Jobs left PROCESSING by a crashed worker are failed for the same review
+    once ESCROW_JOB_STALE_SECONDS have passed.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or getattr(settings, 'ESCROW_JOB_WORKERS', 4)
+        self.stale_after = getattr(settings, 'ESCROW_JOB_STALE_SECONDS', 600)
+
+    def run_batch(self, batch_size: int = 20) -> int:
+        """
+        Execute up to `batch_size` queued jobs concurrently.
+
+        Returns:
+            Number of jobs processed
+        """
+        stale = self.fail_stale_jobs()
+        if stale:
+            print(f"Failed {stale} stale escrow job(s) for admin review")
+
+        claimed = self._claim(batch_size)
+        if not claimed:
+            return 0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(self._execute, claimed))
+
+        return len(claimed)
+
+    def fail_stale_jobs(self) -> int:
+        """
+        Fail jobs whose worker stopped mid-transfer.
+
+        The transfer may or may not have reached Hedera, so the job is not
+        requeued; it is left FAILED for an admin to check against the
+        mirror node.
+
+        Returns:
+            Number of jobs failed
+        """
+        cutoff = timezone.now() - timedelta(seconds=self.stale_after)
+        return EscrowJob.objects.filter(
+            status=EscrowJobStatus.PROCESSING,
+            started_at__lt=cutoff
+        ).update(
+            status=EscrowJobStatus.FAILED,
+            last_error="Worker stopped while the transfer was in flight; "
+                       "check the mirror node before requeueing",
+            finished_at=timezone.now()
+        )
+
+    def _claim(self, batch_size: int) -> List[EscrowJob]:
+        """Claim queued jobs by flipping them to PROCESSING"""
+        candidates = list(
+            EscrowJob.objects.filter(status=EscrowJobStatus.PENDING)
+            .values_list('id', flat=True)[:batch_size]
+        )
+
+        claimed_ids = [
+            pk for pk in candidates
+            if EscrowJob.objects.filter(
+                pk=pk, status=EscrowJobStatus.PENDING
+            ).update(status=EscrowJobStatus.PROCESSING, started_at=timezone.now())
+        ]
+        return list(
+            EscrowJob.objects.select_related(
+                'investment__lender', 'investment__funding_request', 'milestone', 'requested_by'
+            ).filter(pk__in=claimed_ids)
+        )
+
+    def _execute(self, job: EscrowJob):
+        """Run one job and record its outcome"""
+        try:
+            if job.job_type == EscrowJobType.DEPOSIT:
+                self._deposit(job)
+            elif job.job_type == EscrowJobType.RELEASE:
+                self._release(job)
+            else:
+                raise ValueError(f"Unknown escrow job type: {job.job_type}")
+        except Exception as e:
+            job.status = EscrowJobStatus.FAILED
+            job.last_error = str(e)
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'last_error', 'finished_at'])
+            print(f"Escrow job {job.id} failed: {e}")
+
+    def _deposit(self, job: EscrowJob):
+        """Transfer an investment into escrow and mark it deposited"""
+        investment = job.investment
+        if investment.status != 'PENDING':
+            raise ValueError("Only pending investments can be deposited")
+
+        tx_hash = escrow_service.transfer_to_escrow(
+            investment.lender.hedera_account_id,
+            investment.amount
+        )
+        if not tx_hash:
+            raise RuntimeError("Escrow deposit transfer failed")
+        self._record_transfer(job, tx_hash)
+
+        with transaction.atomic():
+            investment.status = 'DEPOSITED'
+            investment.deposit_tx_hash = tx_hash
+            investment.save(update_fields=['status', 'deposit_tx_hash'])
+            escrow_ledger.record_deposit(investment, tx_hash)
+            self._succeed(job, tx_hash)
+
+    def _release(self, job: EscrowJob):
+        """
+        Release a verified milestone's funds to the recipient.
+        The transfer is recorded as an escrow leg first, under the same
+        funding request lock as batched releases and refunds, so the
+        investment cannot also be paid out by `release_milestone`.
+        """
+        investment = job.investment
+        release_amount = Decimal(job.params['release_amount'])
+        recipient_account = job.params['recipient_account']
+
+        leg = self._claim_release_leg(job, investment, release_amount, recipient_account)
+        milestone = leg.milestone
+
+        tx_hash = escrow_service.release_from_escrow(recipient_account, release_amount)
+        leg.tx_hash = tx_hash
+        leg.status = EscrowLegStatus.SUBMITTED if tx_hash else EscrowLegStatus.FAILED
+        leg.save(update_fields=['tx_hash', 'status'])
+        if not tx_hash:
+            raise RuntimeError("Escrow release transfer failed")
+        self._record_transfer(job, tx_hash)
+
+        with transaction.atomic():
+            milestone.status = 'RELEASED'
+            milestone.release_tx_hash = tx_hash
+            milestone.save(update_fields=['status', 'release_tx_hash'])
+
+            # Update investment if fully released
+            if release_amount >= investment.amount:
+                investment.status = 'COMPLETED'
+                investment.save(update_fields=['status'])
+
+            escrow_ledger.record_release(investment, release_amount, milestone, tx_hash)
+            self._succeed(job, tx_hash)
+
+        # Queue for HCS once the money state is committed
+        try:
+            topic_pool_service.enqueue_event(
+                investment.funding_request,
+                event_type='RELEASE_FUNDS',
+                payload={
+                    'milestone_id': str(milestone.id),
+                    'investment_id': str(investment.id),
+                    'release_amount': str(release_amount),
+                    'recipient_account': recipient_account,
+                    'tx_hash': tx_hash,
+                    'admin_id': str(job.requested_by_id),
+                    'timestamp': timezone.now().isoformat()
+                }
+            )
+        except Exception as e:
+            print(f"HCS logging failed for escrow job {job.id}: {e}")
+
+    def _claim_release_leg(self, job: EscrowJob, investment, release_amount: Decimal,
+                           recipient_account: str) -> EscrowReleaseLeg:
+        """Record a pending release leg, refusing amounts already paid or in flight"""
+        with transaction.atomic():
+            FundingRequest.objects.select_for_update().get(pk=investment.funding_request_id)
+            milestone = Milestone.objects.select_for_update().filter(
+                pk=job.milestone_id, status='VERIFIED'
+            ).first()
+            if milestone is None:
+                raise ValueError("Milestone not found or not verified")
+
+            investment.refresh_from_db(fields=['status'])
+            if investment.status != 'DEPOSITED':
+                raise ValueError("Only deposited investments can be released")
+
+            legs = EscrowReleaseLeg.objects.filter(investment=investment)
+            in_flight = legs.filter(
+                Q(kind=EscrowLegKind.RELEASE, milestone=milestone) | Q(kind=EscrowLegKind.REFUND),
+                status__in=[EscrowLegStatus.PENDING, EscrowLegStatus.SUBMITTED]
+            )
+            if in_flight.exists():
+                raise ValueError("Investment already has a release or refund for this milestone")
+
+            released = legs.filter(
+                kind=EscrowLegKind.RELEASE, status=EscrowLegStatus.SUBMITTED
+            ).aggregate(total=Sum('amount', default=Decimal('0')))['total']
+            if release_amount > investment.amount - released:
+                raise ValueError("Release amount exceeds the unreleased deposit")
+
+            return EscrowReleaseLeg.objects.create(
+                batch_id=job.id,
+                kind=EscrowLegKind.RELEASE,
+                investment=investment,
+                milestone=milestone,
+                recipient_account=recipient_account,
+                amount=release_amount
+            )
+
+    def _record_transfer(self, job: EscrowJob, tx_hash: str):
+        """Persist the transaction hash before applying state changes"""
+        job.tx_hash = tx_hash
+        job.save(update_fields=['tx_hash'])
+
+    def _succeed(self, job: EscrowJob, tx_hash: str):
+        job.status = EscrowJobStatus.SUCCEEDED
+        job.tx_hash = tx_hash
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'tx_hash', 'finished_at'])
@@ -0,0 +1,166 @@
+"""
+Local escrow sub-ledger for NileFi.
+Deposits, releases and refunds are posted as append-only double entries,
+and running balances for the escrow total, each funding request and each
+investor are updated in the same database transaction. Balance reads
+never touch the network; `reconcile` compares the ledger with the chain.
+"""
+
+import uuid
+from decimal import Decimal
+from typing import Dict, Optional
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from investments.models import (
+    EscrowLedgerEntry, EscrowBalance, BalanceScope, LedgerAccount, LedgerEntryType
+)
+from .escrow_service import escrow_service
+
+
+ESCROW_KEY = 'ESCROW'
+
+
+class EscrowLedger:
+    """
+    Double-entry escrow ledger.
+    Each posting debits/credits the escrow asset account against the
+    funding request liability account; the liability entry carries the
+    investor so per-investor balances can be maintained too.
+    """
+
+    def record_deposit(self, investment, tx_hash: Optional[str] = None) -> Optional[uuid.UUID]:
+        """
+        Post an investment's deposit into escrow.
+        Idempotent: a second call for the same investment is ignored.
+
+        Returns:
+            Posting ID, or None if the deposit was already posted
+        """
+        with transaction.atomic():
+            if EscrowLedgerEntry.objects.filter(
+                investment=investment, entry_type=LedgerEntryType.DEPOSIT
+            ).exists():
+                return None
+            return self._post(LedgerEntryType.DEPOSIT, investment, investment.amount, tx_hash)
+
+    def record_release(
+        self,
+        investment,
+        amount: Decimal,
+        milestone=None,
+        tx_hash: Optional[str] = None
+    ) -> uuid.UUID:
+        """Post a milestone release of `amount` from an investment's escrowed funds"""
+        return self._post(LedgerEntryType.RELEASE, investment, -amount, tx_hash, milestone)
+
+    def record_refund(
+        self,
+        investment,
+        amount: Decimal,
+        tx_hash: Optional[str] = None
+    ) -> uuid.UUID:
+        """Post a refund of `amount` back to the investor"""
+        return self._post(LedgerEntryType.REFUND, investment, -amount, tx_hash)
+
+    def escrow_total(self) -> Decimal:
+        """Total HBAR the platform holds in escrow according to the ledger"""
+        return self._read(ESCROW_KEY)
+
+    def funding_request_balance(self, funding_request) -> Decimal:
+        """HBAR held in escrow for a funding request"""
+        return self._read(f"FR:{funding_request.pk}")
+
+    def investor_balance(self, investor) -> Decimal:
+        """HBAR held in escrow on behalf of an investor"""
+        return self._read(f"INV:{investor.pk}")
+
+    def solvency(self) -> Dict:
+        """
+        Ledger total against the last reconciled on-chain balance.
+
+        Returns:
+            Dict with ledger_balance, onchain_balance, drift, solvent and reconciled_at
+        """
+        row = EscrowBalance.objects.filter(key=ESCROW_KEY).first()
+        ledger = row.amount if row else Decimal('0')
+        onchain = row.onchain_amount if row else None
+        return {
+            'ledger_balance': ledger,
+            'onchain_balance': onchain,
+            'drift': None if onchain is None else onchain - ledger,
+            'solvent': None if onchain is None else onchain >= ledger,
+            'reconciled_at': row.reconciled_at if row else None,
+        }
+
+    def reconcile(self) -> Dict:
+        """
+        Compare the ledger total with the escrow account's on-chain balance
+        and store the result on the escrow balance row.
+
+        Returns:
+            Same shape as `solvency`
+        """
+        onchain = escrow_service.get_escrow_balance()
+        if onchain is None:
+            raise RuntimeError("Could not read the on-chain escrow balance")
+
+        self._ensure(ESCROW_KEY, BalanceScope.ESCROW)
+        EscrowBalance.objects.filter(key=ESCROW_KEY).update(
+            onchain_amount=onchain.quantize(Decimal('0.01')),
+            reconciled_at=timezone.now()
+        )
+        return self.solvency()
+
+    def _post(
+        self,
+        entry_type: str,
+        investment,
+        amount: Decimal,
+        tx_hash: Optional[str],
+        milestone=None
+    ) -> uuid.UUID:
+        """Write both sides of a posting and move the running balances by `amount`"""
+        posting_id = uuid.uuid4()
+        common = {
+            'posting_id': posting_id,
+            'entry_type': entry_type,
+            'funding_request_id': investment.funding_request_id,
+            'investor_id': investment.lender_id,
+            'investment': investment,
+            'milestone': milestone,
+            'tx_hash': tx_hash,
+        }
+
+        with transaction.atomic():
+            EscrowLedgerEntry.objects.bulk_create([
+                EscrowLedgerEntry(account=LedgerAccount.ESCROW, amount=amount, **common),
+                EscrowLedgerEntry(account=LedgerAccount.FUNDING_REQUEST, amount=-amount, **common),
+            ])
+            self._apply(ESCROW_KEY, BalanceScope.ESCROW, amount)
+            self._apply(
+                f"FR:{investment.funding_request_id}", BalanceScope.FUNDING_REQUEST, amount,
+                funding_request_id=investment.funding_request_id
+            )
+            self._apply(
+                f"INV:{investment.lender_id}", BalanceScope.INVESTOR, amount,
+                investor_id=investment.lender_id
+            )
+        return posting_id
+
+    def _apply(self, key: str, scope: str, delta: Decimal, **owner):
+        """Atomically add `delta` to a running balance row"""
+        self._ensure(key, scope, **owner)
+        EscrowBalance.objects.filter(key=key).update(amount=F('amount') + delta)
+
+    def _ensure(self, key: str, scope: str, **owner):
+        EscrowBalance.objects.get_or_create(key=key, defaults={'scope': scope, **owner})
+
+    def _read(self, key: str) -> Decimal:
+        amount = EscrowBalance.objects.filter(key=key).values_list('amount', flat=True).first()
+        return amount if amount is not None else Decimal('0')
+
+
+# Singleton instance
+escrow_ledger = EscrowLedger()
@@ -4,23 +4,23 @@ Manages escrow account for holding investor funds until milestone verification.
 """
 
 import time
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from django.conf import settings
 
+from .client_pool import client_pool
+from .simulator import TINYBARS_PER_HBAR, get_simulator, is_simulated, tinybars
+
 try:
     from hiero_sdk_python import (
-        Client,
-        PrivateKey,
         AccountId,
         Hbar,
         CryptoGetAccountBalanceQuery,
         TransferTransaction,
     )
-    HIERO_AVAILABLE = True
 except ImportError:
-    HIERO_AVAILABLE = False
-    print("Warning: hiero-sdk-python not available. Using mock implementation.")
+    pass
 
 
 class EscrowService:
@@ -28,6 +28,7 @@ class EscrowService:
     Custodial escrow service for managing funds.
     In MVP, uses a custodial account controlled by the platform.
     Can be upgraded to smart contract escrow later.
+    Clients are leased from the shared pool on first use.
     """
     
     def __init__(self):
@@ -35,31 +36,21 @@ class EscrowService:
         self.operator_id = settings.HEDERA_OPERATOR_ID
         self.operator_key = settings.HEDERA_OPERATOR_KEY
         self.escrow_account_id = settings.HEDERA_ESCROW_ACCOUNT_ID
-        
-        if HIERO_AVAILABLE and self.operator_id and self.operator_key:
-            self.client = self._init_client()
-        else:
-            self.client = None
-            print("Escrow: Running in mock mode")
+        # Hedera caps the HBAR transfer list of one CryptoTransfer at 10
+        # account amounts: one escrow debit plus up to 9 credits
+        self.max_transfers = getattr(settings, 'HEDERA_MAX_TRANSFERS_PER_TX', 10)
+        self.batch_workers = getattr(settings, 'ESCROW_BATCH_WORKERS', 4)
     
-    def _init_client(self):
-        """Initialize Hedera client"""
-        try:
-            if self.network == 'testnet':
-                client = Client.forTestnet()
-            elif self.network == 'mainnet':
-                client = Client.forMainnet()
-            else:
-                raise ValueError(f"Unknown network: {self.network}")
-            
-            operator_key = PrivateKey.fromStringED25519(self.operator_key)
-            operator_account = AccountId.fromString(self.operator_id)
-            
-            client.setOperator(operator_account, operator_key)
-            return client
-        except Exception as e:
-            print(f"Error initializing Hedera client: {e}")
-            return None
+    @property
+    def is_live(self) -> bool:
+        """True when transfers are executed on Hedera (or the simulator) rather than mocked"""
+        if is_simulated():
+            return True
+        return client_pool.is_available(self.operator_id, self.operator_key)
+    
+    def _lease(self):
+        """Lease a pooled client for this service's operator"""
+        return client_pool.lease(self.network, self.operator_id, self.operator_key)
     
     def transfer_to_escrow(
         self,
@@ -73,9 +64,18 @@ class EscrowService:
         
         Returns transaction hash if successful.
         """
-        if not self.client:
+        if not self.is_live:
             return self._mock_transaction_hash()
         
+        if is_simulated():
+            try:
+                return get_simulator().transfer(
+                    [(from_account_id, -tinybars(amount)), (self.escrow_account_id, tinybars(amount))]
+                )
+            except Exception as e:
+                print(f"Error in escrow transfer: {e}")
+                return None
+        
         try:
             # In practice, the investor initiates this transaction
             # This is a placeholder for backend-initiated transfers if needed
@@ -107,26 +107,91 @@ class EscrowService:
         Returns:
             Transaction hash if successful
         """
-        if not self.client:
+        return self._transfer_from_escrow({to_account_id: amount}, memo)
+    
+    def batch_release(
+        self,
+        legs: List[Tuple[str, Decimal]],
+        memo: str = ""
+    ) -> List[Optional[str]]:
+        """
+        Release many legs from escrow in as few transactions as possible.
+        Legs to the same account are merged into one credit, and each
+        transaction carries one aggregated escrow debit plus up to
+        `max_transfers - 1` credits. Transactions are submitted concurrently.
+        
+        Args:
+            legs: (recipient account ID, amount in HBAR) pairs
+            memo: Transaction memo
+        
+        Returns:
+            Transaction hash for each leg, in input order (None where its
+            transaction failed)
+        """
+        if not legs:
+            return []
+        
+        totals: Dict[str, Decimal] = {}
+        for account_id, amount in legs:
+            totals[account_id] = totals.get(account_id, Decimal('0')) + amount
+        
+        accounts = list(totals)
+        per_transaction = self.max_transfers - 1
+        groups = [accounts[i:i + per_transaction] for i in range(0, len(accounts), per_transaction)]
+        
+        with ThreadPoolExecutor(max_workers=min(len(groups), self.batch_workers)) as executor:
+            tx_hashes = list(executor.map(
+                lambda group: self._transfer_from_escrow(
+                    {account_id: totals[account_id] for account_id in group}, memo
+                ),
+                groups
+            ))
+        
+        tx_by_account = {
+            account_id: tx_hash
+            for group, tx_hash in zip(groups, tx_hashes)
+            for account_id in group
+        }
+        return [tx_by_account[account_id] for account_id, _ in legs]
+    
+    def _transfer_from_escrow(self, credits: Dict[str, Decimal], memo: str = "") -> Optional[str]:
+        """
+        Execute one transfer debiting escrow for the sum of `credits`.
+        
+        Returns:
+            Transaction hash if successful
+        """
+        if not self.is_live:
             return self._mock_transaction_hash()
         
+        total = sum(credits.values(), Decimal('0'))
         try:
-            # Create transfer transaction
-            transaction = (
-                TransferTransaction()
-                .addHbarTransfer(AccountId.fromString(self.escrow_account_id), amount.negated())
-                .addHbarTransfer(AccountId.fromString(to_account_id), amount)
-                .setTransactionMemo(memo)
-            )
+            if is_simulated():
+                tx_hash = get_simulator().transfer(
+                    [(self.escrow_account_id, -tinybars(total))]
+                    + [(account_id, tinybars(amount)) for account_id, amount in credits.items()],
+                    memo
+                )
+                print(f"Released {total} HBAR from escrow to {len(credits)} account(s)")
+                return tx_hash
             
-            # Execute transaction
-            response = transaction.execute(self.client)
-            receipt = response.getReceipt(self.client)
+            with self._lease() as lease:
+                # Create transfer transaction
+                transaction = TransferTransaction().addHbarTransfer(
+                    AccountId.fromString(self.escrow_account_id), total.negated()
+                )
+                for account_id, amount in credits.items():
+                    transaction.addHbarTransfer(AccountId.fromString(account_id), amount)
+                transaction = lease.pin_nodes(transaction.setTransactionMemo(memo))
+                
+                # Execute transaction
+                response = lease.execute(transaction)
+                receipt = response.getReceipt(lease.client)
             
             # Get transaction hash
             tx_hash = str(response.transactionId)
             
-            print(f"Released {amount} HBAR from escrow to {to_account_id}")
+            print(f"Released {total} HBAR from escrow to {len(credits)} account(s)")
             print(f"Transaction hash: {tx_hash}")
             
             return tx_hash
@@ -160,15 +225,18 @@ class EscrowService:
         Get current balance of escrow account.
         Useful for monitoring and auditing.
         """
-        if not self.client:
+        if not self.is_live:
             return Decimal("1000.00")  # Mock balance
         
         try:
-            # Query account balance
-            from hiero_sdk_python import CryptoGetAccountBalanceQuery
+            if is_simulated():
+                balance = get_simulator().get_balance(self.escrow_account_id)
+                return Decimal(balance) / TINYBARS_PER_HBAR
             
-            query = CryptoGetAccountBalanceQuery().setAccountId(AccountId.fromString(self.escrow_account_id))
-            balance = query.execute(self.client)
+            # Query account balance
+            with self._lease() as lease:
+                query = CryptoGetAccountBalanceQuery().setAccountId(AccountId.fromString(self.escrow_account_id))
+                balance = lease.execute(query)
             
             # Convert to Decimal
             hbar_balance = balance.hbars
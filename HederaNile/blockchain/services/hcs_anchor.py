@@ -0,0 +1,196 @@
+"""
+Merkle-batched HCS anchoring for NileFi audit events.
+Audit events collected over a window are hashed into a Merkle tree and
+only the root is submitted to HCS, so transaction count grows with the
+number of windows instead of the number of events. Events are batched
+per topic, so funding-request events are anchored to their own topic.
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Optional
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from blockchain.models import HCSAnchorBatch, HCSOutboxMessage, OutboxStatus
+from .hcs_service import hcs_service
+from .hcs_outbox import enqueue_hcs_event
+from .merkle import build_tree, merkle_root, inclusion_path, verify_inclusion
+
+
+ANCHOR_EVENT_TYPE = 'MERKLE_ANCHOR'
+
+
+def is_batch_mode() -> bool:
+    """True when audit events are anchored in Merkle batches"""
+    return getattr(settings, 'HCS_ANCHOR_MODE', 'message') == 'batch'
+
+
+def audit_leaf_hash(audit_log) -> str:
+    """Leaf hash of an audit event, using the HCS `_hash_payload` scheme"""
+    leaf = {
+        'id': str(audit_log.id),
+        'event_type': audit_log.event_type,
+        'payload': audit_log.payload,
+        'created_at': audit_log.created_at.isoformat(),
+    }
+    if audit_log.topic_id:
+        leaf['topic_id'] = audit_log.topic_id
+    return hcs_service._hash_payload(leaf)
+
+
+class HCSAnchorService:
+    """
+    Builds Merkle batches of batched events' audit logs and queues their roots
+    on the HCS outbox. Once the relay has submitted a root, `propagate`
+    copies its message ID onto every event in the batch.
+    """
+
+    def __init__(self):
+        self.window = getattr(settings, 'HCS_ANCHOR_WINDOW', 60)
+        self.max_leaves = getattr(settings, 'HCS_ANCHOR_MAX_LEAVES', 10_000)
+
+    def anchor_pending(self, window_end=None) -> List[HCSAnchorBatch]:
+        """
+        Anchor the audit logs of BATCHED outbox events created before
+        `window_end` (up to `HCS_ANCHOR_MAX_LEAVES`), one batch per topic.
+        Audit logs without a batched event, e.g. ones already submitted
+        individually in message mode, are left alone.
+
+        Returns:
+            The new batches (empty if there was nothing to anchor)
+        """
+        from investments.models import AuditLog
+
+        window_end = window_end or timezone.now()
+
+        with transaction.atomic():
+            logs = list(
+                AuditLog.objects.select_for_update()
+                .filter(
+                    anchor_batch__isnull=True,
+                    created_at__lt=window_end,
+                    pk__in=HCSOutboxMessage.objects.filter(
+                        status=OutboxStatus.BATCHED
+                    ).values('audit_log_id')
+                )
+                .order_by('created_at', 'id')[:self.max_leaves]
+            )
+
+            by_topic = defaultdict(list)
+            for log in logs:
+                by_topic[log.topic_id or hcs_service.topic_id].append(log)
+
+            batches = [
+                self._anchor(topic_logs, topic_id, window_end)
+                for topic_id, topic_logs in by_topic.items()
+            ]
+
+        for batch in batches:
+            print(f"Anchored {batch.leaf_count} audit events under root {batch.merkle_root}")
+        return batches
+
+    def _anchor(self, logs: List, topic_id: Optional[str], window_end) -> HCSAnchorBatch:
+        """Build one batch from `logs` and queue its root on `topic_id`"""
+        from investments.models import AuditLog
+
+        leaves = [audit_leaf_hash(log) for log in logs]
+        levels = build_tree(leaves)
+        root = merkle_root(levels)
+
+        batch = HCSAnchorBatch.objects.create(
+            merkle_root=root,
+            leaf_count=len(logs),
+            window_start=logs[0].created_at,
+            window_end=window_end,
+            topic_id=topic_id,
+        )
+
+        for index, log in enumerate(logs):
+            log.anchor_batch = batch
+            log.merkle_leaf_hash = leaves[index]
+            log.merkle_leaf_index = index
+            log.merkle_path = inclusion_path(levels, index)
+
+        AuditLog.objects.bulk_update(
+            logs,
+            ['anchor_batch', 'merkle_leaf_hash', 'merkle_leaf_index', 'merkle_path'],
+            batch_size=500
+        )
+
+        enqueue_hcs_event(
+            event_type=ANCHOR_EVENT_TYPE,
+            payload={
+                'batch_id': str(batch.id),
+                'merkle_root': root,
+                'leaf_count': batch.leaf_count,
+                'window_start': batch.window_start.isoformat(),
+                'window_end': batch.window_end.isoformat(),
+            },
+            topic_id=batch.topic_id,
+            target=batch,
+            target_field='hcs_message_id',
+        )
+        return batch
+
+    def propagate(self, batch_id: str, message_id: str, status: str = OutboxStatus.SUBMITTED):
+        """
+        Copy a submitted root's message ID (and status) onto the batch's events.
+        Leaf data was written at anchor time, so this is one UPDATE for the
+        audit logs, one per write-back target field and one for the outbox.
+        """
+        from investments.models import AuditLog
+
+        AuditLog.objects.filter(anchor_batch_id=batch_id).update(hcs_message_id=message_id)
+
+        batched = HCSOutboxMessage.objects.filter(
+            status=OutboxStatus.BATCHED,
+            audit_log__anchor_batch_id=batch_id
+        )
+        targets = defaultdict(list)
+        for target_model, target_field, target_pk in batched.exclude(
+            target_model=''
+        ).exclude(target_field='').values_list('target_model', 'target_field', 'target_pk'):
+            targets[(target_model, target_field)].append(target_pk)
+        for (target_model, target_field), pks in targets.items():
+            apps.get_model(target_model).objects.filter(pk__in=pks).update(
+                **{target_field: message_id}
+            )
+
+        now = timezone.now()
+        batched.update(
+            status=status,
+            message_id=message_id,
+            submitted_at=now,
+            confirmed_at=now if status == OutboxStatus.CONFIRMED else None
+        )
+
+    def get_inclusion_proof(self, audit_log) -> Optional[Dict]:
+        """
+        Inclusion proof for an anchored audit event.
+
+        Returns:
+            Proof dict, or None if the event has not been anchored yet
+        """
+        batch = audit_log.anchor_batch
+        if batch is None:
+            return None
+
+        leaf = audit_leaf_hash(audit_log)
+        return {
+            'audit_log_id': str(audit_log.id),
+            'leaf_hash': leaf,
+            'leaf_index': audit_log.merkle_leaf_index,
+            'path': audit_log.merkle_path,
+            'merkle_root': batch.merkle_root,
+            'leaf_count': batch.leaf_count,
+            'batch_id': str(batch.id),
+            'topic_id': batch.topic_id,
+            'hcs_message_id': batch.hcs_message_id,
+            'verified': verify_inclusion(leaf, audit_log.merkle_path, batch.merkle_root),
+        }
+
+
+# Singleton instance
+hcs_anchor_service = HCSAnchorService()
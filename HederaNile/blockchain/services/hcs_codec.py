@@ -0,0 +1,288 @@
+"""
+Versioned HCS message encoding for NileFi.
+
+Version 1 is the original JSON document:
+    {"event_type": ..., "timestamp": ISO-8601, "payload": {...}, "hash": hex}
+
+Version 2 is a compact msgpack frame, prefixed with the byte 0x02 (a JSON
+message always starts with "{"), holding
+    [event_code, timestamp, payload, hash]
+with binary UUIDs, integer tinybar amounts, integer timestamps and a raw
+32-byte hash. Each compact value restores to exactly the original string,
+so a decoded message still verifies against its `_hash_payload` hash.
+
+Messages over the 1 KB HCS chunk size are split by the SDK into chunks;
+`reassemble_chunks` joins mirror-node chunks before decoding.
+"""
+
+import base64
+import json
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+
+VERSION_JSON = 1
+VERSION_COMPACT = 2
+COMPACT_PREFIX = b'\x02'
+
+# HCS splits messages into chunks of at most this many bytes
+HCS_CHUNK_SIZE = 1024
+
+TINYBARS_PER_HBAR = 100_000_000
+AMOUNT_KEYS = frozenset({'amount', 'release_amount', 'refund_amount', 'total_amount'})
+
+# msgpack extension type codes
+EXT_UUID = 1
+EXT_AMOUNT = 2
+EXT_DATETIME = 3
+
+# Event types get a one-byte code; unknown types are sent as strings.
+# Append only - codes are part of the wire format.
+EVENT_CODES = [
+    'CREATE_REQUEST',
+    'DEPOSIT',
+    'MILESTONE_COMPLETE',
+    'VERIFY_MILESTONE',
+    'RELEASE_FUNDS',
+    'REFUND',
+    'STARTUP_APPROVED',
+    'SCORE_CALCULATED',
+    'STATUS_UPDATE',
+    'MILESTONE_PROOF_SUBMITTED',
+    'MERKLE_ANCHOR',
+]
+EVENT_CODE_BY_TYPE = {event_type: code for code, event_type in enumerate(EVENT_CODES)}
+
+
+class HCSDecodeError(ValueError):
+    """Raised when an HCS message is in neither the JSON nor compact format"""
+
+
+def encode_message(message_data: Dict, version: int = VERSION_COMPACT) -> bytes:
+    """
+    Encode an HCS message document.
+
+    Args:
+        message_data: {"event_type", "timestamp", "payload", "hash"}
+        version: VERSION_COMPACT (falls back to JSON without msgpack) or VERSION_JSON
+
+    Returns:
+        Message bytes ready for TopicMessageSubmitTransaction
+    """
+    if version == VERSION_JSON or not MSGPACK_AVAILABLE:
+        return json.dumps(message_data).encode()
+
+    event_type = message_data['event_type']
+    frame = [
+        EVENT_CODE_BY_TYPE.get(event_type, event_type),
+        _compact_value(message_data['timestamp']),
+        _compact_payload(message_data['payload']),
+        bytes.fromhex(message_data['hash']),
+    ]
+    return COMPACT_PREFIX + msgpack.packb(frame, default=_pack_ext, use_bin_type=True)
+
+
+def decode_message(raw: bytes) -> Dict:
+    """
+    Decode an HCS message in either format.
+    Topics accept messages from anyone, so every malformed input is
+    reported as HCSDecodeError.
+
+    Returns:
+        The message document with a "version" key added
+    """
+    if raw[:1] == COMPACT_PREFIX:
+        return _decode_compact(raw[1:])
+
+    try:
+        message = json.loads(raw)
+    except ValueError as e:
+        raise HCSDecodeError(f"Unrecognised HCS message format: {e}")
+    if not isinstance(message, dict):
+        raise HCSDecodeError(f"HCS message is a JSON {type(message).__name__}, not an object")
+    message['version'] = VERSION_JSON
+    return message
+
+
+def decode_mirror_message(message: Dict) -> Dict:
+    """Decode a mirror-node topic message (base64 `message` field)"""
+    try:
+        raw = base64.b64decode(message['message'])
+    except (KeyError, TypeError, ValueError) as e:
+        raise HCSDecodeError(f"Invalid mirror-node message: {e}")
+    return decode_message(raw)
+
+
+def _decode_compact(body: bytes) -> Dict:
+    if not MSGPACK_AVAILABLE:
+        raise HCSDecodeError("msgpack is required to decode compact HCS messages")
+    try:
+        frame = msgpack.unpackb(body, ext_hook=_unpack_ext, raw=False, strict_map_key=False)
+    except Exception as e:
+        raise HCSDecodeError(f"Invalid compact HCS message: {e}")
+
+    if not isinstance(frame, list) or len(frame) != 4:
+        raise HCSDecodeError("Compact HCS message is not a 4-item frame")
+    event, timestamp, payload, digest = frame
+
+    if isinstance(event, int) and not isinstance(event, bool):
+        if not 0 <= event < len(EVENT_CODES):
+            raise HCSDecodeError(f"Unknown HCS event code {event}")
+        event = EVENT_CODES[event]
+    elif not isinstance(event, str):
+        raise HCSDecodeError("Compact HCS event type is neither a code nor a string")
+    if not isinstance(payload, dict):
+        raise HCSDecodeError("Compact HCS payload is not a map")
+    if not isinstance(digest, bytes):
+        raise HCSDecodeError("Compact HCS hash is not binary")
+
+    return {
+        'version': VERSION_COMPACT,
+        'event_type': event,
+        'timestamp': timestamp,
+        'payload': payload,
+        'hash': digest.hex(),
+    }
+
+
+def reassemble_chunks(messages: Iterable[Dict]) -> List[bytes]:
+    """
+    Join chunked mirror-node topic messages.
+
+    Messages without `chunk_info`, or with a total of 1, pass through.
+    Chunk groups are keyed by their initial transaction ID; incomplete
+    groups are dropped.
+
+    Returns:
+        Raw message bytes, in the order each message (or its first chunk)
+        was seen
+    """
+    order: List = []
+    groups: Dict = defaultdict(dict)
+    totals: Dict = {}
+
+    for message in messages:
+        chunk_info = message.get('chunk_info') or {}
+        total = chunk_info.get('total', 1)
+        data = base64.b64decode(message['message'])
+        if total <= 1:
+            order.append(data)
+            continue
+
+        initial = chunk_info['initial_transaction_id']
+        key = (initial.get('account_id'), initial.get('transaction_valid_start'), initial.get('nonce'))
+        if key not in totals:
+            order.append(key)
+            totals[key] = total
+        groups[key][chunk_info['number']] = data
+
+    result = []
+    for item in order:
+        if isinstance(item, bytes):
+            result.append(item)
+        elif len(groups[item]) == totals[item]:
+            result.append(b''.join(groups[item][n] for n in sorted(groups[item])))
+    return result
+
+
+def chunk_count(raw: bytes) -> int:
+    """Number of HCS chunks needed for a message"""
+    return max(1, -(-len(raw) // HCS_CHUNK_SIZE))
+
+
+def _compact_payload(payload: Dict) -> Dict:
+    return {
+        key: _compact_amount(value) if key in AMOUNT_KEYS else _compact_value(value)
+        for key, value in payload.items()
+    }
+
+
+def _compact_value(value):
+    """Convert strings that round-trip exactly into compact wrappers"""
+    if isinstance(value, dict):
+        return _compact_payload(value)
+    if isinstance(value, list):
+        return [_compact_value(item) for item in value]
+    if not isinstance(value, str):
+        return value
+
+    if len(value) == 36:
+        try:
+            parsed = uuid.UUID(value)
+            if str(parsed) == value:
+                return parsed
+        except ValueError:
+            pass
+
+    if len(value) >= 19 and value[4:5] == '-' and value[10:11] == 'T':
+        try:
+            parsed = datetime.fromisoformat(value)
+            if parsed.isoformat() == value:
+                return parsed
+        except ValueError:
+            pass
+
+    return value
+
+
+def _compact_amount(value):
+    """HBAR decimal strings become (tinybars, decimal places)"""
+    if isinstance(value, str):
+        try:
+            amount = Decimal(value)
+        except InvalidOperation:
+            return value
+        if amount.is_finite() and str(amount) == value:
+            exponent = amount.as_tuple().exponent
+            tinybars = amount * TINYBARS_PER_HBAR
+            if -8 <= exponent <= 0 and tinybars == tinybars.to_integral_value():
+                return _Amount(int(tinybars), -exponent)
+    return _compact_value(value)
+
+
+class _Amount:
+    """Tinybar amount plus the number of decimal places to restore"""
+
+    def __init__(self, tinybars: int, places: int):
+        self.tinybars = tinybars
+        self.places = places
+
+
+def _pack_ext(obj):
+    if isinstance(obj, uuid.UUID):
+        return msgpack.ExtType(EXT_UUID, obj.bytes)
+    if isinstance(obj, _Amount):
+        return msgpack.ExtType(EXT_AMOUNT, msgpack.packb([obj.tinybars, obj.places]))
+    if isinstance(obj, datetime):
+        epoch = datetime(1970, 1, 1, tzinfo=obj.tzinfo)
+        micros = (obj - epoch) // timedelta(microseconds=1)
+        offset = obj.utcoffset()
+        offset_minutes = None if offset is None else int(offset.total_seconds() // 60)
+        return msgpack.ExtType(EXT_DATETIME, msgpack.packb([micros, offset_minutes]))
+    raise TypeError(f"Cannot encode {type(obj).__name__} in compact HCS message")
+
+
+def _unpack_ext(code: int, data: bytes):
+    if code == EXT_UUID:
+        return str(uuid.UUID(bytes=data))
+    if code == EXT_AMOUNT:
+        tinybars, places = msgpack.unpackb(data)
+        amount = Decimal(tinybars) / TINYBARS_PER_HBAR
+        return str(amount.quantize(Decimal(1).scaleb(-places)))
+    if code == EXT_DATETIME:
+        micros, offset_minutes = msgpack.unpackb(data)
+        tz: Optional[dt_timezone] = None
+        if offset_minutes is not None:
+            tz = dt_timezone(timedelta(minutes=offset_minutes))
+        epoch = datetime(1970, 1, 1, tzinfo=tz)
+        return (epoch + timedelta(microseconds=micros)).isoformat()
+    return msgpack.ExtType(code, data)
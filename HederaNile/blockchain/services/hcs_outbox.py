@@ -0,0 +1,346 @@
+"""
+Durable HCS outbox for NileFi.
+Request handlers enqueue events here instead of waiting for consensus;
+the relay worker submits them concurrently and writes message IDs back.
+With HCS_SUBMIT_MODE = 'precheck' the relay does not wait for receipts,
+and the reconciler confirms consensus in bulk from the mirror node.
+"""
+
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, List, Optional
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from blockchain.models import HCSOutboxMessage, OutboxStatus
+from .hcs_service import hcs_service
+from .mirror_node_service import mirror_node_service
+
+
+TOPIC_CREATE_EVENT = 'CREATE_TOPIC'
+
+
+def enqueue_hcs_event(
+    event_type: str,
+    payload: Dict,
+    topic_id: Optional[str] = None,
+    audit_log=None,
+    target=None,
+    target_field: str = '',
+    depends_on: Optional[HCSOutboxMessage] = None,
+) -> HCSOutboxMessage:
+    """
+    Queue an event for asynchronous submission to HCS.
+
+    In batched anchoring mode (`HCS_ANCHOR_MODE = 'batch'`) the event is
+    held as BATCHED until its Merkle root has been submitted; see
+    `hcs_anchor.HCSAnchorService`. The Merkle leaf is the caller's
+    `audit_log`, which is tagged with the topic it is anchored to; an
+    AuditLog is only created for events queued without one.
+
+    Args:
+        event_type: Type of event (CREATE_REQUEST, DEPOSIT, VERIFY, RELEASE, etc.)
+        payload: Event data as dictionary
+        topic_id: Optional specific topic ID (defaults to platform topic)
+        audit_log: Optional AuditLog whose hcs_message_id is filled in on submission
+        target: Optional model instance that receives the message ID
+        target_field: Field on `target` that receives the message ID
+        depends_on: Optional outbox message that must be submitted first;
+            if `topic_id` is empty, the topic is taken from its result
+
+    Returns:
+        The persisted outbox message
+    """
+    batched = (
+        getattr(settings, 'HCS_ANCHOR_MODE', 'message') == 'batch'
+        and event_type not in ('MERKLE_ANCHOR', TOPIC_CREATE_EVENT)
+    )
+    if batched and (
+        audit_log is None
+        or audit_log.anchor_batch_id is not None
+        or (audit_log.topic_id and audit_log.topic_id != topic_id)
+    ):
+        from investments.models import AuditLog
+        audit_log = AuditLog.objects.create(
+            event_type=event_type, payload=payload, topic_id=topic_id
+        )
+    elif batched and audit_log.topic_id != topic_id:
+        audit_log.topic_id = topic_id
+        audit_log.save(update_fields=['topic_id'])
+
+    message = HCSOutboxMessage(
+        event_type=event_type,
+        payload=payload,
+        topic_id=topic_id,
+        audit_log=audit_log,
+        depends_on=depends_on,
+        status=OutboxStatus.BATCHED if batched else OutboxStatus.PENDING,
+    )
+    if target is not None and target_field:
+        message.target_model = target._meta.label
+        message.target_pk = str(target.pk)
+        message.target_field = target_field
+    message.save()
+    return message
+
+
+class HCSOutboxRelay:
+    """
+    Relay worker that drains the HCS outbox.
+    Messages are claimed with a conditional update so several relays can
+    run side by side without submitting the same event twice. A claim is
+    a lease: messages left PROCESSING by a relay that died are returned to
+    PENDING once HCS_OUTBOX_CLAIM_TIMEOUT seconds have passed.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_attempts: Optional[int] = None):
+        self.workers = workers or getattr(settings, 'HCS_OUTBOX_WORKERS', 8)
+        self.max_attempts = max_attempts or getattr(settings, 'HCS_OUTBOX_MAX_ATTEMPTS', 5)
+        self.retry_delay = getattr(settings, 'HCS_OUTBOX_RETRY_DELAY', 30)
+        self.claim_timeout = getattr(settings, 'HCS_OUTBOX_CLAIM_TIMEOUT', 300)
+
+    def relay_batch(self, batch_size: int = 100) -> int:
+        """
+        Submit up to `batch_size` due messages concurrently.
+
+        Returns:
+            Number of messages processed in this batch
+        """
+        reclaimed = self.reclaim_expired()
+        if reclaimed:
+            print(f"Requeued {reclaimed} HCS outbox message(s) with expired claims")
+
+        claimed = self._claim(batch_size)
+        if not claimed:
+            return 0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(self._submit, claimed))
+
+        return len(claimed)
+
+    def reclaim_expired(self) -> int:
+        """
+        Return messages whose claim has expired to PENDING.
+
+        Returns:
+            Number of messages requeued
+        """
+        cutoff = timezone.now() - timedelta(seconds=self.claim_timeout)
+        return HCSOutboxMessage.objects.filter(
+            Q(claimed_at__lt=cutoff) | Q(claimed_at__isnull=True),
+            status=OutboxStatus.PROCESSING
+        ).update(
+            status=OutboxStatus.PENDING,
+            claim_token=None,
+            claimed_at=None,
+            next_attempt_at=timezone.now()
+        )
+
+    def _claim(self, batch_size: int) -> List[HCSOutboxMessage]:
+        """Claim due PENDING messages by flipping them to PROCESSING"""
+        candidates = list(
+            HCSOutboxMessage.objects.filter(
+                Q(depends_on__isnull=True)
+                | Q(depends_on__status__in=[OutboxStatus.SUBMITTED, OutboxStatus.CONFIRMED]),
+                status=OutboxStatus.PENDING,
+                next_attempt_at__lte=timezone.now()
+            ).values_list('id', flat=True)[:batch_size]
+        )
+        if not candidates:
+            return []
+
+        # One conditional UPDATE; the token identifies the rows this relay won
+        token = uuid.uuid4()
+        HCSOutboxMessage.objects.filter(
+            pk__in=candidates, status=OutboxStatus.PENDING
+        ).update(status=OutboxStatus.PROCESSING, claim_token=token, claimed_at=timezone.now())
+        return list(
+            HCSOutboxMessage.objects.select_related('depends_on').filter(claim_token=token)
+        )
+
+    def _submit(self, message: HCSOutboxMessage):
+        """Submit one message and record the outcome"""
+        topic_id = message.topic_id
+        if not topic_id and message.depends_on_id:
+            topic_id = message.depends_on.message_id
+
+        # Topic creation always waits for its receipt, which carries the topic ID.
+        # Mock IDs will never appear on the mirror node, so they are not reconciled.
+        confirmed = (
+            hcs_service.wait_for_receipt
+            or message.event_type == TOPIC_CREATE_EVENT
+            or hcs_service.is_mocked(topic_id)
+        )
+
+        try:
+            if message.event_type == TOPIC_CREATE_EVENT:
+                message_id = hcs_service.submit_topic_create(
+                    message.payload.get('memo', "NileFi HCS Topic")
+                )
+            else:
+                message_id = hcs_service.submit_message(
+                    message.event_type,
+                    message.payload,
+                    topic_id
+                )
+        except Exception as e:
+            self._record_failure(message, e)
+            return
+
+        # The event is on HCS now; record it before anything else can fail
+        now = timezone.now()
+        message.status = OutboxStatus.CONFIRMED if confirmed else OutboxStatus.SUBMITTED
+        message.message_id = message_id
+        message.attempts += 1
+        message.submitted_at = now
+        message.confirmed_at = now if confirmed else None
+        try:
+            message.save(update_fields=['status', 'message_id', 'attempts', 'submitted_at', 'confirmed_at'])
+        except Exception as e:
+            print(f"Recording HCS outbox message {message.id} as {message_id} failed: {e}")
+            return
+
+        # A failed write-back must not requeue the event for a second submission
+        try:
+            with transaction.atomic():
+                self._write_back(message)
+        except Exception as e:
+            print(f"HCS write-back failed for outbox message {message.id} ({message_id}): {e}")
+            HCSOutboxMessage.objects.filter(pk=message.pk).update(
+                last_error=f"Write-back failed: {e}"
+            )
+
+    def _record_failure(self, message: HCSOutboxMessage, error: Exception):
+        """Schedule a retry with linear backoff, or give up"""
+        schedule_retry(message, str(error), self.max_attempts, self.retry_delay)
+        print(f"HCS outbox submission failed ({message.attempts}/{self.max_attempts}): {error}")
+
+        # Events waiting on a topic that will never be created must not wait forever
+        if message.status == OutboxStatus.FAILED and message.event_type == TOPIC_CREATE_EVENT:
+            from .topic_pool import topic_pool_service
+            released = topic_pool_service.release_dependents(message)
+            if released:
+                print(f"Released {released} HCS outbox message(s) waiting on failed topic creation")
+
+    def _write_back(self, message: HCSOutboxMessage):
+        """Copy the message ID onto the audit log and target record"""
+        apply_write_back(message)
+
+        if message.event_type == 'MERKLE_ANCHOR':
+            from .hcs_anchor import hcs_anchor_service
+            hcs_anchor_service.propagate(message.target_pk, message.message_id, message.status)
+
+
+class HCSOutboxReconciler:
+    """
+    Confirms SUBMITTED messages against the mirror node.
+
+    Messages that reached consensus become CONFIRMED. Messages that reached
+    consensus with a failure status, or that are still unknown to the mirror
+    node after HCS_RECEIPT_TIMEOUT seconds (longer than the 120 s transaction
+    validity window plus mirror lag), go back to PENDING for resubmission.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_attempts: Optional[int] = None):
+        self.workers = workers or getattr(settings, 'HCS_OUTBOX_WORKERS', 8)
+        self.max_attempts = max_attempts or getattr(settings, 'HCS_OUTBOX_MAX_ATTEMPTS', 5)
+        self.retry_delay = getattr(settings, 'HCS_OUTBOX_RETRY_DELAY', 30)
+        self.receipt_timeout = getattr(settings, 'HCS_RECEIPT_TIMEOUT', 180)
+
+    def reconcile_batch(self, batch_size: int = 500) -> Dict[str, int]:
+        """
+        Check up to `batch_size` submitted messages, oldest first.
+
+        Returns:
+            Counts of confirmed, resubmitted and still pending messages
+        """
+        # Events anchored in a Merkle batch share the root's message ID;
+        # only the root (and unbatched events) are looked up
+        messages = list(
+            HCSOutboxMessage.objects.filter(
+                Q(audit_log__isnull=True) | Q(audit_log__anchor_batch__isnull=True),
+                status=OutboxStatus.SUBMITTED,
+            ).exclude(message_id__isnull=True).order_by('submitted_at')[:batch_size]
+        )
+        counts = {'confirmed': 0, 'resubmitted': 0, 'pending': 0}
+        if not messages:
+            return counts
+
+        results = mirror_node_service.get_transaction_results(
+            {message.message_id for message in messages},
+            workers=self.workers
+        )
+        deadline = timezone.now() - timedelta(seconds=self.receipt_timeout)
+
+        confirmed_ids = []
+        for message in messages:
+            if message.message_id not in results:
+                counts['pending'] += 1
+                continue
+
+            result = results[message.message_id]
+            if result == 'SUCCESS':
+                confirmed_ids.append(message.message_id)
+                counts['confirmed'] += 1
+            elif result is not None:
+                self._resubmit(message, f"Consensus result {result}")
+                counts['resubmitted'] += 1
+            elif message.submitted_at and message.submitted_at < deadline:
+                self._resubmit(message, "Not found on mirror node before receipt timeout")
+                counts['resubmitted'] += 1
+            else:
+                counts['pending'] += 1
+
+        if confirmed_ids:
+            HCSOutboxMessage.objects.filter(
+                status=OutboxStatus.SUBMITTED,
+                message_id__in=confirmed_ids
+            ).update(status=OutboxStatus.CONFIRMED, confirmed_at=timezone.now())
+
+        return counts
+
+    def _resubmit(self, message: HCSOutboxMessage, reason: str):
+        """Requeue a message whose submission did not land"""
+        with transaction.atomic():
+            # Events anchored under a failed root wait for its resubmission
+            HCSOutboxMessage.objects.filter(
+                status=OutboxStatus.SUBMITTED,
+                message_id=message.message_id,
+                audit_log__anchor_batch__isnull=False
+            ).exclude(pk=message.pk).update(status=OutboxStatus.BATCHED)
+            schedule_retry(message, reason, self.max_attempts, self.retry_delay)
+        print(f"HCS message {message.message_id} requeued ({message.attempts}/{self.max_attempts}): {reason}")
+
+
+def schedule_retry(message: HCSOutboxMessage, error: str, max_attempts: int, retry_delay: int):
+    """Return a message to PENDING with linear backoff, or mark it FAILED"""
+    message.attempts += 1
+    message.last_error = error
+    if message.attempts >= max_attempts:
+        message.status = OutboxStatus.FAILED
+    else:
+        message.status = OutboxStatus.PENDING
+        message.next_attempt_at = timezone.now() + timedelta(
+            seconds=retry_delay * message.attempts
+        )
+    message.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at'])
+
+
+def apply_write_back(message: HCSOutboxMessage):
+    """Write `message.message_id` onto its audit log and target field"""
+    if message.audit_log_id:
+        from investments.models import AuditLog
+        AuditLog.objects.filter(pk=message.audit_log_id).update(
+            hcs_message_id=message.message_id
+        )
+
+    if message.target_model and message.target_field:
+        model = apps.get_model(message.target_model)
+        model.objects.filter(pk=message.target_pk).update(
+            **{message.target_field: message.message_id}
+        )
@@ -5,27 +5,34 @@ Logs all key events to Hedera for immutability and transparency.
 
 import json
 import hashlib
+import itertools
 from datetime import datetime
 from typing import Dict, Optional
 from django.conf import settings
 
+from .client_pool import client_pool
+from .simulator import get_simulator, is_simulated
+from .hcs_codec import encode_message, chunk_count, VERSION_COMPACT, VERSION_JSON
+
 try:
     from hiero_sdk_python import (
-        Client,
         PrivateKey,
-        AccountId,
         TopicMessageSubmitTransaction,
         TopicCreateTransaction,
     )
-    HIERO_AVAILABLE = True
 except ImportError:
-    HIERO_AVAILABLE = False
-    print("Warning: hiero-sdk-python not available. Using mock implementation.")
+    pass
+
+
+# Sequence suffix so mock IDs created within the same second stay unique
+_mock_sequence = itertools.count()
 
 
 class HCSService:
     """
     Hedera Consensus Service wrapper for logging blockchain events.
+    Clients are leased from the shared pool on first use, so importing
+    the service does no network setup.
     """
     
     def __init__(self):
@@ -33,56 +40,71 @@ class HCSService:
         self.operator_id = settings.HEDERA_OPERATOR_ID
         self.operator_key = settings.HEDERA_OPERATOR_KEY
         self.topic_id = settings.HEDERA_HCS_TOPIC_ID
-        
-        if HIERO_AVAILABLE and self.operator_id and self.operator_key:
-            self.client = self._init_client()
-        else:
-            self.client = None
-            print("HCS: Running in mock mode - blockchain logging disabled")
+        self.message_version = (
+            VERSION_JSON
+            if getattr(settings, 'HCS_MESSAGE_ENCODING', 'compact') == 'json'
+            else VERSION_COMPACT
+        )
+        # 'precheck' returns as soon as the node accepts the transaction;
+        # consensus is then confirmed by the outbox reconciler
+        self.wait_for_receipt = getattr(settings, 'HCS_SUBMIT_MODE', 'receipt') != 'precheck'
     
-    def _init_client(self):
-        """Initialize Hedera client"""
-        try:
-            if self.network == 'testnet':
-                client = Client.forTestnet()
-            elif self.network == 'mainnet':
-                client = Client.forMainnet()
-            else:
-                raise ValueError(f"Unknown network: {self.network}")
-            
-            operator_key = PrivateKey.fromStringED25519(self.operator_key)
-            operator_account = AccountId.fromString(self.operator_id)
-            
-            client.setOperator(operator_account, operator_key)
-            return client
-        except Exception as e:
-            print(f"Error initializing Hedera client: {e}")
-            return None
+    @property
+    def is_live(self) -> bool:
+        """True when events are submitted to Hedera (or the simulator) rather than mocked"""
+        if is_simulated():
+            return True
+        return client_pool.is_available(self.operator_id, self.operator_key)
+    
+    def is_mocked(self, topic_id: Optional[str] = None) -> bool:
+        """True when `submit_message` to this topic returns a mock ID"""
+        return not (topic_id or self.topic_id) or not self.is_live
+    
+    def _lease(self):
+        """Lease a pooled client for this service's operator"""
+        return client_pool.lease(self.network, self.operator_id, self.operator_key)
     
     def create_topic(self, memo: str = "NileFi HCS Topic") -> Optional[str]:
         """
         Create a new HCS topic for the platform.
         Should be run once during platform setup.
         """
-        if not self.client:
+        if not self.is_live:
             return self._mock_topic_id()
         
         try:
-            transaction = (
+            return self.submit_topic_create(memo)
+        except Exception as e:
+            print(f"Error creating HCS topic: {e}")
+            return self._mock_topic_id()
+    
+    def submit_topic_create(self, memo: str = "NileFi HCS Topic") -> str:
+        """
+        Create a new HCS topic and wait for its receipt.
+        Errors are raised to the caller, as in `submit_message`.
+        
+        Returns:
+            The new topic ID
+        """
+        if not self.is_live:
+            return self._mock_topic_id()
+        
+        if is_simulated():
+            return get_simulator().create_topic(memo)
+        
+        with self._lease() as lease:
+            transaction = lease.pin_nodes(
                 TopicCreateTransaction()
                 .setTopicMemo(memo)
                 .setAdminKey(PrivateKey.fromStringED25519(self.operator_key).getPublicKey())
             )
             
-            response = transaction.execute(self.client)
-            receipt = response.getReceipt(self.client)
+            response = lease.execute(transaction)
+            receipt = response.getReceipt(lease.client)
             topic_id = str(receipt.topicId)
-            
-            print(f"Created HCS topic: {topic_id}")
-            return topic_id
-        except Exception as e:
-            print(f"Error creating HCS topic: {e}")
-            return self._mock_topic_id()
+        
+        print(f"Created HCS topic: {topic_id}")
+        return topic_id
     
     def log_event(
         self,
@@ -107,38 +129,69 @@ class HCSService:
             print("Warning: No HCS topic configured")
             return self._mock_message_id()
         
-        if not self.client:
+        if not self.is_live:
             return self._mock_message_id()
         
         try:
-            # Prepare message
-            message_data = {
-                "event_type": event_type,
-                "timestamp": datetime.utcnow().isoformat(),
-                "payload": payload,
-                "hash": self._hash_payload(payload)
-            }
-            message_json = json.dumps(message_data)
-            
-            # Submit to HCS
-            transaction = (
+            return self.submit_message(event_type, payload, topic)
+        except Exception as e:
+            print(f"Error logging to HCS: {e}")
+            return self._mock_message_id()
+    
+    def submit_message(
+        self,
+        event_type: str,
+        payload: Dict,
+        topic_id: Optional[str] = None
+    ) -> str:
+        """
+        Submit an event to HCS.
+        
+        Waits for the receipt unless HCS_SUBMIT_MODE = 'precheck', in which
+        case the transaction ID is returned once the node has accepted the
+        transaction and consensus is checked later against the mirror node.
+        
+        Unlike `log_event`, errors are raised to the caller instead of being
+        replaced by a mock ID, so the outbox relay can retry them.
+        
+        Returns:
+            HCS message ID (transaction ID of the submission)
+        """
+        topic = topic_id or self.topic_id
+        
+        if self.is_mocked(topic):
+            return self._mock_message_id()
+        
+        # Prepare message
+        message_data = {
+            "event_type": event_type,
+            "timestamp": datetime.utcnow().isoformat(),
+            "payload": payload,
+            "hash": self._hash_payload(payload)
+        }
+        message_bytes = encode_message(message_data, self.message_version)
+        
+        if is_simulated():
+            return get_simulator().submit_message(topic, message_bytes, self.wait_for_receipt)
+        
+        # Submit to HCS (the SDK splits messages over 1 KB into chunks)
+        with self._lease() as lease:
+            transaction = lease.pin_nodes(
                 TopicMessageSubmitTransaction()
                 .setTopicId(topic)
-                .setMessage(message_json)
+                .setMessage(message_bytes)
+                .setMaxChunks(chunk_count(message_bytes))
             )
             
-            response = transaction.execute(self.client)
-            receipt = response.getReceipt(self.client)
-            
-            # Get transaction ID as message identifier
-            message_id = str(response.transactionId)
-            
-            print(f"HCS Event logged: {event_type} - Message ID: {message_id}")
-            return message_id
-            
-        except Exception as e:
-            print(f"Error logging to HCS: {e}")
-            return self._mock_message_id()
+            response = lease.execute(transaction)
+            if self.wait_for_receipt:
+                response.getReceipt(lease.client)
+        
+        # Get transaction ID as message identifier
+        message_id = str(response.transactionId)
+        
+        print(f"HCS Event logged: {event_type} - Message ID: {message_id}")
+        return message_id
     
     def _hash_payload(self, payload: Dict) -> str:
         """Create hash of payload for integrity verification"""
@@ -148,7 +201,7 @@ class HCSService:
     def _mock_topic_id(self) -> str:
         """Generate mock topic ID for development"""
         timestamp = datetime.utcnow().timestamp()
-        return f"0.0.{int(timestamp)}"
+        return f"0.0.{int(timestamp)}{next(_mock_sequence) % 10000:04d}"
     
     def _mock_message_id(self) -> str:
         """Generate mock message ID for development"""
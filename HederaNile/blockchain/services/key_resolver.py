@@ -0,0 +1,222 @@
+"""
+Hedera account public-key resolution and wallet signature verification.
+Keys are read from the mirror node over a pooled session and cached for
+ACCOUNT_KEY_CACHE_TTL seconds; concurrent lookups for the same account
+share one request, so a login storm costs at most one mirror call per
+account. Verification only trusts keys read in the last
+ACCOUNT_KEY_VERIFY_TTL seconds, so a rotated-out key stops verifying
+shortly after the rotation, and a failed verification refreshes the key
+once. Mirror errors are cached for ACCOUNT_KEY_ERROR_TTL seconds only.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+from .simulator import is_simulated
+
+try:
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+    from cryptography.hazmat.primitives.asymmetric.utils import Prehashed, encode_dss_signature
+    CRYPTOGRAPHY_AVAILABLE = True
+except ImportError:
+    CRYPTOGRAPHY_AVAILABLE = False
+
+try:
+    from Crypto.Hash import keccak
+    KECCAK_AVAILABLE = True
+except ImportError:
+    KECCAK_AVAILABLE = False
+
+
+KEY_TYPE_ED25519 = 'ED25519'
+KEY_TYPE_ECDSA = 'ECDSA_SECP256K1'
+
+# DER SubjectPublicKeyInfo prefixes some wallets and tools include
+DER_PREFIXES = {
+    KEY_TYPE_ED25519: '302a300506032b6570032100',
+    KEY_TYPE_ECDSA: '302d300706052b8104000a032200',
+}
+
+AccountKey = namedtuple('AccountKey', ['key_type', 'key'])
+
+# (account_id, message, signature)
+SignatureCheck = Tuple[str, bytes, bytes]
+
+
+class AccountKeyResolver:
+    """
+    TTL-cached account key lookups against the mirror node.
+    Only single ED25519 and ECDSA(secp256k1) keys are supported; threshold
+    and key-list accounts resolve to their raw mirror key and never verify.
+    """
+
+    def __init__(self):
+        self.base_url = settings.HEDERA_MIRROR_NODE_URL
+        self.ttl = getattr(settings, 'ACCOUNT_KEY_CACHE_TTL', 300)
+        self.verify_ttl = getattr(settings, 'ACCOUNT_KEY_VERIFY_TTL', 30)
+        self.error_ttl = getattr(settings, 'ACCOUNT_KEY_ERROR_TTL', 5)
+        self.refresh_interval = getattr(settings, 'ACCOUNT_KEY_REFRESH_INTERVAL', 30)
+
+        self.session = requests.Session()
+        self.session.headers.update({'Content-Type': 'application/json'})
+        self.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=32))
+        if is_simulated():
+            from .simulator_mirror import SimulatorMirrorAdapter
+            self.session.mount(self.base_url, SimulatorMirrorAdapter())
+
+        self._cache: Dict[str, Tuple[Optional[AccountKey], float, float]] = {}
+        self._inflight: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, account_id: str, max_age: Optional[float] = None) -> Optional[AccountKey]:
+        """
+        Public key of an account, from cache or the mirror node.
+
+        Args:
+            account_id: Hedera account ID
+            max_age: Re-read cached keys older than this many seconds
+
+        Returns:
+            AccountKey, or None if the account has no key, does not exist
+            or the mirror node could not be reached
+        """
+        cached = self._cached(account_id, max_age)
+        if cached is not None:
+            return cached[0]
+
+        # Single-flight: one request per account, others wait for it
+        with self._lock:
+            account_lock = self._inflight.setdefault(account_id, threading.Lock())
+        with account_lock:
+            cached = self._cached(account_id, max_age)
+            if cached is not None:
+                return cached[0]
+
+            key, ttl = self._fetch(account_id)
+            now = time.monotonic()
+            with self._lock:
+                self._cache[account_id] = (key, now + ttl, now)
+                self._inflight.pop(account_id, None)
+            return key
+
+    def invalidate(self, account_id: str):
+        """Forget an account's cached key (e.g. after a key rotation)"""
+        with self._lock:
+            self._cache.pop(account_id, None)
+
+    def invalidate_all(self):
+        with self._lock:
+            self._cache.clear()
+
+    def verify(self, account_id: str, message: bytes, signature: bytes) -> bool:
+        """
+        Verify a wallet signature over `message` with the account's key.
+        The key is re-read if it is older than ACCOUNT_KEY_VERIFY_TTL, and
+        on failure once more (at most every ACCOUNT_KEY_REFRESH_INTERVAL
+        seconds) in case it was rotated.
+        """
+        key = self.resolve(account_id, max_age=self.verify_ttl)
+        if key and verify_signature(key, message, signature):
+            return True
+
+        if self._refreshable(account_id):
+            self.invalidate(account_id)
+            key = self.resolve(account_id)
+            return bool(key) and verify_signature(key, message, signature)
+        return False
+
+    def verify_many(self, checks: Sequence[SignatureCheck], workers: int = 8) -> List[bool]:
+        """
+        Verify many signatures, resolving each distinct account once.
+
+        Returns:
+            Result for each check, in input order
+        """
+        accounts = list(dict.fromkeys(account_id for account_id, _, _ in checks))
+        if accounts:
+            with ThreadPoolExecutor(max_workers=min(workers, len(accounts))) as executor:
+                list(executor.map(self.resolve, accounts))
+        return [self.verify(account_id, message, signature) for account_id, message, signature in checks]
+
+    def _cached(self, account_id: str,
+                max_age: Optional[float] = None) -> Optional[Tuple[Optional[AccountKey], float, float]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(account_id)
+            if entry and entry[1] > now and (max_age is None or now - entry[2] <= max_age):
+                return entry
+        return None
+
+    def _refreshable(self, account_id: str) -> bool:
+        with self._lock:
+            entry = self._cache.get(account_id)
+        return entry is None or time.monotonic() - entry[2] >= self.refresh_interval
+
+    def _fetch(self, account_id: str) -> Tuple[Optional[AccountKey], float]:
+        """(key, seconds to cache it); errors other than a 404 are cached briefly"""
+        try:
+            response = self.session.get(f"{self.base_url}/api/v1/accounts/{account_id}", timeout=10)
+            if response.status_code == 404:
+                return None, self.ttl
+            if response.status_code != 200:
+                print(f"Error fetching public key for {account_id}: HTTP {response.status_code}")
+                return None, self.error_ttl
+            key = response.json().get('key')
+        except (requests.RequestException, ValueError) as e:
+            print(f"Error fetching public key for {account_id}: {e}")
+            return None, self.error_ttl
+
+        if not key or not key.get('key'):
+            return None, self.ttl
+        return AccountKey(key.get('_type', ''), key['key']), self.ttl
+
+
+def verify_signature(key: AccountKey, message: bytes, signature: bytes) -> bool:
+    """
+    Verify an Ed25519 signature, or an ECDSA(secp256k1) r||s signature over
+    keccak256(message) as produced by Hedera wallets.
+    """
+    if not CRYPTOGRAPHY_AVAILABLE:
+        print("Warning: cryptography not available; signatures cannot be verified")
+        return False
+
+    key_hex = key.key.lower()
+    prefix = DER_PREFIXES.get(key.key_type)
+    if prefix and key_hex.startswith(prefix):
+        key_hex = key_hex[len(prefix):]
+
+    try:
+        key_bytes = bytes.fromhex(key_hex)
+        if key.key_type == KEY_TYPE_ED25519:
+            Ed25519PublicKey.from_public_bytes(key_bytes).verify(signature, message)
+            return True
+
+        if key.key_type == KEY_TYPE_ECDSA:
+            if not KECCAK_AVAILABLE or len(signature) != 64:
+                return False
+            digest = keccak.new(digest_bits=256, data=message).digest()
+            public_key = ec.EllipticCurvePublicKey.from_encoded_point(ec.SECP256K1(), key_bytes)
+            der_signature = encode_dss_signature(
+                int.from_bytes(signature[:32], 'big'),
+                int.from_bytes(signature[32:], 'big')
+            )
+            public_key.verify(der_signature, digest, ec.ECDSA(Prehashed(hashes.SHA256())))
+            return True
+    except (InvalidSignature, ValueError):
+        return False
+
+    return False
+
+
+# Singleton instance
+account_key_resolver = AccountKeyResolver()
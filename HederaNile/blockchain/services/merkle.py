@@ -0,0 +1,75 @@
+"""
+Merkle tree helpers for batched HCS anchoring.
+Leaves are `_hash_payload` digests of audit events; only the root of each
+batch is submitted to HCS, and each event keeps its sibling path as proof.
+"""
+
+import hashlib
+from typing import Dict, List
+
+
+def hash_pair(left: str, right: str) -> str:
+    """Hash two hex-encoded child nodes into their parent"""
+    # 0x01 prefix separates interior nodes from leaves (second-preimage guard)
+    return hashlib.sha256(b'\x01' + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+def build_tree(leaves: List[str]) -> List[List[str]]:
+    """
+    Build all levels of a Merkle tree from hex leaf hashes.
+
+    An unpaired node at the end of a level is promoted unchanged, so no
+    leaf is ever duplicated.
+
+    Returns:
+        List of levels, from the leaves (index 0) up to the root level
+    """
+    if not leaves:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [
+            hash_pair(level[i], level[i + 1])
+            for i in range(0, len(level) - 1, 2)
+        ]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_root(levels: List[List[str]]) -> str:
+    """Return the root of a tree built by `build_tree`"""
+    return levels[-1][0]
+
+
+def inclusion_path(levels: List[List[str]], index: int) -> List[Dict]:
+    """
+    Sibling path for the leaf at `index`.
+
+    Returns:
+        List of {"hash": ..., "position": "left"|"right"} from leaf to root
+    """
+    path = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            path.append({
+                'hash': level[sibling],
+                'position': 'left' if sibling < index else 'right',
+            })
+        index //= 2
+    return path
+
+
+def verify_inclusion(leaf: str, path: List[Dict], root: str) -> bool:
+    """Check that `leaf` hashes up to `root` along `path`"""
+    node = leaf
+    for step in path:
+        if step['position'] == 'left':
+            node = hash_pair(step['hash'], node)
+        else:
+            node = hash_pair(node, step['hash'])
+    return node == root
@@ -0,0 +1,199 @@
+"""
+Asynchronous Hedera Mirror Node client for bulk lookups.
+Runs many requests concurrently under a semaphore, retries throttled and
+failed requests with exponential backoff, and reuses the sync client's
+parsing (`first_transaction`, `transfer_matches`). Requires httpx.
+
+Usage from synchronous code (management commands, jobs):
+
+    from blockchain.services.mirror_node_async import verify_transfers_many
+    results = verify_transfers_many([(tx_id, sender, escrow, tinybars), ...])
+"""
+
+import asyncio
+import json
+from typing import Dict, List, Optional, Sequence, Tuple
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .mirror_node_service import first_transaction, transfer_matches
+from .simulator import is_simulated, normalize_transaction_id
+from .transaction_cache import transaction_cache
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# (transaction_id, expected_from, expected_to, expected_amount in tinybars or None)
+TransferCheck = Tuple[str, str, str, Optional[int]]
+
+
+class AsyncMirrorNodeService:
+    """
+    Async Mirror Node REST API wrapper.
+    Use as an async context manager so the connection pool is shared
+    across a batch:
+
+        async with AsyncMirrorNodeService() as mirror:
+            txs = await mirror.get_transactions_many(ids)
+    """
+
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        retries: Optional[int] = None,
+        timeout: float = 10
+    ):
+        if not HTTPX_AVAILABLE:
+            raise ImportError("httpx is required for the async mirror node client")
+
+        self.base_url = settings.HEDERA_MIRROR_NODE_URL
+        self.concurrency = concurrency or getattr(settings, 'MIRROR_NODE_CONCURRENCY', 20)
+        self.retries = retries if retries is not None else getattr(settings, 'MIRROR_NODE_RETRIES', 3)
+        self.max_backoff = getattr(settings, 'MIRROR_NODE_MAX_BACKOFF', 10)
+        self.timeout = timeout
+        self.client = None
+        self.semaphore = None
+
+    async def __aenter__(self):
+        transport = _SimulatorTransport() if is_simulated() else None
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={'Content-Type': 'application/json'},
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.concurrency),
+            transport=transport
+        )
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+
+    async def get_transaction(self, transaction_id: str) -> Optional[Dict]:
+        """
+        Get transaction details by transaction ID.
+
+        Returns:
+            Transaction details dict or None if not found
+        """
+        return (await self.get_transactions_many([transaction_id]))[0]
+
+    async def get_transactions_many(self, transaction_ids: Sequence[str]) -> List[Optional[Dict]]:
+        """
+        Get many transactions concurrently.
+        Cached records are used first; only the rest hit the mirror node.
+
+        Returns:
+            Transaction dict (or None) for each ID, in input order
+        """
+        keys = [normalize_transaction_id(tx_id) for tx_id in transaction_ids]
+        records = await sync_to_async(transaction_cache.get_many)(keys)
+
+        remaining = list(dict.fromkeys(key for key in keys if key not in records))
+        fetched = await asyncio.gather(*(self._fetch_transaction(key) for key in remaining))
+        answered = {key: tx for key, (ok, tx) in zip(remaining, fetched) if ok}
+        if answered:
+            await sync_to_async(transaction_cache.put_many)(answered)
+
+        records.update(answered)
+        return [records.get(key) for key in keys]
+
+    async def verify_transfers_many(self, checks: Sequence[TransferCheck]) -> List[bool]:
+        """
+        Verify many transfers concurrently; see MirrorNodeService.verify_transfer.
+
+        Args:
+            checks: (transaction_id, expected_from, expected_to, expected_amount) tuples
+
+        Returns:
+            Verification result for each check, in input order
+        """
+        transactions = await self.get_transactions_many([check[0] for check in checks])
+        return [
+            transfer_matches(tx, *check[1:])
+            for tx, check in zip(transactions, checks)
+        ]
+
+    async def _fetch_transaction(self, key: str) -> Tuple[bool, Optional[Dict]]:
+        """
+        Returns:
+            (answered, transaction); answered is False when the lookup failed
+        """
+        try:
+            data = await self._get(f"/api/v1/transactions/{key}")
+        except Exception as e:
+            print(f"Error fetching transaction {key}: {e}")
+            return False, None
+        return True, first_transaction(data) if data else None
+
+    async def _get(self, path: str, params: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        GET a mirror-node path with bounded concurrency and retries.
+
+        Returns:
+            Parsed JSON body, or None on 404
+        """
+        attempt = 0
+        while True:
+            async with self.semaphore:
+                try:
+                    response = await self.client.get(path, params=params)
+                except httpx.TransportError:
+                    if attempt >= self.retries:
+                        raise
+                    response = None
+
+            if response is not None:
+                if response.status_code == 404:
+                    return None
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    response.raise_for_status()
+                    return response.json()
+
+            # Back off outside the semaphore so other requests keep flowing
+            await asyncio.sleep(_backoff(attempt, response, self.max_backoff))
+            attempt += 1
+
+
+def _backoff(attempt: int, response, maximum: float) -> float:
+    """Seconds to wait before a retry, honouring Retry-After up to `maximum`"""
+    if response is not None and response.headers.get('Retry-After', '').isdigit():
+        return min(float(response.headers['Retry-After']), maximum)
+    return min(0.5 * (2 ** attempt), maximum)
+
+
+if HTTPX_AVAILABLE:
+    class _SimulatorTransport(httpx.AsyncBaseTransport):
+        """Serves mirror-node requests from the in-process simulator"""
+
+        async def handle_async_request(self, request):
+            from urllib.parse import parse_qs
+            from .simulator_mirror import handle_mirror_request
+
+            path = request.url.path
+            path = path[path.index('/api/v1'):] if '/api/v1' in path else path
+            status, body = handle_mirror_request(path, parse_qs(request.url.query.decode()))
+            return httpx.Response(status, content=json.dumps(body).encode(), request=request)
+
+
+# Convenience functions for synchronous callers
+def get_transactions_many(transaction_ids: Sequence[str], **options) -> List[Optional[Dict]]:
+    """Fetch many transactions concurrently from synchronous code"""
+    async def run():
+        async with AsyncMirrorNodeService(**options) as mirror:
+            return await mirror.get_transactions_many(transaction_ids)
+    return asyncio.run(run())
+
+
+def verify_transfers_many(checks: Sequence[TransferCheck], **options) -> List[bool]:
+    """Verify many transfers concurrently from synchronous code"""
+    async def run():
+        async with AsyncMirrorNodeService(**options) as mirror:
+            return await mirror.verify_transfers_many(checks)
+    return asyncio.run(run())
@@ -4,9 +4,15 @@ Queries transaction history and status from Mirror Node REST API.
 """
 
 import requests
-from typing import Dict, Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional, List, Union
 from django.conf import settings
 
+from .hcs_codec import reassemble_chunks, decode_message, HCSDecodeError
+from .simulator import is_simulated, normalize_transaction_id
+from .transaction_cache import transaction_cache
+
 
 class MirrorNodeService:
     """
@@ -20,10 +26,14 @@ class MirrorNodeService:
         self.session.headers.update({
             'Content-Type': 'application/json'
         })
+        if is_simulated():
+            from .simulator_mirror import SimulatorMirrorAdapter
+            self.session.mount(self.base_url, SimulatorMirrorAdapter())
     
     def get_transaction(self, transaction_id: str) -> Optional[Dict]:
         """
         Get transaction details by transaction ID.
+        Served from the transaction cache when possible.
         
         Args:
             transaction_id: Hedera transaction ID (format: 0.0.XXXX@timestamp.nanoseconds)
@@ -31,14 +41,21 @@ class MirrorNodeService:
         Returns:
             Transaction details dict or None if not found
         """
+        hit, cached = transaction_cache.get(transaction_id)
+        if hit:
+            return cached
+        
         try:
-            url = f"{self.base_url}/api/v1/transactions/{transaction_id}"
+            url = f"{self.base_url}/api/v1/transactions/{normalize_transaction_id(transaction_id)}"
             response = self.session.get(url, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
-                if data.get('transactions'):
-                    return data['transactions'][0]
+                tx = first_transaction(response.json())
+                transaction_cache.put(transaction_id, tx)
+                return tx
+            
+            if response.status_code == 404:
+                transaction_cache.put(transaction_id, None)
             
             return None
             
@@ -86,6 +103,111 @@ class MirrorNodeService:
             print(f"Error fetching account transactions for {account_id}: {e}")
             return []
     
+    def iter_account_transactions(
+        self,
+        account_id: str,
+        transaction_type: Optional[str] = None,
+        start: Optional[Union[str, datetime]] = None,
+        end: Optional[Union[str, datetime]] = None,
+        order: str = 'asc',
+        page_size: int = 100,
+        prefetch: bool = True
+    ) -> Iterator[Dict]:
+        """
+        Stream an account's full transaction history, following `links.next`.
+        
+        Args:
+            account_id: Hedera account ID (0.0.XXXX)
+            transaction_type: Optional filter (CRYPTOTRANSFER, TOKENTRANSFER, etc.)
+            start: Optional inclusive lower bound (consensus timestamp or datetime)
+            end: Optional exclusive upper bound (consensus timestamp or datetime)
+            order: 'asc' (oldest first) or 'desc'
+            page_size: Transactions per request (mirror node maximum is 100)
+            prefetch: Fetch the next page while the current one is consumed
+        
+        Yields:
+            Transaction dicts; at most two pages are held in memory
+        """
+        params = {'account.id': account_id, 'limit': page_size, 'order': order}
+        if transaction_type:
+            params['transactionType'] = transaction_type
+        params['timestamp'] = self._timestamp_range(start, end)
+        
+        return self._iter_pages('/api/v1/transactions', params, 'transactions', prefetch)
+    
+    def iter_hcs_messages(
+        self,
+        topic_id: str,
+        start: Optional[Union[str, datetime]] = None,
+        end: Optional[Union[str, datetime]] = None,
+        order: str = 'asc',
+        page_size: int = 100,
+        prefetch: bool = True
+    ) -> Iterator[Dict]:
+        """
+        Stream all messages of an HCS topic, following `links.next`.
+        
+        Args:
+            topic_id: HCS topic ID (0.0.XXXX)
+            start: Optional inclusive lower bound (consensus timestamp or datetime)
+            end: Optional exclusive upper bound (consensus timestamp or datetime)
+            order: 'asc' (oldest first) or 'desc'
+            page_size: Messages per request (mirror node maximum is 100)
+            prefetch: Fetch the next page while the current one is consumed
+        
+        Yields:
+            HCS message dicts; at most two pages are held in memory
+        """
+        params = {
+            'limit': page_size,
+            'order': order,
+            'timestamp': self._timestamp_range(start, end),
+        }
+        return self._iter_pages(f'/api/v1/topics/{topic_id}/messages', params, 'messages', prefetch)
+    
+    def _iter_pages(self, path: str, params: Dict, key: str, prefetch: bool) -> Iterator[Dict]:
+        """
+        Yield the `key` items of every page, following `links.next`.
+        Unlike the single-page helpers, HTTP errors are raised so a stream
+        is never silently truncated.
+        """
+        def fetch(url, query):
+            response = self.session.get(url, params=query, timeout=10)
+            response.raise_for_status()
+            data = response.json()
+            return data.get(key, []), (data.get('links') or {}).get('next')
+        
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            items, next_link = fetch(f"{self.base_url}{path}", params)
+            while True:
+                pending = None
+                if next_link and prefetch:
+                    pending = executor.submit(fetch, f"{self.base_url}{next_link}", None)
+                
+                yield from items
+                
+                if not next_link:
+                    return
+                items, next_link = pending.result() if pending else fetch(f"{self.base_url}{next_link}", None)
+    
+    @staticmethod
+    def _timestamp_range(
+        start: Optional[Union[str, datetime]],
+        end: Optional[Union[str, datetime]]
+    ) -> List[str]:
+        """Mirror-node timestamp filters for [start, end)"""
+        def to_timestamp(value):
+            if isinstance(value, datetime):
+                return f"{int(value.timestamp())}.{value.microsecond:06d}000"
+            return str(value)
+        
+        filters = []
+        if start is not None:
+            filters.append(f"gte:{to_timestamp(start)}")
+        if end is not None:
+            filters.append(f"lt:{to_timestamp(end)}")
+        return filters
+    
     def get_hcs_messages(
         self,
         topic_id: str,
@@ -120,6 +242,30 @@ class MirrorNodeService:
             print(f"Error fetching HCS messages for topic {topic_id}: {e}")
             return []
     
+    def get_decoded_hcs_messages(
+        self,
+        topic_id: str,
+        limit: int = 10
+    ) -> List[Dict]:
+        """
+        Get HCS messages from a topic, reassembled and decoded.
+        Reads both the legacy JSON format and the compact binary format.
+        
+        Args:
+            topic_id: HCS topic ID (0.0.XXXX)
+            limit: Number of raw messages (chunks) to fetch
+        
+        Returns:
+            List of decoded message dicts (event_type, timestamp, payload, hash, version)
+        """
+        decoded = []
+        for raw in reassemble_chunks(self.get_hcs_messages(topic_id, limit)):
+            try:
+                decoded.append(decode_message(raw))
+            except HCSDecodeError as e:
+                print(f"Skipping undecodable HCS message on {topic_id}: {e}")
+        return decoded
+    
     def get_transaction_status(self, transaction_id: str) -> Optional[str]:
         """
         Get transaction status (SUCCESS, FAILED, etc.).
@@ -135,6 +281,65 @@ class MirrorNodeService:
             return tx.get('result', 'UNKNOWN')
         return None
     
+    def get_transaction_results(
+        self,
+        transaction_ids: Iterable[str],
+        workers: int = 8
+    ) -> Dict[str, Optional[str]]:
+        """
+        Look up the consensus result of many transactions concurrently.
+        Cached records are used first; only the rest hit the mirror node.
+        
+        Args:
+            transaction_ids: Hedera transaction IDs
+            workers: Concurrent mirror-node requests
+        
+        Returns:
+            Dict of transaction ID -> result (SUCCESS, INVALID_TOPIC_ID, ...),
+            or None when the mirror node has no record of it. IDs whose
+            lookup failed are left out so callers can retry them later.
+        """
+        transaction_ids = list(transaction_ids)
+        cached = transaction_cache.get_many(transaction_ids)
+        records = {}
+        remaining = []
+        for transaction_id in transaction_ids:
+            key = normalize_transaction_id(transaction_id)
+            if key in cached:
+                records[transaction_id] = cached[key]
+            else:
+                remaining.append(transaction_id)
+        
+        def lookup(transaction_id):
+            url = f"{self.base_url}/api/v1/transactions/{normalize_transaction_id(transaction_id)}"
+            try:
+                response = self.session.get(url, timeout=10)
+            except requests.RequestException as e:
+                print(f"Error fetching transaction {transaction_id}: {e}")
+                return transaction_id, False, None
+            
+            if response.status_code == 404:
+                return transaction_id, True, None
+            if response.status_code != 200:
+                return transaction_id, False, None
+            
+            return transaction_id, True, first_transaction(response.json())
+        
+        if remaining:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                fetched = {
+                    transaction_id: tx
+                    for transaction_id, answered, tx in executor.map(lookup, remaining)
+                    if answered
+                }
+            transaction_cache.put_many(fetched)
+            records.update(fetched)
+        
+        return {
+            transaction_id: tx.get('result') if tx else None
+            for transaction_id, tx in records.items()
+        }
+    
     def verify_transfer(
         self,
         transaction_id: str,
@@ -156,33 +361,7 @@ class MirrorNodeService:
         """
         try:
             tx = self.get_transaction(transaction_id)
-            if not tx:
-                return False
-            
-            # Check transaction succeeded
-            if tx.get('result') != 'SUCCESS':
-                return False
-            
-            # Check transfers
-            transfers = tx.get('transfers', [])
-            from_found = False
-            to_found = False
-            
-            for transfer in transfers:
-                account = transfer.get('account')
-                amount = transfer.get('amount', 0)
-                
-                if account == expected_from and amount < 0:
-                    from_found = True
-                    if expected_amount and abs(amount) != expected_amount:
-                        return False
-                
-                if account == expected_to and amount > 0:
-                    to_found = True
-                    if expected_amount and amount != expected_amount:
-                        return False
-            
-            return from_found and to_found
+            return transfer_matches(tx, expected_from, expected_to, expected_amount)
             
         except Exception as e:
             print(f"Error verifying transfer: {e}")
@@ -221,5 +400,51 @@ class MirrorNodeService:
             return None
 
 
+def first_transaction(data: Dict) -> Optional[Dict]:
+    """First transaction of a /transactions/{id} response, or None"""
+    transactions = data.get('transactions')
+    return transactions[0] if transactions else None
+
+
+def transfer_matches(
+    tx: Optional[Dict],
+    expected_from: str,
+    expected_to: str,
+    expected_amount: Optional[float] = None
+) -> bool:
+    """
+    True if a mirror-node transaction is a successful transfer between the
+    expected accounts (and, if given, of the expected amount in tinybars).
+    Shared by the sync and async clients.
+    """
+    if not tx:
+        return False
+    
+    # Check transaction succeeded
+    if tx.get('result') != 'SUCCESS':
+        return False
+    
+    # Check transfers
+    transfers = tx.get('transfers', [])
+    from_found = False
+    to_found = False
+    
+    for transfer in transfers:
+        account = transfer.get('account')
+        amount = transfer.get('amount', 0)
+        
+        if account == expected_from and amount < 0:
+            from_found = True
+            if expected_amount and abs(amount) != expected_amount:
+                return False
+        
+        if account == expected_to and amount > 0:
+            to_found = True
+            if expected_amount and amount != expected_amount:
+                return False
+    
+    return from_found and to_found
+
+
 # Singleton instance
 mirror_node_service = MirrorNodeService()
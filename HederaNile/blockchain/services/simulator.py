@@ -0,0 +1,386 @@
+"""
+In-process Hedera network simulator for NileFi.
+
+Selected with HEDERA_BACKEND = 'simulator'. Unlike the mock IDs built from
+`time.time()`, the simulator keeps real state (accounts, topics, messages,
+transaction records), injects configurable latency, precheck/receipt
+failures and per-operation TPS caps, and exposes the same records through
+a mirror-node REST stand-in (see simulator_mirror.py), so the platform can
+be benchmarked and load-tested offline.
+
+Configuration (all keys optional):
+
+    HEDERA_SIMULATOR = {
+        'seed': 42,
+        'time_scale': 1.0,            # multiply all latencies; 0 disables sleeping
+        'latency': {
+            'precheck': {'dist': 'lognormal', 'mean': 0.05, 'sigma': 0.3},
+            'consensus': {'dist': 'normal', 'mean': 2.5, 'stddev': 0.5},
+            'mirror_lag': {'dist': 'fixed', 'value': 1.0},
+        },
+        'precheck_error_rate': 0.0,   # fraction rejected with BUSY
+        'receipt_error_rate': 0.0,    # fraction reaching consensus with a failure status
+        'tps': {'submit_message': 100, 'transfer': 50, 'create_topic': 5},
+        'initial_balance': 10_000 * 100_000_000,   # tinybars for unknown accounts
+        'fee_tinybars': 0,
+    }
+"""
+
+import base64
+import hashlib
+import math
+import random
+import threading
+import time
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from django.conf import settings
+
+
+TINYBARS_PER_HBAR = 100_000_000
+
+DEFAULT_LATENCY = {
+    'precheck': {'dist': 'lognormal', 'mean': 0.05, 'sigma': 0.3},
+    'consensus': {'dist': 'normal', 'mean': 2.5, 'stddev': 0.5},
+    'mirror_lag': {'dist': 'fixed', 'value': 1.0},
+}
+
+
+class SimulatorError(Exception):
+    """Base class for simulated Hedera errors"""
+
+    def __init__(self, status: str, transaction_id: Optional[str] = None):
+        super().__init__(f"{status}" + (f" ({transaction_id})" if transaction_id else ""))
+        self.status = status
+        self.transaction_id = transaction_id
+
+
+class PrecheckError(SimulatorError):
+    """Transaction rejected by the node before reaching consensus"""
+
+
+class ReceiptStatusError(SimulatorError):
+    """Transaction reached consensus with a non-SUCCESS status"""
+
+
+class LatencyModel:
+    """Samples delays (seconds) from a configured distribution"""
+
+    def __init__(self, spec: Dict, rng: random.Random):
+        self.spec = spec
+        self.rng = rng
+
+    def sample(self) -> float:
+        dist = self.spec.get('dist', 'fixed')
+        if dist == 'fixed':
+            value = self.spec.get('value', 0.0)
+        elif dist == 'uniform':
+            value = self.rng.uniform(self.spec.get('low', 0.0), self.spec.get('high', 0.0))
+        elif dist == 'normal':
+            value = self.rng.gauss(self.spec.get('mean', 0.0), self.spec.get('stddev', 0.0))
+        elif dist == 'lognormal':
+            mean, sigma = self.spec.get('mean', 0.0), self.spec.get('sigma', 0.0)
+            value = self.rng.lognormvariate(math.log(mean), sigma) if mean > 0 else 0.0
+        elif dist == 'exponential':
+            mean = self.spec.get('mean', 0.0)
+            value = self.rng.expovariate(1.0 / mean) if mean > 0 else 0.0
+        else:
+            raise ValueError(f"Unknown latency distribution: {dist}")
+        return max(0.0, value)
+
+
+class TokenBucket:
+    """Throughput cap; `try_acquire` fails once the TPS budget is spent"""
+
+    def __init__(self, tps: float):
+        self.rate = tps
+        self.capacity = max(1.0, tps)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class HederaSimulator:
+    """
+    Simulated consensus network and mirror-node state.
+    All amounts are in tinybars.
+    """
+
+    def __init__(self, config: Optional[Dict] = None, operator_id: Optional[str] = None):
+        config = config or {}
+        self.config = config
+        self.operator_id = operator_id or '0.0.2'
+        self.rng = random.Random(config.get('seed'))
+        self.time_scale = config.get('time_scale', 1.0)
+
+        latency = {**DEFAULT_LATENCY, **config.get('latency', {})}
+        self.latency = {name: LatencyModel(spec, self.rng) for name, spec in latency.items()}
+        self.precheck_error_rate = config.get('precheck_error_rate', 0.0)
+        self.receipt_error_rate = config.get('receipt_error_rate', 0.0)
+        self.buckets = {op: TokenBucket(tps) for op, tps in (config.get('tps') or {}).items() if tps}
+        self.initial_balance = config.get('initial_balance', 10_000 * TINYBARS_PER_HBAR)
+        self.fee = config.get('fee_tinybars', 0)
+
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Drop all simulated state"""
+        with self.lock:
+            self.balances: Dict[str, int] = {}
+            self.account_keys: Dict[str, Dict] = {}
+            self.topics: Dict[str, Dict] = {}
+            self.transactions: List[Dict] = []
+            self.transactions_by_id: Dict[str, Dict] = {}
+            self._next_entity = 1000
+            self._last_consensus_ns = 0
+            self._last_valid_start_ns = 0
+
+    # ----- Network operations -----
+
+    def create_topic(self, memo: str = '', wait_for_receipt: bool = True) -> str:
+        """Create a topic; returns its topic ID"""
+        tx_id = self._precheck('create_topic')
+        with self.lock:
+            self._next_entity += 1
+            topic_id = f"0.0.{self._next_entity}"
+        record = self._record(tx_id, 'CONSENSUSCREATETOPIC', memo, entity_id=topic_id)
+        if record['result'] == 'SUCCESS':
+            with self.lock:
+                self.topics[topic_id] = {'memo': memo, 'sequence': 0, 'messages': [], 'running_hash': b''}
+        self._await_receipt(record, wait_for_receipt)
+        return topic_id
+
+    def submit_message(self, topic_id: str, message: bytes, wait_for_receipt: bool = True) -> str:
+        """Submit a topic message; returns the transaction ID"""
+        tx_id = self._precheck('submit_message')
+        if isinstance(message, str):
+            message = message.encode()
+
+        with self.lock:
+            topic = self.topics.get(topic_id)
+        record = self._record(
+            tx_id, 'CONSENSUSSUBMITMESSAGE', '', entity_id=topic_id,
+            forced_result=None if topic else 'INVALID_TOPIC_ID'
+        )
+
+        if record['result'] == 'SUCCESS':
+            with self.lock:
+                topic['sequence'] += 1
+                topic['running_hash'] = hashlib.sha384(topic['running_hash'] + message).digest()
+                topic['messages'].append({
+                    'consensus_timestamp': record['consensus_timestamp'],
+                    'topic_id': topic_id,
+                    'message': base64.b64encode(message).decode(),
+                    'payer_account_id': self.operator_id,
+                    'running_hash': base64.b64encode(topic['running_hash']).decode(),
+                    'sequence_number': topic['sequence'],
+                    'chunk_info': None,
+                    '_visible_at': record['_visible_at'],
+                })
+        self._await_receipt(record, wait_for_receipt)
+        return tx_id
+
+    def transfer(
+        self,
+        transfers: List[Tuple[str, int]],
+        memo: str = '',
+        wait_for_receipt: bool = True
+    ) -> str:
+        """
+        Execute an HBAR transfer; `transfers` is a list of (account_id, tinybars)
+        legs that must sum to zero. Returns the transaction ID.
+        """
+        if sum(amount for _, amount in transfers) != 0:
+            raise PrecheckError('INVALID_ACCOUNT_AMOUNTS')
+        tx_id = self._precheck('transfer')
+
+        legs: Dict[str, int] = {}
+        for account, amount in transfers:
+            legs[account] = legs.get(account, 0) + amount
+        if self.fee:
+            legs[self.operator_id] = legs.get(self.operator_id, 0) - self.fee
+            legs['0.0.98'] = legs.get('0.0.98', 0) + self.fee
+
+        with self.lock:
+            insufficient = any(
+                self._balance(account) + amount < 0 for account, amount in legs.items() if amount < 0
+            )
+            forced = 'INSUFFICIENT_ACCOUNT_BALANCE' if insufficient else None
+            record = self._record_locked(
+                tx_id, 'CRYPTOTRANSFER', memo, forced_result=forced,
+                transfers=[{'account': a, 'amount': amt, 'is_approval': False} for a, amt in legs.items()]
+            )
+            if record['result'] == 'SUCCESS':
+                for account, amount in legs.items():
+                    self.balances[account] = self._balance(account) + amount
+
+        self._await_receipt(record, wait_for_receipt)
+        return tx_id
+
+    def get_balance(self, account_id: str) -> int:
+        """Current balance in tinybars"""
+        self._sleep('precheck')
+        with self.lock:
+            return self._balance(account_id)
+
+    def fund_account(self, account_id: str, tinybars: int, key: Optional[Dict] = None):
+        """Set an account's balance (and optionally its key) directly"""
+        with self.lock:
+            self.balances[account_id] = tinybars
+            if key:
+                self.account_keys[account_id] = key
+
+    # ----- Mirror-node views -----
+
+    def mirror_transactions(self) -> List[Dict]:
+        """Transaction records visible on the mirror node, oldest first"""
+        now = time.monotonic()
+        with self.lock:
+            return [tx for tx in self.transactions if tx['_visible_at'] <= now]
+
+    def mirror_transaction(self, transaction_id: str) -> Optional[Dict]:
+        tx = self.transactions_by_id.get(normalize_transaction_id(transaction_id))
+        if tx and tx['_visible_at'] <= time.monotonic():
+            return tx
+        return None
+
+    def mirror_topic_messages(self, topic_id: str) -> List[Dict]:
+        now = time.monotonic()
+        with self.lock:
+            topic = self.topics.get(topic_id)
+            if not topic:
+                return []
+            return [m for m in topic['messages'] if m['_visible_at'] <= now]
+
+    def mirror_account(self, account_id: str) -> Dict:
+        with self.lock:
+            return {
+                'account': account_id,
+                'balance': {'balance': self._balance(account_id), 'timestamp': None},
+                'key': self.account_keys.get(account_id),
+            }
+
+    # ----- Internals -----
+
+    def _balance(self, account_id: str) -> int:
+        return self.balances.setdefault(account_id, self.initial_balance)
+
+    def _sleep(self, name: str) -> float:
+        delay = self.latency[name].sample() * self.time_scale
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    def _precheck(self, operation: str) -> str:
+        """Node precheck: latency, throttling and random BUSY rejections"""
+        self._sleep('precheck')
+        tx_id = self._new_transaction_id()
+        bucket = self.buckets.get(operation)
+        if bucket and not bucket.try_acquire():
+            raise PrecheckError('BUSY', tx_id)
+        if self.precheck_error_rate and self.rng.random() < self.precheck_error_rate:
+            raise PrecheckError('BUSY', tx_id)
+        return tx_id
+
+    def _record(self, tx_id: str, name: str, memo: str, **kwargs) -> Dict:
+        with self.lock:
+            return self._record_locked(tx_id, name, memo, **kwargs)
+
+    def _record_locked(
+        self,
+        tx_id: str,
+        name: str,
+        memo: str,
+        entity_id: Optional[str] = None,
+        transfers: Optional[List[Dict]] = None,
+        forced_result: Optional[str] = None
+    ) -> Dict:
+        """Append a transaction record; caller holds the lock"""
+        result = forced_result or 'SUCCESS'
+        if result == 'SUCCESS' and self.receipt_error_rate and self.rng.random() < self.receipt_error_rate:
+            result = 'DUPLICATE_TRANSACTION'
+
+        consensus = self.latency['consensus'].sample() * self.time_scale
+        mirror_lag = self.latency['mirror_lag'].sample() * self.time_scale
+
+        consensus_ns = max(time.time_ns() + int(consensus * 1e9), self._last_consensus_ns + 1)
+        self._last_consensus_ns = consensus_ns
+
+        record = {
+            'transaction_id': tx_id,
+            'consensus_timestamp': f"{consensus_ns // 10**9}.{consensus_ns % 10**9:09d}",
+            'name': name,
+            'result': result,
+            'memo_base64': base64.b64encode(memo.encode()).decode(),
+            'entity_id': entity_id,
+            'charged_tx_fee': self.fee,
+            'transfers': transfers or [],
+            '_consensus_delay': consensus,
+            '_visible_at': time.monotonic() + consensus + mirror_lag,
+        }
+        self.transactions.append(record)
+        self.transactions_by_id[tx_id] = record
+        return record
+
+    def _await_receipt(self, record: Dict, wait_for_receipt: bool):
+        """Block for consensus and raise on a failed receipt"""
+        if not wait_for_receipt:
+            return
+        if record['_consensus_delay']:
+            time.sleep(record['_consensus_delay'])
+        if record['result'] != 'SUCCESS':
+            raise ReceiptStatusError(record['result'], record['transaction_id'])
+
+    def _new_transaction_id(self) -> str:
+        """Mirror-node style ID: <payer>-<seconds>-<nanos>"""
+        with self.lock:
+            valid_start = max(time.time_ns(), self._last_valid_start_ns + 1)
+            self._last_valid_start_ns = valid_start
+        return f"{self.operator_id}-{valid_start // 10**9}-{valid_start % 10**9:09d}"
+
+
+def normalize_transaction_id(transaction_id: str) -> str:
+    """Accept both SDK (0.0.2@1700000000.000000001) and mirror (0.0.2-1700000000-000000001) IDs"""
+    if '@' in transaction_id:
+        payer, valid_start = transaction_id.split('@', 1)
+        seconds, _, nanos = valid_start.partition('.')
+        return f"{payer}-{seconds}-{nanos.ljust(9, '0')}"
+    return transaction_id
+
+
+def tinybars(amount) -> int:
+    """Convert an HBAR amount (Decimal/str/float) to integer tinybars"""
+    return int(Decimal(str(amount)) * TINYBARS_PER_HBAR)
+
+
+def is_simulated() -> bool:
+    """True when HEDERA_BACKEND selects the in-process simulator"""
+    return getattr(settings, 'HEDERA_BACKEND', 'sdk') == 'simulator'
+
+
+_simulator: Optional[HederaSimulator] = None
+_simulator_lock = threading.Lock()
+
+
+def get_simulator() -> HederaSimulator:
+    """Process-wide simulator instance, created on first use"""
+    global _simulator
+    if _simulator is None:
+        with _simulator_lock:
+            if _simulator is None:
+                _simulator = HederaSimulator(
+                    getattr(settings, 'HEDERA_SIMULATOR', {}),
+                    operator_id=getattr(settings, 'HEDERA_OPERATOR_ID', None)
+                )
+    return _simulator
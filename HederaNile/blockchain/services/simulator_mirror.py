@@ -0,0 +1,169 @@
+"""
+Mirror-node REST stand-in backed by the in-process Hedera simulator.
+
+`handle_mirror_request` answers the subset of /api/v1 used by NileFi with
+the same response shapes as the real mirror node (including `links.next`
+pagination). `SimulatorMirrorAdapter` is a requests transport adapter that
+MirrorNodeService mounts on its session when HEDERA_BACKEND = 'simulator',
+so mirror queries are answered in-process without an HTTP server.
+"""
+
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit, parse_qs
+
+import requests
+from requests.adapters import BaseAdapter
+
+from .simulator import HederaSimulator, get_simulator
+
+
+MAX_LIMIT = 100
+
+TRANSACTION_RE = re.compile(r'^/api/v1/transactions/(?P<id>[^/]+)$')
+TOPIC_MESSAGES_RE = re.compile(r'^/api/v1/topics/(?P<id>[^/]+)/messages$')
+ACCOUNT_RE = re.compile(r'^/api/v1/accounts/(?P<id>[^/]+)$')
+
+
+def handle_mirror_request(
+    path: str,
+    params: Dict[str, List[str]],
+    simulator: Optional[HederaSimulator] = None
+) -> Tuple[int, Dict]:
+    """
+    Answer a mirror-node REST request from simulator state.
+
+    Args:
+        path: Request path starting with /api/v1
+        params: Query parameters as a multi-value dict (parse_qs format)
+
+    Returns:
+        (HTTP status, JSON body)
+    """
+    simulator = simulator or get_simulator()
+
+    if path == '/api/v1/transactions':
+        records = simulator.mirror_transactions()
+        account_id = _first(params, 'account.id')
+        if account_id:
+            records = [
+                tx for tx in records
+                if any(t['account'] == account_id for t in tx['transfers'])
+            ]
+        tx_type = _first(params, 'transactionType')
+        if tx_type:
+            records = [tx for tx in records if tx['name'] == tx_type.upper()]
+        return 200, _paginate(path, params, records, 'transactions')
+
+    match = TRANSACTION_RE.match(path)
+    if match:
+        tx = simulator.mirror_transaction(match.group('id'))
+        if not tx:
+            return 404, _not_found()
+        return 200, {'transactions': [_public(tx)]}
+
+    match = TOPIC_MESSAGES_RE.match(path)
+    if match:
+        messages = sorted(
+            simulator.mirror_topic_messages(match.group('id')),
+            key=lambda m: m['consensus_timestamp']
+        )
+        return 200, _paginate(path, params, messages, 'messages')
+
+    if path == '/api/v1/balances':
+        account_id = _first(params, 'account.id')
+        if not account_id:
+            return 400, {'_status': {'messages': [{'message': 'account.id is required'}]}}
+        account = simulator.mirror_account(account_id)
+        return 200, {
+            'timestamp': None,
+            'balances': [{'account': account_id, 'balance': account['balance']['balance'], 'tokens': []}],
+            'links': {'next': None},
+        }
+
+    match = ACCOUNT_RE.match(path)
+    if match:
+        return 200, simulator.mirror_account(match.group('id'))
+
+    return 404, _not_found()
+
+
+def _paginate(path: str, params: Dict[str, List[str]], records: List[Dict], key: str) -> Dict:
+    """Apply timestamp filters, order and limit; build links.next"""
+    for expression in params.get('timestamp', []):
+        op, _, value = expression.rpartition(':')
+        records = [r for r in records if _compare(r['consensus_timestamp'], op or 'eq', value)]
+
+    order = (_first(params, 'order') or 'desc').lower()
+    if order == 'desc':
+        records = list(reversed(records))
+
+    limit = min(int(_first(params, 'limit') or 25), MAX_LIMIT)
+    page = records[:limit]
+
+    next_link = None
+    if len(records) > limit:
+        cursor_op = 'lt' if order == 'desc' else 'gt'
+        next_params = {k: v for k, v in params.items() if k != 'timestamp'}
+        next_params['timestamp'] = [
+            t for t in params.get('timestamp', []) if not t.startswith(cursor_op)
+        ] + [f"{cursor_op}:{page[-1]['consensus_timestamp']}"]
+        next_link = f"{path}?{urlencode(next_params, doseq=True)}"
+
+    return {key: [_public(r) for r in page], 'links': {'next': next_link}}
+
+
+def _compare(timestamp: str, op: str, value: str) -> bool:
+    left, right = _timestamp_key(timestamp), _timestamp_key(value)
+    return {
+        'eq': left == right,
+        'gt': left > right,
+        'gte': left >= right,
+        'lt': left < right,
+        'lte': left <= right,
+    }.get(op, False)
+
+
+def _timestamp_key(timestamp: str) -> Tuple[int, int]:
+    seconds, _, nanos = timestamp.partition('.')
+    return int(seconds), int(nanos.ljust(9, '0') or 0)
+
+
+def _first(params: Dict[str, List[str]], key: str) -> Optional[str]:
+    values = params.get(key)
+    return values[0] if values else None
+
+
+def _public(record: Dict) -> Dict:
+    """Strip simulator-only bookkeeping keys"""
+    return {k: v for k, v in record.items() if not k.startswith('_')}
+
+
+def _not_found() -> Dict:
+    return {'_status': {'messages': [{'message': 'Not found'}]}}
+
+
+class SimulatorMirrorAdapter(BaseAdapter):
+    """requests transport adapter serving mirror-node URLs from the simulator"""
+
+    def __init__(self, simulator: Optional[HederaSimulator] = None):
+        super().__init__()
+        self.simulator = simulator
+
+    def send(self, request, **kwargs):
+        url = urlsplit(request.url)
+        path = url.path[url.path.index('/api/v1'):] if '/api/v1' in url.path else url.path
+        status, body = handle_mirror_request(path, parse_qs(url.query), self.simulator)
+
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(body).encode()
+        response.headers['Content-Type'] = 'application/json'
+        response.url = request.url
+        response.request = request
+        response.encoding = 'utf-8'
+        return response
+
+    def close(self):
+        pass
@@ -0,0 +1,181 @@
+"""
+Pre-provisioned HCS topic pool for NileFi.
+Topic creation is the slowest Hedera operation, so topics are created
+ahead of time by `manage.py provision_hcs_topics` and claimed by new
+funding requests with a single UPDATE. While a funding request's topic
+is still being created, its events wait on the creation job.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError
+from django.utils import timezone
+
+from blockchain.models import HCSTopic, HCSOutboxMessage, OutboxStatus, TopicStatus
+from .hcs_service import hcs_service
+from .hcs_outbox import enqueue_hcs_event, TOPIC_CREATE_EVENT
+
+
+class TopicPoolService:
+    """
+    Keeps a stock of AVAILABLE topics and hands them out to funding requests.
+    """
+
+    def __init__(self):
+        self.target_size = getattr(settings, 'HCS_TOPIC_POOL_SIZE', 20)
+        self.claim_retries = 3
+
+    def claim_topic(self, funding_request) -> Optional[str]:
+        """
+        Claim a pooled topic for `funding_request`.
+
+        The claim is one UPDATE of the oldest available row; if a concurrent
+        claim wins the race the update matches nothing and is retried.
+
+        Returns:
+            The claimed topic ID, or None if the pool is empty
+        """
+        for _ in range(self.claim_retries):
+            oldest = HCSTopic.objects.filter(status=TopicStatus.AVAILABLE).order_by('created_at')
+            claimed = HCSTopic.objects.filter(
+                pk__in=oldest.values('pk')[:1],
+                status=TopicStatus.AVAILABLE
+            ).update(
+                status=TopicStatus.CLAIMED,
+                funding_request=funding_request,
+                claimed_at=timezone.now()
+            )
+            if claimed:
+                topic_id = HCSTopic.objects.filter(
+                    funding_request=funding_request
+                ).values_list('topic_id', flat=True).get()
+                funding_request.hedera_hcs_topic_id = topic_id
+                funding_request.save(update_fields=['hedera_hcs_topic_id'])
+                return topic_id
+            if not oldest.exists():
+                return None
+        return None
+
+    def assign_topic(self, funding_request) -> Tuple[Optional[str], Optional[HCSOutboxMessage]]:
+        """
+        Give `funding_request` a topic without blocking on Hedera.
+
+        Returns:
+            (topic_id, None) when a pooled topic was claimed, or
+            (None, job) when the pool is empty and topic creation was queued
+            on the outbox; pass `job` as `depends_on` for events that need
+            the topic.
+        """
+        topic_id = self.claim_topic(funding_request)
+        if topic_id:
+            return topic_id, None
+
+        print("HCS topic pool empty - queueing asynchronous topic creation")
+        job = enqueue_hcs_event(
+            event_type=TOPIC_CREATE_EVENT,
+            payload={
+                'memo': f"NileFi funding request {funding_request.id}",
+                'funding_request_id': str(funding_request.id),
+            },
+            target=funding_request,
+            target_field='hedera_hcs_topic_id',
+        )
+        return None, job
+
+    def topic_for(self, funding_request) -> Tuple[Optional[str], Optional[HCSOutboxMessage]]:
+        """
+        Topic of `funding_request`, or the job that is creating it.
+
+        Returns:
+            (topic_id, None) once the topic exists, or (None, job) while
+            its creation is queued; a topic is assigned if there is neither
+        """
+        if funding_request.hedera_hcs_topic_id:
+            return funding_request.hedera_hcs_topic_id, None
+
+        job = HCSOutboxMessage.objects.filter(
+            event_type=TOPIC_CREATE_EVENT,
+            target_model=funding_request._meta.label,
+            target_pk=str(funding_request.pk)
+        ).exclude(status=OutboxStatus.FAILED).order_by('-created_at').first()
+        if job is None:
+            return self.assign_topic(funding_request)
+        if job.message_id and job.status in (OutboxStatus.SUBMITTED, OutboxStatus.CONFIRMED):
+            return job.message_id, None
+        return None, job
+
+    def enqueue_event(self, funding_request, event_type: str, payload, **kwargs) -> HCSOutboxMessage:
+        """
+        Queue an event on `funding_request`'s topic. If the topic is still
+        being created, the event is submitted once the creation job is.
+        """
+        topic_id, job = self.topic_for(funding_request)
+        return enqueue_hcs_event(
+            event_type=event_type,
+            payload=payload,
+            topic_id=topic_id,
+            depends_on=job,
+            **kwargs
+        )
+
+    def release_dependents(self, job: HCSOutboxMessage) -> int:
+        """
+        Unblock events waiting on a topic creation job that has FAILED.
+        They move to a pooled topic if one is available; otherwise they
+        are failed too, for an admin to requeue with the creation job.
+
+        Returns:
+            Number of dependent messages moved or failed
+        """
+        dependents = HCSOutboxMessage.objects.filter(
+            depends_on=job,
+            status__in=[OutboxStatus.PENDING, OutboxStatus.BATCHED]
+        )
+        funding_request = None
+        if job.target_model and job.target_pk:
+            funding_request = apps.get_model(job.target_model).objects.filter(pk=job.target_pk).first()
+
+        topic_id = self.claim_topic(funding_request) if funding_request is not None else None
+        if topic_id:
+            return dependents.update(topic_id=topic_id, depends_on=None)
+        return dependents.filter(status=OutboxStatus.PENDING).update(
+            status=OutboxStatus.FAILED,
+            last_error=f"Topic creation failed: {job.last_error}"
+        )
+
+    def available_count(self) -> int:
+        return HCSTopic.objects.filter(status=TopicStatus.AVAILABLE).count()
+
+    def replenish(self, target_size: Optional[int] = None, workers: int = 4) -> int:
+        """
+        Create topics until `target_size` are available.
+
+        Returns:
+            Number of topics created
+        """
+        missing = (target_size or self.target_size) - self.available_count()
+        if missing <= 0:
+            return 0
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(self._create_one, range(missing)))
+        return sum(results)
+
+    def _create_one(self, _index) -> int:
+        try:
+            topic_id = hcs_service.submit_topic_create("NileFi funding request topic")
+        except Exception as e:
+            print(f"Error pre-provisioning HCS topic: {e}")
+            return 0
+        try:
+            HCSTopic.objects.create(topic_id=topic_id)
+        except IntegrityError as e:
+            print(f"Error recording pre-provisioned HCS topic {topic_id}: {e}")
+            return 0
+        return 1
+
+
+# Singleton instance
+topic_pool_service = TopicPoolService()
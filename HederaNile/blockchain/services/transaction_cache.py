@@ -0,0 +1,123 @@
+"""
+Two-tier cache for mirror-node transaction lookups.
+An in-process LRU sits in front of the `mirror_transactions` table.
+Finalised records (with a consensus timestamp) are stored in both tiers
+indefinitely; "not found" results and records without a consensus
+timestamp (the transaction may still be reaching consensus or the mirror
+node) are only held in the LRU for MIRROR_CACHE_MISS_TTL seconds.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+from django.conf import settings
+
+from blockchain.models import MirrorTransaction
+from .simulator import normalize_transaction_id
+
+
+_MISSING = object()
+
+
+class TransactionCache:
+    """
+    Transaction records keyed by mirror-format transaction ID.
+    Lookups return cached "not found" results as None, so callers can tell
+    a cached miss from an uncached ID.
+    """
+
+    def __init__(self):
+        self.max_entries = getattr(settings, 'MIRROR_CACHE_SIZE', 10_000)
+        self.miss_ttl = getattr(settings, 'MIRROR_CACHE_MISS_TTL', 5)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, transaction_id: str) -> Tuple[bool, Optional[Dict]]:
+        """
+        Returns:
+            (hit, record); record is None for a cached "not found"
+        """
+        found = self.get_many([transaction_id])
+        key = normalize_transaction_id(transaction_id)
+        return (True, found[key]) if key in found else (False, None)
+
+    def get_many(self, transaction_ids: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Look up many IDs, memory first, then one query for the rest.
+
+        Returns:
+            Dict of normalised ID -> record (None for a cached "not found");
+            uncached IDs are absent
+        """
+        found: Dict[str, Optional[Dict]] = {}
+        remaining = []
+        for transaction_id in transaction_ids:
+            key = normalize_transaction_id(transaction_id)
+            record = self._memory_get(key)
+            if record is _MISSING:
+                remaining.append(key)
+            else:
+                found[key] = record
+
+        if remaining:
+            for row in MirrorTransaction.objects.filter(transaction_id__in=remaining):
+                found[row.transaction_id] = row.record
+                self._memory_put(row.transaction_id, row.record)
+
+        return found
+
+    def put(self, transaction_id: str, record: Optional[Dict]):
+        """Cache a lookup result; None records a short-lived "not found" """
+        self.put_many({transaction_id: record})
+
+    def put_many(self, records: Dict[str, Optional[Dict]]):
+        """Cache many lookup results, persisting the finalised ones"""
+        finalised = []
+        for transaction_id, record in records.items():
+            key = normalize_transaction_id(transaction_id)
+            self._memory_put(key, record)
+            if _is_final(record):
+                finalised.append(MirrorTransaction(
+                    transaction_id=key,
+                    result=record.get('result', ''),
+                    consensus_timestamp=record['consensus_timestamp'],
+                    record=record
+                ))
+
+        if finalised:
+            MirrorTransaction.objects.bulk_create(finalised, ignore_conflicts=True)
+
+    def clear(self):
+        """Drop the in-process tier (the table is left intact)"""
+        with self._lock:
+            self._entries.clear()
+
+    def _memory_get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            record, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return record
+
+    def _memory_put(self, key: str, record: Optional[Dict]):
+        expires_at = None if _is_final(record) else time.monotonic() + self.miss_ttl
+        with self._lock:
+            self._entries[key] = (record, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def _is_final(record: Optional[Dict]) -> bool:
+    """Whether a record has reached consensus and will not change"""
+    return bool(record and record.get('consensus_timestamp'))
+
+
+# Singleton instance
+transaction_cache = TransactionCache()
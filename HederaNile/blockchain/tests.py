@@ -1,3 +1,774 @@
-from django.test import TestCase
+import base64
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import User
+from SME.models import Startup
+from fund.models import FundingRequest, Milestone
+from investments.models import (
+    AuditLog, EscrowLegKind, EscrowLegStatus, EscrowReleaseLeg, Investment
+)
+from blockchain.models import (
+    EscrowJob, EscrowJobStatus, EscrowJobType, EscrowTransaction, HCSOutboxMessage,
+    HCSTopic, IngestionCursor, MirrorTransaction, OutboxStatus
+)
+from blockchain.services.client_pool import ClientPoolTimeout, HederaClientPool
+from blockchain.services.escrow_ingest import EscrowIngestor
+from blockchain.services.escrow_jobs import EscrowJobWorker, enqueue_escrow_job
+from blockchain.services.escrow_service import escrow_service
+from blockchain.services.hcs_codec import (
+    COMPACT_PREFIX, MSGPACK_AVAILABLE, VERSION_COMPACT, VERSION_JSON, HCSDecodeError,
+    decode_message, decode_mirror_message, encode_message
+)
+from blockchain.services.hcs_anchor import audit_leaf_hash, hcs_anchor_service
+from blockchain.services.hcs_service import hcs_service
+from blockchain.services.hcs_outbox import TOPIC_CREATE_EVENT, HCSOutboxRelay, enqueue_hcs_event
+from blockchain.services.topic_pool import topic_pool_service
+from blockchain.services import key_resolver as key_resolver_module
+from blockchain.services.key_resolver import AccountKeyResolver
+from blockchain.services.mirror_node_async import _backoff
+from blockchain.services import transaction_cache as transaction_cache_module
+from blockchain.services.transaction_cache import TransactionCache
+
+
+def make_investment(amount='100.00', topic_id='0.0.5005'):
+    """Lender investment in a funding request with one verified milestone"""
+    owner = User.objects.create_user('0.0.1001', role='STARTUP')
+    lender = User.objects.create_user('0.0.2002', role='LENDER')
+    startup = Startup.objects.create(
+        owner=owner, name='Acme', sector='Agriculture', country='Egypt', description='Acme'
+    )
+    funding_request = FundingRequest.objects.create(
+        startup=startup,
+        title='Irrigation',
+        description='Irrigation',
+        total_amount=Decimal('1000.00'),
+        hedera_hcs_topic_id=topic_id
+    )
+    milestone = Milestone.objects.create(
+        funding_request=funding_request,
+        title='Pumps',
+        description='Pumps',
+        target_amount=Decimal('1000.00'),
+        percentage_of_request=100,
+        status='VERIFIED'
+    )
+    investment = Investment.objects.create(
+        funding_request=funding_request, lender=lender, amount=Decimal(amount)
+    )
+    return investment, milestone
+
+
+def run_jobs(worker):
+    """Claim and execute queued jobs on the calling thread"""
+    jobs = worker._claim(20)
+    for job in jobs:
+        worker._execute(job)
+    return len(jobs)
+
+
+class EscrowJobKeyTests(TestCase):
+    """Idempotency keys of queued escrow jobs"""
+
+    def setUp(self):
+        self.investment, self.milestone = make_investment()
+        self.lender = self.investment.lender
+        self.other = User.objects.create_user('0.0.3003', role='LENDER')
+
+    def test_replay_returns_original_job(self):
+        first, created = enqueue_escrow_job(
+            EscrowJobType.DEPOSIT, self.investment, user=self.lender, client_key='abc'
+        )
+        replay, replay_created = enqueue_escrow_job(
+            EscrowJobType.DEPOSIT, self.investment, user=self.lender, client_key='abc'
+        )
+        self.assertTrue(created)
+        self.assertFalse(replay_created)
+        self.assertEqual(first.pk, replay.pk)
+
+    def test_default_key_deduplicates_per_investment(self):
+        first, _ = enqueue_escrow_job(EscrowJobType.DEPOSIT, self.investment, user=self.lender)
+        replay, created = enqueue_escrow_job(EscrowJobType.DEPOSIT, self.investment, user=self.other)
+        self.assertFalse(created)
+        self.assertEqual(first.pk, replay.pk)
+
+    def test_failed_job_is_requeued_by_new_request(self):
+        first, _ = enqueue_escrow_job(EscrowJobType.DEPOSIT, self.investment, user=self.lender)
+        EscrowJob.objects.filter(pk=first.pk).update(
+            status=EscrowJobStatus.FAILED, last_error='Escrow deposit transfer failed'
+        )
+
+        retry, created = enqueue_escrow_job(EscrowJobType.DEPOSIT, self.investment, user=self.lender)
+
+        self.assertTrue(created)
+        self.assertEqual(retry.pk, first.pk)
+        self.assertEqual(retry.status, EscrowJobStatus.PENDING)
+        self.assertEqual(retry.last_error, '')
+
+    def test_failed_job_with_transaction_is_not_requeued(self):
+        first, _ = enqueue_escrow_job(EscrowJobType.DEPOSIT, self.investment, user=self.lender)
+        EscrowJob.objects.filter(pk=first.pk).update(
+            status=EscrowJobStatus.FAILED, tx_hash='0.0.9@1.1'
+        )
+
+        retry, created = enqueue_escrow_job(EscrowJobType.DEPOSIT, self.investment, user=self.lender)
+
+        self.assertFalse(created)
+        self.assertEqual(retry.status, EscrowJobStatus.FAILED)
+
+    def test_client_key_is_scoped_to_user(self):
+        first, _ = enqueue_escrow_job(
+            EscrowJobType.DEPOSIT, self.investment, user=self.lender, client_key='abc'
+        )
+        second, created = enqueue_escrow_job(
+            EscrowJobType.DEPOSIT, self.investment, user=self.other, client_key='abc'
+        )
+        self.assertTrue(created)
+        self.assertNotEqual(first.pk, second.pk)
+
+    def test_client_key_is_scoped_to_job_type_and_milestone(self):
+        deposit, _ = enqueue_escrow_job(
+            EscrowJobType.DEPOSIT, self.investment, user=self.lender, client_key='abc'
+        )
+        release, created = enqueue_escrow_job(
+            EscrowJobType.RELEASE, self.investment, milestone=self.milestone,
+            user=self.lender, client_key='abc'
+        )
+        self.assertTrue(created)
+        self.assertNotEqual(deposit.pk, release.pk)
+
+
+class EscrowJobWorkerTests(TestCase):
+    """Execution of deposit and release jobs"""
+
+    def setUp(self):
+        self.investment, self.milestone = make_investment()
+        self.worker = EscrowJobWorker(workers=1)
+
+    def enqueue_release(self, amount='100.00'):
+        job, _ = enqueue_escrow_job(
+            EscrowJobType.RELEASE,
+            self.investment,
+            params={'release_amount': amount, 'recipient_account': '0.0.1001'},
+            milestone=self.milestone,
+            user=self.investment.lender
+        )
+        return job
+
+    def test_deposit_success(self):
+        job, _ = enqueue_escrow_job(EscrowJobType.DEPOSIT, self.investment)
+        with mock.patch.object(escrow_service, 'transfer_to_escrow', return_value='0.0.9@1.1'):
+            self.assertEqual(run_jobs(self.worker), 1)
+
+        job.refresh_from_db()
+        self.investment.refresh_from_db()
+        self.assertEqual(job.status, EscrowJobStatus.SUCCEEDED)
+        self.assertEqual(job.tx_hash, '0.0.9@1.1')
+        self.assertEqual(self.investment.status, 'DEPOSITED')
+        self.assertEqual(self.investment.deposit_tx_hash, '0.0.9@1.1')
+
+    def test_deposit_failure(self):
+        job, _ = enqueue_escrow_job(EscrowJobType.DEPOSIT, self.investment)
+        with mock.patch.object(escrow_service, 'transfer_to_escrow', return_value=None):
+            run_jobs(self.worker)
+
+        job.refresh_from_db()
+        self.investment.refresh_from_db()
+        self.assertEqual(job.status, EscrowJobStatus.FAILED)
+        self.assertIn('transfer failed', job.last_error)
+        self.assertEqual(self.investment.status, 'PENDING')
+
+    def test_deposit_replay_does_not_transfer_twice(self):
+        enqueue_escrow_job(EscrowJobType.DEPOSIT, self.investment)
+        with mock.patch.object(
+            escrow_service, 'transfer_to_escrow', return_value='0.0.9@1.1'
+        ) as transfer:
+            run_jobs(self.worker)
+            _, created = enqueue_escrow_job(EscrowJobType.DEPOSIT, self.investment)
+            self.assertEqual(run_jobs(self.worker), 0)
+
+        self.assertFalse(created)
+        self.assertEqual(transfer.call_count, 1)
+
+    def test_release_success(self):
+        self.investment.status = 'DEPOSITED'
+        self.investment.save(update_fields=['status'])
+        job = self.enqueue_release()
+        with mock.patch.object(escrow_service, 'release_from_escrow', return_value='0.0.9@2.2'):
+            run_jobs(self.worker)
+
+        job.refresh_from_db()
+        self.milestone.refresh_from_db()
+        self.investment.refresh_from_db()
+        self.assertEqual(job.status, EscrowJobStatus.SUCCEEDED)
+        self.assertEqual(self.milestone.status, 'RELEASED')
+        self.assertEqual(self.milestone.release_tx_hash, '0.0.9@2.2')
+        self.assertEqual(self.investment.status, 'COMPLETED')
+
+    def test_release_survives_hcs_failure(self):
+        self.investment.status = 'DEPOSITED'
+        self.investment.save(update_fields=['status'])
+        job = self.enqueue_release()
+        with mock.patch.object(escrow_service, 'release_from_escrow', return_value='0.0.9@2.2'), \
+                mock.patch.object(topic_pool_service, 'enqueue_event',
+                                  side_effect=RuntimeError('outbox down')):
+            run_jobs(self.worker)
+
+        job.refresh_from_db()
+        self.milestone.refresh_from_db()
+        self.assertEqual(job.status, EscrowJobStatus.SUCCEEDED)
+        self.assertEqual(self.milestone.status, 'RELEASED')
+
+    def test_release_failure(self):
+        self.investment.status = 'DEPOSITED'
+        self.investment.save(update_fields=['status'])
+        job = self.enqueue_release()
+        with mock.patch.object(escrow_service, 'release_from_escrow', return_value=None):
+            run_jobs(self.worker)
+
+        job.refresh_from_db()
+        self.milestone.refresh_from_db()
+        self.assertEqual(job.status, EscrowJobStatus.FAILED)
+        self.assertIn('transfer failed', job.last_error)
+        self.assertEqual(self.milestone.status, 'VERIFIED')
+        self.assertEqual(
+            EscrowReleaseLeg.objects.get(investment=self.investment).status, EscrowLegStatus.FAILED
+        )
+
+    def test_release_replay_does_not_transfer_twice(self):
+        self.investment.status = 'DEPOSITED'
+        self.investment.save(update_fields=['status'])
+        self.enqueue_release()
+        with mock.patch.object(
+            escrow_service, 'release_from_escrow', return_value='0.0.9@2.2'
+        ) as transfer:
+            run_jobs(self.worker)
+            self.enqueue_release()
+            run_jobs(self.worker)
+
+        self.assertEqual(transfer.call_count, 1)
+
+    def test_release_skips_investment_paid_by_milestone_batch(self):
+        self.investment.status = 'DEPOSITED'
+        self.investment.save(update_fields=['status'])
+        EscrowReleaseLeg.objects.create(
+            batch_id=self.milestone.id,
+            kind=EscrowLegKind.RELEASE,
+            investment=self.investment,
+            milestone=self.milestone,
+            recipient_account='0.0.1001',
+            amount=Decimal('100.00'),
+            status=EscrowLegStatus.SUBMITTED
+        )
+        job = self.enqueue_release()
+        with mock.patch.object(escrow_service, 'release_from_escrow') as transfer:
+            run_jobs(self.worker)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, EscrowJobStatus.FAILED)
+        transfer.assert_not_called()
+
+    def test_release_records_leg(self):
+        self.investment.status = 'DEPOSITED'
+        self.investment.save(update_fields=['status'])
+        self.enqueue_release('40.00')
+        with mock.patch.object(escrow_service, 'release_from_escrow', return_value='0.0.9@2.2'):
+            run_jobs(self.worker)
+
+        leg = EscrowReleaseLeg.objects.get(investment=self.investment)
+        self.assertEqual(leg.status, EscrowLegStatus.SUBMITTED)
+        self.assertEqual(leg.amount, Decimal('40.00'))
+        self.assertEqual(leg.milestone, self.milestone)
+
+    def test_stale_processing_jobs_are_failed(self):
+        job, _ = enqueue_escrow_job(EscrowJobType.DEPOSIT, self.investment)
+        EscrowJob.objects.filter(pk=job.pk).update(
+            status=EscrowJobStatus.PROCESSING,
+            started_at=timezone.now() - timedelta(seconds=self.worker.stale_after + 1)
+        )
+
+        self.assertEqual(self.worker.fail_stale_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, EscrowJobStatus.FAILED)
+        self.assertIn('mirror node', job.last_error)
+
+    def test_recent_processing_jobs_are_kept(self):
+        job, _ = enqueue_escrow_job(EscrowJobType.DEPOSIT, self.investment)
+        EscrowJob.objects.filter(pk=job.pk).update(
+            status=EscrowJobStatus.PROCESSING, started_at=timezone.now()
+        )
+
+        self.assertEqual(self.worker.fail_stale_jobs(), 0)
+
+
+class HCSOutboxRelayTests(TestCase):
+    """Claiming and lease expiry of outbox messages"""
+
+    def setUp(self):
+        self.relay = HCSOutboxRelay(workers=1)
+
+    def test_claim_marks_messages_processing(self):
+        messages = [enqueue_hcs_event('DEPOSIT', {'n': i}, topic_id='0.0.5005') for i in range(3)]
+
+        claimed = self.relay._claim(10)
+
+        self.assertEqual({m.pk for m in claimed}, {m.pk for m in messages})
+        self.assertTrue(all(m.status == OutboxStatus.PROCESSING for m in claimed))
+        self.assertEqual(len({m.claim_token for m in claimed}), 1)
+        self.assertEqual(self.relay._claim(10), [])
+
+    def test_expired_claims_are_requeued(self):
+        message = enqueue_hcs_event('DEPOSIT', {}, topic_id='0.0.5005')
+        self.relay._claim(10)
+        HCSOutboxMessage.objects.filter(pk=message.pk).update(
+            claimed_at=timezone.now() - timedelta(seconds=self.relay.claim_timeout + 1)
+        )
+
+        self.assertEqual(self.relay.reclaim_expired(), 1)
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxStatus.PENDING)
+        self.assertEqual([m.pk for m in self.relay._claim(10)], [message.pk])
+
+    def test_live_claims_are_kept(self):
+        enqueue_hcs_event('DEPOSIT', {}, topic_id='0.0.5005')
+        self.relay._claim(10)
+
+        self.assertEqual(self.relay.reclaim_expired(), 0)
+
+    def test_mock_submissions_are_confirmed_in_precheck_mode(self):
+        message = enqueue_hcs_event('DEPOSIT', {}, topic_id='0.0.5005')
+        with mock.patch.object(hcs_service, 'wait_for_receipt', False), \
+                mock.patch.object(type(hcs_service), 'is_live', new_callable=mock.PropertyMock,
+                                  return_value=False):
+            for claimed in self.relay._claim(10):
+                self.relay._submit(claimed)
+
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxStatus.CONFIRMED)
+        self.assertTrue(message.message_id)
+
+    def test_write_back_failure_keeps_submitted_message(self):
+        message = enqueue_hcs_event('DEPOSIT', {}, topic_id='0.0.5005')
+        with mock.patch('blockchain.services.hcs_outbox.hcs_service.submit_message',
+                        return_value='0.0.9@1.1'), \
+                mock.patch('blockchain.services.hcs_outbox.apply_write_back',
+                           side_effect=DatabaseError('database is locked')):
+            for claimed in self.relay._claim(10):
+                self.relay._submit(claimed)
+
+        message.refresh_from_db()
+        self.assertIn(message.status, (OutboxStatus.SUBMITTED, OutboxStatus.CONFIRMED))
+        self.assertEqual(message.message_id, '0.0.9@1.1')
+        self.assertIn('database is locked', message.last_error)
+
+
+@skipUnless(MSGPACK_AVAILABLE, "msgpack is not installed")
+class HCSCodecTests(SimpleTestCase):
+    """Round trips and malformed input for the HCS message codec"""
+
+    message = {
+        'event_type': 'DEPOSIT',
+        'timestamp': '2025-01-15T10:30:00.123456+00:00',
+        'payload': {
+            'investment_id': '7c9e6679-7425-40de-944b-e07fc1f90ae7',
+            'amount': '150.50',
+            'note': 'first tranche',
+        },
+        'hash': 'ab' * 32,
+    }
+
+    def test_compact_round_trip(self):
+        decoded = decode_message(encode_message(self.message, VERSION_COMPACT))
+        self.assertEqual(decoded.pop('version'), VERSION_COMPACT)
+        self.assertEqual(decoded, self.message)
+
+    def test_json_round_trip(self):
+        decoded = decode_message(encode_message(self.message, VERSION_JSON))
+        self.assertEqual(decoded.pop('version'), VERSION_JSON)
+        self.assertEqual(decoded, self.message)
+
+    def test_unknown_event_type_round_trips_as_string(self):
+        message = dict(self.message, event_type='CUSTOM_EVENT')
+        self.assertEqual(decode_message(encode_message(message))['event_type'], 'CUSTOM_EVENT')
+
+    def test_garbage_raises_decode_error(self):
+        import msgpack
+
+        garbage = [
+            b'',
+            b'not json',
+            b'\xff\xfe\x00',
+            b'[1, 2, 3]',
+            b'"a string"',
+            b'null',
+            COMPACT_PREFIX,
+            COMPACT_PREFIX + b'\xc1',
+            COMPACT_PREFIX + msgpack.packb(7),
+            COMPACT_PREFIX + msgpack.packb([1, 2]),
+            COMPACT_PREFIX + msgpack.packb([999, 0, {}, b'']),
+            COMPACT_PREFIX + msgpack.packb([-1, 0, {}, b'']),
+            COMPACT_PREFIX + msgpack.packb([1.5, 0, {}, b'']),
+            COMPACT_PREFIX + msgpack.packb([1, 0, [], b'']),
+            COMPACT_PREFIX + msgpack.packb([1, 0, {}, 'not bytes']),
+            COMPACT_PREFIX + msgpack.packb([1, 0, {'id': msgpack.ExtType(1, b'short')}, b'']),
+        ]
+        for raw in garbage:
+            with self.subTest(raw=raw):
+                with self.assertRaises(HCSDecodeError):
+                    decode_message(raw)
+
+    def test_invalid_mirror_message_raises_decode_error(self):
+        for message in ({}, {'message': 'not base64!'}, {'message': None}):
+            with self.subTest(message=message):
+                with self.assertRaises(HCSDecodeError):
+                    decode_mirror_message(message)
+
+
+@override_settings(HCS_ANCHOR_MODE='batch')
+class HCSAnchorTests(TestCase):
+    """Merkle-batched anchoring of outbox events"""
+
+    def setUp(self):
+        self.investment, _ = make_investment()
+
+    def enqueue_deposit(self):
+        audit_log = AuditLog.objects.create(
+            event_type='INVESTMENT_CREATED',
+            payload={'investment_id': str(self.investment.id)}
+        )
+        payload = {'investment_id': str(self.investment.id), 'amount': '100.00'}
+        message = enqueue_hcs_event(
+            event_type='DEPOSIT',
+            payload=payload,
+            topic_id='0.0.5005',
+            audit_log=audit_log,
+            target=self.investment,
+            target_field='hcs_deposit_message_id'
+        )
+        return message, payload
+
+    def test_callers_audit_log_is_the_leaf(self):
+        message, _ = self.enqueue_deposit()
+
+        leaf = message.audit_log
+        self.assertEqual(message.status, OutboxStatus.BATCHED)
+        self.assertEqual(leaf.event_type, 'INVESTMENT_CREATED')
+        self.assertEqual(leaf.topic_id, '0.0.5005')
+        self.assertEqual(AuditLog.objects.count(), 1)
+
+    def test_event_without_audit_log_gets_one(self):
+        message = enqueue_hcs_event('DEPOSIT', {'n': 1}, topic_id='0.0.5005')
+        self.assertEqual(message.audit_log.payload, {'n': 1})
+
+    def test_batches_are_anchored_per_topic(self):
+        message, _ = self.enqueue_deposit()
+        enqueue_hcs_event('STATUS_UPDATE', {'n': 1}, topic_id='0.0.6006')
+
+        batches = hcs_anchor_service.anchor_pending()
+
+        self.assertEqual(sorted(batch.topic_id for batch in batches), ['0.0.5005', '0.0.6006'])
+        topic_batch = next(batch for batch in batches if batch.topic_id == '0.0.5005')
+        self.assertEqual(topic_batch.leaf_count, 1)
+        leaf = AuditLog.objects.get(pk=message.audit_log_id)
+        self.assertEqual(leaf.anchor_batch_id, topic_batch.id)
+        self.assertEqual(leaf.merkle_leaf_hash, audit_leaf_hash(leaf))
+        self.assertEqual(
+            HCSOutboxMessage.objects.get(event_type='MERKLE_ANCHOR', target_pk=str(topic_batch.id)).topic_id,
+            '0.0.5005'
+        )
+
+    def test_logs_without_batched_events_are_not_anchored(self):
+        historical = AuditLog.objects.create(event_type='USER_LOGIN', payload={})
+        message, _ = self.enqueue_deposit()
+
+        batches = hcs_anchor_service.anchor_pending()
+
+        self.assertEqual([batch.leaf_count for batch in batches], [1])
+        historical.refresh_from_db()
+        self.assertIsNone(historical.anchor_batch_id)
+
+    def test_propagate_writes_back_root_message_id(self):
+        message, _ = self.enqueue_deposit()
+        batch = next(b for b in hcs_anchor_service.anchor_pending() if b.topic_id == '0.0.5005')
+
+        hcs_anchor_service.propagate(str(batch.id), '0.0.5005@1.1', OutboxStatus.CONFIRMED)
+
+        message.refresh_from_db()
+        self.investment.refresh_from_db()
+        self.assertEqual(message.status, OutboxStatus.CONFIRMED)
+        self.assertEqual(message.message_id, '0.0.5005@1.1')
+        self.assertEqual(self.investment.hcs_deposit_message_id, '0.0.5005@1.1')
+        self.assertEqual(
+            AuditLog.objects.get(pk=message.audit_log_id).hcs_message_id, '0.0.5005@1.1'
+        )
+
+
+class KeyResolverTests(SimpleTestCase):
+    """Key caching, rotation and mirror errors of the account key resolver"""
+
+    def setUp(self):
+        self.now = 1000.0
+        self.keys = ['aa']
+        self.status = 200
+        self.resolver = AccountKeyResolver()
+        self.get = mock.patch.object(self.resolver.session, 'get', side_effect=self.mirror).start()
+        mock.patch.object(key_resolver_module.time, 'monotonic', lambda: self.now).start()
+        # A signature verifies when it equals the hex key
+        mock.patch.object(
+            key_resolver_module, 'verify_signature',
+            lambda key, message, signature: signature.hex() == key.key
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def mirror(self, url, timeout):
+        if self.status != 200:
+            return mock.Mock(status_code=self.status)
+        if isinstance(self.keys[0], Exception):
+            raise self.keys[0]
+        return mock.Mock(
+            status_code=200, json=lambda: {'key': {'_type': 'ED25519', 'key': self.keys[0]}}
+        )
+
+    def verify(self, key_hex):
+        return self.resolver.verify('0.0.1001', b'nonce', bytes.fromhex(key_hex))
+
+    def test_rotated_out_key_stops_verifying(self):
+        self.assertTrue(self.verify('aa'))
+        self.keys = ['bb']
+        self.now += self.resolver.verify_ttl + 1
+
+        self.assertFalse(self.verify('aa'))
+        self.assertTrue(self.verify('bb'))
+
+    def test_recent_key_is_served_from_cache(self):
+        self.assertTrue(self.verify('aa'))
+        self.now += self.resolver.verify_ttl
+        self.assertTrue(self.verify('aa'))
+
+        self.assertEqual(self.get.call_count, 1)
+
+    def test_mirror_errors_are_cached_briefly(self):
+        for error in (503, key_resolver_module.requests.ConnectionError('down')):
+            with self.subTest(error=error):
+                self.resolver.invalidate_all()
+                if isinstance(error, int):
+                    self.status = error
+                else:
+                    self.status, self.keys = 200, [error]
+                self.assertIsNone(self.resolver.resolve('0.0.1001'))
+
+                self.status, self.keys = 200, ['aa']
+                self.now += self.resolver.error_ttl + 1
+                self.assertEqual(self.resolver.resolve('0.0.1001').key, 'aa')
+
+    def test_missing_account_is_cached_for_the_ttl(self):
+        self.status = 404
+        self.assertIsNone(self.resolver.resolve('0.0.1001'))
+        self.now += self.resolver.error_ttl + 1
+
+        self.assertIsNone(self.resolver.resolve('0.0.1001'))
+        self.assertEqual(self.get.call_count, 1)
+
+
+@override_settings(
+    HEDERA_NODE_ACCOUNT_IDS=['0.0.3', '0.0.4', '0.0.5'],
+    HEDERA_NODE_MAX_FAILURES=1,
+    HEDERA_CLIENT_POOL_SIZE=1,
+    HEDERA_CLIENT_CHECKOUT_TIMEOUT=0.01
+)
+class ClientPoolTests(SimpleTestCase):
+    """Node health accounting and checkout of the Hedera client pool"""
+
+    def setUp(self):
+        self.pool = HederaClientPool()
+        mock.patch.object(self.pool, '_create_client', return_value=object()).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def execute(self, outcome):
+        request = mock.Mock()
+        if isinstance(outcome, Exception):
+            request.execute.side_effect = outcome
+        else:
+            request.execute.return_value = outcome
+        with self.pool.lease('testnet', '0.0.2', 'key') as lease:
+            return lease.execute(request)
+
+    def test_business_errors_do_not_eject_nodes(self):
+        with self.assertRaises(ValueError):
+            self.execute(ValueError('INSUFFICIENT_PAYER_BALANCE'))
+
+        self.assertEqual(self.pool.select_nodes(), ['0.0.3', '0.0.4', '0.0.5'])
+
+    def test_transport_errors_eject_the_serving_node(self):
+        error = TimeoutError('deadline exceeded')
+        error.node_id = '0.0.4'
+        with self.assertRaises(TimeoutError):
+            self.execute(error)
+
+        self.assertEqual(self.pool.select_nodes(), ['0.0.3', '0.0.5'])
+
+    def test_latency_is_recorded_for_the_serving_node(self):
+        with mock.patch.object(self.pool, 'report') as report:
+            self.execute(mock.Mock(node_id='0.0.5'))
+
+        self.assertEqual(report.call_count, 1)
+        self.assertEqual(report.call_args[0][:2], ('0.0.5', True))
+
+    def test_checkout_times_out_when_all_clients_are_leased(self):
+        with self.pool.lease('testnet', '0.0.2', 'key'):
+            with self.assertRaises(ClientPoolTimeout):
+                with self.pool.lease('testnet', '0.0.2', 'key'):
+                    pass
+
+
+@override_settings(HEDERA_ESCROW_ACCOUNT_ID='0.0.999')
+class EscrowIngestTests(TestCase):
+    """Matching ingested escrow transfers to pending investments"""
+
+    def setUp(self):
+        self.first, _ = make_investment(amount='10.00')
+        self.funding_request = self.first.funding_request
+        self.second = Investment.objects.create(
+            funding_request=self.funding_request,
+            lender=User.objects.create_user('0.0.3003', role='LENDER'),
+            amount=Decimal('20.00')
+        )
+        self.ingestor = EscrowIngestor()
+
+    def transfer(self, investment, sequence):
+        amount = int(investment.amount * 100_000_000)
+        return {
+            'transaction_id': f"{investment.lender.hedera_account_id}-{sequence}",
+            'consensus_timestamp': f"1700000000.00000000{sequence}",
+            'result': 'SUCCESS',
+            'memo_base64': base64.b64encode(str(investment.id).encode()).decode(),
+            'transfers': [
+                {'account': investment.lender.hedera_account_id, 'amount': -amount - 1000},
+                {'account': '0.0.999', 'amount': amount},
+            ],
+        }
+
+    def ingest(self, transactions):
+        with mock.patch(
+            'blockchain.services.escrow_ingest.mirror_node_service.iter_account_transactions',
+            return_value=iter(transactions)
+        ):
+            return self.ingestor.ingest()
+
+    def test_deposits_to_one_funding_request_add_up(self):
+        counts = self.ingest([self.transfer(self.first, 1), self.transfer(self.second, 2)])
+
+        self.assertEqual(counts, {'ingested': 2, 'matched': 2})
+        self.funding_request.refresh_from_db()
+        self.assertEqual(self.funding_request.amount_raised, Decimal('30.00'))
+
+    def test_failed_match_does_not_hold_back_cursor(self):
+        with mock.patch.object(
+            Investment, 'confirm_deposit', side_effect=[DatabaseError('ledger locked'), True]
+        ):
+            counts = self.ingest([self.transfer(self.first, 1), self.transfer(self.second, 2)])
+
+        self.assertEqual(counts, {'ingested': 2, 'matched': 1})
+        cursor = IngestionCursor.objects.get(name=self.ingestor.cursor_name)
+        self.assertEqual(cursor.last_timestamp, '1700000000.000000002')
+        failed = EscrowTransaction.objects.get(transaction_id='0.0.2002-1')
+        self.assertIsNone(failed.matched_investment)
+        self.assertIn('ledger locked', failed.match_error)
+
+    def test_deposit_confirmed_elsewhere_is_not_confirmed_again(self):
+        stale = Investment.objects.get(pk=self.first.pk)
+        Investment.objects.filter(pk=self.first.pk).update(status='DEPOSITED')
+
+        self.assertFalse(stale.confirm_deposit('0.0.2002-1', None))
+        self.funding_request.refresh_from_db()
+        self.assertEqual(self.funding_request.amount_raised, Decimal('0.00'))
+
+
+class TopicPoolTests(TestCase):
+    """Events of funding requests whose topic is still being created"""
+
+    def setUp(self):
+        investment, _ = make_investment(topic_id='')
+        self.funding_request = investment.funding_request
+        self.creation = topic_pool_service.assign_topic(self.funding_request)[1]
+
+    def test_events_wait_for_topic_creation(self):
+        message = topic_pool_service.enqueue_event(self.funding_request, 'STATUS_UPDATE', {})
+
+        self.assertIsNone(message.topic_id)
+        self.assertEqual(message.depends_on_id, self.creation.pk)
+        self.assertEqual(message.status, OutboxStatus.PENDING)
+
+    def test_failed_creation_moves_dependents_to_pooled_topic(self):
+        message = topic_pool_service.enqueue_event(self.funding_request, 'STATUS_UPDATE', {})
+        HCSTopic.objects.create(topic_id='0.0.7007')
+        self.fail_creation()
+
+        message.refresh_from_db()
+        self.assertEqual(message.topic_id, '0.0.7007')
+        self.assertIsNone(message.depends_on_id)
+
+    def test_failed_creation_fails_dependents_without_pooled_topic(self):
+        message = topic_pool_service.enqueue_event(self.funding_request, 'STATUS_UPDATE', {})
+        self.fail_creation()
+
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxStatus.FAILED)
+        self.assertIn('Topic creation failed', message.last_error)
+
+    def fail_creation(self):
+        relay = HCSOutboxRelay(workers=1, max_attempts=1)
+        with mock.patch('blockchain.services.hcs_outbox.hcs_service.submit_topic_create',
+                        side_effect=RuntimeError('INSUFFICIENT_PAYER_BALANCE')):
+            for claimed in relay._claim(10):
+                if claimed.event_type == TOPIC_CREATE_EVENT:
+                    relay._submit(claimed)
+        self.creation.refresh_from_db()
+        self.assertEqual(self.creation.status, OutboxStatus.FAILED)
+
+
+class MirrorNodeBackoffTests(SimpleTestCase):
+    """Retry delays of the async mirror node client"""
+
+    def test_retry_after_is_honoured_up_to_the_maximum(self):
+        throttled = mock.Mock(headers={'Retry-After': '3'})
+        self.assertEqual(_backoff(0, throttled, 10), 3.0)
+
+        throttled.headers['Retry-After'] = '3600'
+        self.assertEqual(_backoff(0, throttled, 10), 10)
+
+    def test_exponential_backoff_is_capped(self):
+        self.assertEqual(_backoff(1, None, 10), 1.0)
+        self.assertEqual(_backoff(8, None, 10), 10)
+
+
+class TransactionCacheTests(TestCase):
+    """Expiry and persistence of cached mirror-node lookups"""
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch.object(transaction_cache_module.time, 'monotonic', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = TransactionCache()
+
+    def test_final_records_are_kept(self):
+        record = {'result': 'SUCCESS', 'consensus_timestamp': '1700000000.000000001'}
+        self.cache.put('0.0.1001@1700000000.000000000', record)
+        self.now += self.cache.miss_ttl + 1
+
+        self.assertEqual(self.cache.get('0.0.1001-1700000000-000000000'), (True, record))
+        self.assertTrue(MirrorTransaction.objects.exists())
+
+    def test_records_without_consensus_timestamp_expire(self):
+        self.cache.put('0.0.1001@1700000000.000000000', {'result': 'UNKNOWN'})
+        self.assertTrue(self.cache.get('0.0.1001@1700000000.000000000')[0])
+        self.now += self.cache.miss_ttl + 1
+
+        self.assertEqual(self.cache.get('0.0.1001@1700000000.000000000'), (False, None))
+        self.assertFalse(MirrorTransaction.objects.exists())
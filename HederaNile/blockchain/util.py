@@ -1,8 +1,7 @@
-import requests
+from blockchain.services.key_resolver import account_key_resolver
 
-def get_public_key_from_hedera(account_id):
-    url = f"https://testnet.mirrornode.hedera.com/api/v1/accounts/{account_id}"
-    response = requests.get(url)
-    print(response.json()["key"]["key"])
-    return response.json()["key"]["key"]
 
+def get_public_key_from_hedera(account_id):
+    """Public key (hex) of a Hedera account, cached; None if it has none"""
+    key = account_key_resolver.resolve(account_id)
+    return key.key if key else None
@@ -175,6 +175,7 @@ class FundingRequestDetailSerializer(serializers.ModelSerializer):
     startup = StartupPublicSerializer(read_only=True)
     milestones = MilestoneDetailSerializer(many=True, read_only=True)
     funding_percentage = serializers.SerializerMethodField()
+    hcs_topic_id = serializers.CharField(source='hedera_hcs_topic_id', read_only=True)
     
     class Meta:
         model = FundingRequest
@@ -24,7 +24,8 @@ from .serializers import (
 from accounts.permissions import (
     IsAdminUser, IsStartupOrAdmin, IsOwnerOrAdmin, IsOwnerOrAdminOrReadOnly
 )
-from blockchain.services.hcs_service import create_hcs_topic, log_event_to_hcs
+from blockchain.services.topic_pool import topic_pool_service
+from blockchain.services.hcs_outbox import enqueue_hcs_event
 from ipfs_storage.services.storage_service import upload_file_to_ipfs
 
 
@@ -78,15 +79,14 @@ class FundingRequestViewSet(viewsets.ModelViewSet):
         
         funding_request = serializer.save(startup=startup)
         
-        # Create HCS topic for this funding request
+        # Claim a pre-provisioned HCS topic (creation is queued if the pool is empty)
         try:
-            topic_id = create_hcs_topic()
-            funding_request.hcs_topic_id = topic_id
-            funding_request.save(update_fields=['hcs_topic_id'])
+            topic_id, topic_job = topic_pool_service.assign_topic(funding_request)
             
-            # Log creation event to HCS
-            log_event_to_hcs(
+            # Queue creation event for HCS, after the topic exists
+            enqueue_hcs_event(
                 topic_id=topic_id,
+                depends_on=topic_job,
                 event_type='CREATE_REQUEST',
                 payload={
                     'funding_request_id': str(funding_request.id),
@@ -112,26 +112,9 @@ class FundingRequestViewSet(viewsets.ModelViewSet):
         funding_request.status = new_status
         funding_request.save(update_fields=['status'])
         
-        # Log status change to HCS
-        try:
-            if funding_request.hcs_topic_id:
-                log_event_to_hcs(
-                    topic_id=funding_request.hcs_topic_id,
-                    event_type='STATUS_UPDATE',
-                    payload={
-                        'funding_request_id': str(funding_request.id),
-                        'old_status': old_status,
-                        'new_status': new_status,
-                        'admin_id': str(request.user.id),
-                        'timestamp': timezone.now().isoformat()
-                    }
-                )
-        except Exception as e:
-            print(f"HCS logging failed: {e}")
-        
         # Log in audit trail
         from investments.models import AuditLog
-        AuditLog.objects.create(
+        audit_log = AuditLog.objects.create(
             event_type='FUNDING_STATUS_UPDATE',
             user=request.user,
             payload={
@@ -141,6 +124,23 @@ class FundingRequestViewSet(viewsets.ModelViewSet):
             }
         )
         
+        # Queue status change for HCS
+        try:
+            topic_pool_service.enqueue_event(
+                funding_request,
+                event_type='STATUS_UPDATE',
+                payload={
+                    'funding_request_id': str(funding_request.id),
+                    'old_status': old_status,
+                    'new_status': new_status,
+                    'admin_id': str(request.user.id),
+                    'timestamp': timezone.now().isoformat()
+                },
+                audit_log=audit_log
+            )
+        except Exception as e:
+            print(f"HCS logging failed: {e}")
+        
         return Response({
             'message': f'Funding request status updated from {old_status} to {new_status}',
             'funding_request': FundingRequestDetailSerializer(funding_request).data
@@ -241,20 +241,19 @@ class MilestoneViewSet(viewsets.ModelViewSet):
             milestone.status = 'COMPLETED'
             milestone.save(update_fields=['proof_ipfs_cid', 'status'])
             
-            # Log to HCS
+            # Queue for HCS
             try:
-                if milestone.funding_request.hcs_topic_id:
-                    log_event_to_hcs(
-                        topic_id=milestone.funding_request.hcs_topic_id,
-                        event_type='MILESTONE_PROOF_SUBMITTED',
-                        payload={
-                            'milestone_id': str(milestone.id),
-                            'funding_request_id': str(milestone.funding_request.id),
-                            'proof_cid': cid,
-                            'description': description,
-                            'timestamp': timezone.now().isoformat()
-                        }
-                    )
+                topic_pool_service.enqueue_event(
+                    milestone.funding_request,
+                    event_type='MILESTONE_PROOF_SUBMITTED',
+                    payload={
+                        'milestone_id': str(milestone.id),
+                        'funding_request_id': str(milestone.funding_request.id),
+                        'proof_cid': cid,
+                        'description': description,
+                        'timestamp': timezone.now().isoformat()
+                    }
+                )
             except Exception as e:
                 print(f"HCS logging failed: {e}")
             
@@ -287,22 +286,21 @@ class MilestoneViewSet(viewsets.ModelViewSet):
         
         milestone.save(update_fields=['status'])
         
-        # Log verification to HCS
+        # Queue verification for HCS; the relay fills in hcs_message_id
         try:
-            if milestone.funding_request.hcs_topic_id:
-                hcs_message_id = log_event_to_hcs(
-                    topic_id=milestone.funding_request.hcs_topic_id,
-                    event_type='VERIFY_MILESTONE',
-                    payload={
-                        'milestone_id': str(milestone.id),
-                        'verification_status': verification_status,
-                        'admin_id': str(request.user.id),
-                        'admin_notes': admin_notes,
-                        'timestamp': timezone.now().isoformat()
-                    }
-                )
-                milestone.hcs_verify_message_id = hcs_message_id
-                milestone.save(update_fields=['hcs_verify_message_id'])
+            topic_pool_service.enqueue_event(
+                milestone.funding_request,
+                event_type='VERIFY_MILESTONE',
+                payload={
+                    'milestone_id': str(milestone.id),
+                    'verification_status': verification_status,
+                    'admin_id': str(request.user.id),
+                    'admin_notes': admin_notes,
+                    'timestamp': timezone.now().isoformat()
+                },
+                target=milestone,
+                target_field='hcs_message_id'
+            )
         except Exception as e:
             print(f"HCS logging failed: {e}")
         
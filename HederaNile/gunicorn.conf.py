@@ -0,0 +1,37 @@
+"""
+Gunicorn configuration for NileFi.
+
+Usage:
+    gunicorn HederaNile.wsgi -c gunicorn.conf.py
+
+The application and the ML credit model are loaded once in the master
+process and shared copy-on-write by the forked workers. Run
+`python manage.py export_scoring_model` first so the model is
+memory-mapped rather than unpickled. For uWSGI, keep `lazy-apps` off and
+call scoring.services.scoring_service.preload_scoring_models from the WSGI
+module.
+"""
+
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+
+# Import Django and the application before forking
+preload_app = True
+
+
+def when_ready(server):
+    """Load the scoring model in the master, after the app and before any fork"""
+    from scoring.services.scoring_service import preload_scoring_models
+
+    if preload_scoring_models():
+        server.log.info("Credit scoring model preloaded for workers")
+    else:
+        server.log.warning("Credit scoring model unavailable; ML scores fall back to neutral")
+
+    # Keep the cyclic GC from writing to (and un-sharing) preloaded objects
+    gc.freeze()
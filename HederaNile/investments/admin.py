@@ -3,7 +3,7 @@ Django admin configuration for investments app.
 """
 
 from django.contrib import admin
-from .models import Investment, AuditLog
+from .models import Investment, AuditLog, EscrowReleaseLeg, EscrowLedgerEntry, EscrowBalance
 
 
 @admin.register(Investment)
@@ -30,6 +30,47 @@ class InvestmentAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(EscrowReleaseLeg)
+class EscrowReleaseLegAdmin(admin.ModelAdmin):
+    """Admin interface for EscrowReleaseLeg model"""
+    
+    list_display = ['kind', 'recipient_account', 'amount', 'status', 'tx_hash', 'created_at']
+    list_filter = ['kind', 'status', 'created_at']
+    search_fields = ['tx_hash', 'recipient_account', 'batch_id']
+    ordering = ['-created_at']
+    readonly_fields = ['batch_id', 'created_at']
+
+
+@admin.register(EscrowLedgerEntry)
+class EscrowLedgerEntryAdmin(admin.ModelAdmin):
+    """Admin interface for EscrowLedgerEntry model (read-only)"""
+    
+    list_display = ['entry_type', 'account', 'amount', 'funding_request', 'investor', 'tx_hash', 'created_at']
+    list_filter = ['entry_type', 'account', 'created_at']
+    search_fields = ['tx_hash', 'posting_id', 'investor__hedera_account_id']
+    ordering = ['-created_at']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(EscrowBalance)
+class EscrowBalanceAdmin(admin.ModelAdmin):
+    """Admin interface for EscrowBalance model"""
+    
+    list_display = ['key', 'scope', 'amount', 'onchain_amount', 'reconciled_at', 'updated_at']
+    list_filter = ['scope']
+    search_fields = ['key']
+    readonly_fields = ['key', 'scope', 'funding_request', 'investor', 'amount',
+                       'onchain_amount', 'reconciled_at', 'updated_at']
+
+
 @admin.register(AuditLog)
 class AuditLogAdmin(admin.ModelAdmin):
     """Admin interface for AuditLog model"""
@@ -45,7 +86,11 @@ class AuditLogAdmin(admin.ModelAdmin):
             'fields': ('event_type', 'user', 'payload')
         }),
         ('Blockchain References', {
-            'fields': ('hcs_message_id', 'transaction_hash')
+            'fields': ('hcs_message_id', 'transaction_hash', 'topic_id')
+        }),
+        ('Merkle Anchor', {
+            'fields': ('anchor_batch', 'merkle_leaf_index', 'merkle_leaf_hash', 'merkle_path'),
+            'classes': ('collapse',)
         }),
         ('Timestamp', {
             'fields': ('created_at',)
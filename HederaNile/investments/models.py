@@ -3,10 +3,10 @@ Investment models for NileFi - tracking lender investments and deposits.
 """
 
 import uuid
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
-from funding.models import FundingRequest
+from funding.models import FundingRequest, Milestone
 
 
 class InvestmentStatus(models.TextChoices):
@@ -104,17 +104,45 @@ class Investment(models.Model):
         return f"{self.lender.hedera_account_id} -> {self.funding_request.title} ({self.amount} HBAR)"
     
     def confirm_deposit(self, tx_hash, hcs_message_id):
-        """Confirm deposit transaction"""
-        self.status = InvestmentStatus.DEPOSITED
-        self.deposit_tx_hash = tx_hash
-        self.hcs_deposit_message_id = hcs_message_id
-        self.deposited_at = timezone.now()
-        self.save(update_fields=['status', 'deposit_tx_hash', 'hcs_deposit_message_id', 'deposited_at'])
+        """
+        Confirm deposit transaction and post it to the escrow ledger.
+        The investment is flipped with a conditional update, so only one of
+        several concurrent confirmations takes effect.
         
-        # Update funding request's raised amount
-        self.funding_request.amount_raised += self.amount
-        self.funding_request.save(update_fields=['amount_raised'])
-        self.funding_request.update_funding_status()
+        Returns:
+            True if this call confirmed the deposit, False if the
+            investment was no longer pending
+        """
+        from blockchain.services.escrow_ledger import escrow_ledger
+        
+        with transaction.atomic():
+            deposited_at = timezone.now()
+            confirmed = Investment.objects.filter(
+                pk=self.pk, status=InvestmentStatus.PENDING
+            ).update(
+                status=InvestmentStatus.DEPOSITED,
+                deposit_tx_hash=tx_hash,
+                hcs_deposit_message_id=hcs_message_id,
+                deposited_at=deposited_at,
+                updated_at=deposited_at
+            )
+            if not confirmed:
+                return False
+            
+            self.status = InvestmentStatus.DEPOSITED
+            self.deposit_tx_hash = tx_hash
+            self.hcs_deposit_message_id = hcs_message_id
+            self.deposited_at = deposited_at
+            
+            # Update funding request's raised amount in the database, not on a possibly stale copy
+            FundingRequest.objects.filter(pk=self.funding_request_id).update(
+                amount_raised=models.F('amount_raised') + self.amount
+            )
+            self.funding_request.refresh_from_db(fields=['amount_raised', 'status', 'funded_at'])
+            self.funding_request.update_funding_status()
+            
+            escrow_ledger.record_deposit(self, tx_hash)
+        return True
     
     def complete(self):
         """Mark investment as completed"""
@@ -122,10 +150,216 @@ class Investment(models.Model):
         self.completed_at = timezone.now()
         self.save(update_fields=['status', 'completed_at'])
     
-    def refund(self):
-        """Mark investment as refunded"""
-        self.status = InvestmentStatus.REFUNDED
-        self.save(update_fields=['status'])
+    def refund(self, tx_hash=None, amount=None):
+        """Mark investment as refunded and post the refund to the escrow ledger"""
+        from blockchain.services.escrow_ledger import escrow_ledger
+        
+        with transaction.atomic():
+            self.status = InvestmentStatus.REFUNDED
+            self.save(update_fields=['status'])
+            escrow_ledger.record_refund(self, amount or self.amount, tx_hash)
+
+
+class EscrowLegKind(models.TextChoices):
+    """Escrow leg kind choices"""
+    RELEASE = 'RELEASE', 'Milestone Release'
+    REFUND = 'REFUND', 'Investor Refund'
+
+
+class EscrowLegStatus(models.TextChoices):
+    """Escrow leg status choices"""
+    PENDING = 'PENDING', 'Pending'
+    SUBMITTED = 'SUBMITTED', 'Submitted'
+    FAILED = 'FAILED', 'Failed'
+
+
+class EscrowReleaseLeg(models.Model):
+    """
+    One investment's share of a batched escrow release or refund.
+    Legs of a batch are packed into as few transfer transactions as
+    possible; `tx_hash` records the transaction that carried this leg.
+    """
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    batch_id = models.UUIDField(db_index=True)
+    kind = models.CharField(max_length=20, choices=EscrowLegKind.choices)
+    
+    investment = models.ForeignKey(
+        Investment,
+        on_delete=models.CASCADE,
+        related_name='escrow_legs'
+    )
+    milestone = models.ForeignKey(
+        Milestone,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='escrow_legs'
+    )
+    
+    recipient_account = models.CharField(max_length=50)
+    amount = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        help_text="Leg amount in HBAR"
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=EscrowLegStatus.choices,
+        default=EscrowLegStatus.PENDING
+    )
+    tx_hash = models.CharField(
+        max_length=100,
+        blank=True,
+        null=True,
+        help_text="Hedera transaction that carried this leg"
+    )
+    
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'escrow_release_legs'
+        verbose_name = 'Escrow Release Leg'
+        verbose_name_plural = 'Escrow Release Legs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['milestone', 'status']),
+            models.Index(fields=['investment', 'kind']),
+            models.Index(fields=['tx_hash']),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} {self.amount} HBAR -> {self.recipient_account} ({self.status})"
+
+
+class LedgerEntryType(models.TextChoices):
+    """Escrow ledger entry type choices"""
+    DEPOSIT = 'DEPOSIT', 'Deposit'
+    RELEASE = 'RELEASE', 'Milestone Release'
+    REFUND = 'REFUND', 'Refund'
+
+
+class LedgerAccount(models.TextChoices):
+    """Escrow ledger account choices"""
+    ESCROW = 'ESCROW', 'Escrow Account (asset)'
+    FUNDING_REQUEST = 'FUNDING_REQUEST', 'Funding Request (liability)'
+
+
+class EscrowLedgerEntry(models.Model):
+    """
+    Append-only double-entry record of funds moving through escrow.
+    Every posting is a pair of entries that sum to zero: the escrow asset
+    side and the funding request liability side (tagged with the investor).
+    """
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    posting_id = models.UUIDField(db_index=True)
+    entry_type = models.CharField(max_length=20, choices=LedgerEntryType.choices)
+    account = models.CharField(max_length=20, choices=LedgerAccount.choices)
+    amount = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        help_text="Signed amount in HBAR: debits positive, credits negative"
+    )
+    
+    funding_request = models.ForeignKey(
+        FundingRequest,
+        on_delete=models.PROTECT,
+        related_name='ledger_entries'
+    )
+    investor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT,
+        related_name='ledger_entries'
+    )
+    investment = models.ForeignKey(
+        Investment,
+        on_delete=models.PROTECT,
+        related_name='ledger_entries'
+    )
+    milestone = models.ForeignKey(
+        Milestone,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='ledger_entries'
+    )
+    tx_hash = models.CharField(max_length=100, blank=True, null=True)
+    
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'escrow_ledger_entries'
+        verbose_name = 'Escrow Ledger Entry'
+        verbose_name_plural = 'Escrow Ledger Entries'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['funding_request', 'created_at']),
+            models.Index(fields=['investor', 'created_at']),
+            models.Index(fields=['investment', 'entry_type']),
+        ]
+    
+    def __str__(self):
+        return f"{self.entry_type} {self.account} {self.amount} HBAR"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Escrow ledger entries are append-only")
+        super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        raise ValueError("Escrow ledger entries are append-only")
+
+
+class BalanceScope(models.TextChoices):
+    """Escrow balance scope choices"""
+    ESCROW = 'ESCROW', 'Escrow Total'
+    FUNDING_REQUEST = 'FUNDING_REQUEST', 'Funding Request'
+    INVESTOR = 'INVESTOR', 'Investor'
+
+
+class EscrowBalance(models.Model):
+    """
+    Running balance of funds held in escrow, maintained alongside every
+    ledger posting so balance and solvency checks are single-row reads.
+    """
+    
+    key = models.CharField(
+        max_length=100,
+        unique=True,
+        help_text="ESCROW, FR:<funding request id> or INV:<investor id>"
+    )
+    scope = models.CharField(max_length=20, choices=BalanceScope.choices)
+    funding_request = models.OneToOneField(
+        FundingRequest,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='escrow_balance'
+    )
+    investor = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='escrow_balance'
+    )
+    amount = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    
+    # Last reconciliation against the on-chain escrow account (ESCROW row only)
+    onchain_amount = models.DecimalField(max_digits=18, decimal_places=2, null=True, blank=True)
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'escrow_balances'
+        verbose_name = 'Escrow Balance'
+        verbose_name_plural = 'Escrow Balances'
+    
+    def __str__(self):
+        return f"{self.key}: {self.amount} HBAR"
 
 
 class AuditLog(models.Model):
@@ -165,6 +399,12 @@ class AuditLog(models.Model):
         null=True,
         help_text="Hedera transaction hash (if applicable)"
     )
+    topic_id = models.CharField(
+        max_length=100,
+        blank=True,
+        null=True,
+        help_text="HCS topic the event is anchored to (platform topic if empty)"
+    )
     
     # User tracking
     user = models.ForeignKey(
@@ -175,6 +415,22 @@ class AuditLog(models.Model):
         related_name='audit_logs'
     )
     
+    # Merkle anchoring (batched HCS mode)
+    anchor_batch = models.ForeignKey(
+        'blockchain.HCSAnchorBatch',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='audit_logs'
+    )
+    merkle_leaf_hash = models.CharField(max_length=64, blank=True, null=True)
+    merkle_leaf_index = models.PositiveIntegerField(null=True, blank=True)
+    merkle_path = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Sibling hashes from leaf to root: [{hash, position}]"
+    )
+    
     # Timestamp
     created_at = models.DateTimeField(default=timezone.now, db_index=True)
     
@@ -187,6 +443,7 @@ class AuditLog(models.Model):
             models.Index(fields=['event_type', 'created_at']),
             models.Index(fields=['hcs_message_id']),
             models.Index(fields=['transaction_hash']),
+            models.Index(fields=['anchor_batch', 'created_at']),
         ]
     
     def __str__(self):
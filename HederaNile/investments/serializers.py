@@ -2,9 +2,10 @@
 Django REST Framework serializers for investments app.
 """
 from rest_framework import serializers
-from .models import Investment, AuditLog
+from .models import Investment, AuditLog, EscrowReleaseLeg
 from funding.serializers import FundingRequestListSerializer
 from accounts.serializers import UserPublicSerializer
+from blockchain.models import EscrowJob
 from decimal import Decimal
 
 
@@ -113,8 +114,22 @@ class AuditLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = AuditLog
         fields = ['id', 'event_type', 'user', 'payload', 'hcs_message_id',
-                 'transaction_hash', 'created_at']
-        read_only_fields = ['id', 'created_at']
+                 'transaction_hash', 'topic_id', 'anchor_batch', 'merkle_leaf_index', 'created_at']
+        read_only_fields = ['id', 'anchor_batch', 'merkle_leaf_index', 'created_at']
+
+
+class InclusionProofSerializer(serializers.Serializer):
+    """Serializer for Merkle inclusion proofs of anchored audit events."""
+    audit_log_id = serializers.UUIDField()
+    leaf_hash = serializers.CharField()
+    leaf_index = serializers.IntegerField()
+    path = serializers.ListField(child=serializers.DictField())
+    merkle_root = serializers.CharField()
+    leaf_count = serializers.IntegerField()
+    batch_id = serializers.UUIDField()
+    topic_id = serializers.CharField(allow_null=True)
+    hcs_message_id = serializers.CharField(allow_null=True)
+    verified = serializers.BooleanField()
 
 
 class AuditLogCreateSerializer(serializers.ModelSerializer):
@@ -188,6 +203,9 @@ class BlockchainStatusSerializer(serializers.Serializer):
     hedera_network_status = serializers.CharField()
     mirror_node_status = serializers.CharField()
     escrow_account_balance = serializers.DecimalField(max_digits=15, decimal_places=2)
+    escrow_onchain_balance = serializers.DecimalField(max_digits=15, decimal_places=2, allow_null=True)
+    escrow_solvent = serializers.BooleanField(allow_null=True)
+    escrow_reconciled_at = serializers.DateTimeField(allow_null=True)
     hcs_topic_count = serializers.IntegerField()
     recent_transactions = serializers.ListField(child=serializers.DictField())
     ipfs_status = serializers.CharField()
@@ -227,6 +245,49 @@ class EscrowReleaseSerializer(serializers.Serializer):
         return value
 
 
+class BatchReleaseSerializer(serializers.Serializer):
+    """Serializer for releasing a milestone across all its investments."""
+    milestone_id = serializers.UUIDField()
+    recipient_account = serializers.CharField(max_length=50)
+    admin_notes = serializers.CharField(max_length=1000, required=False)
+    
+    def validate_recipient_account(self, value):
+        """Validate Hedera account ID format."""
+        if not value.startswith('0.0.'):
+            raise serializers.ValidationError("Invalid Hedera account ID format")
+        return value
+
+
+class BatchRefundSerializer(serializers.Serializer):
+    """Serializer for refunding every deposit in a funding request."""
+    funding_request_id = serializers.UUIDField()
+    reason = serializers.CharField(max_length=1000)
+
+
+class EscrowReleaseLegSerializer(serializers.ModelSerializer):
+    """Serializer for batched escrow legs."""
+    
+    class Meta:
+        model = EscrowReleaseLeg
+        fields = [
+            'id', 'batch_id', 'kind', 'investment', 'milestone',
+            'recipient_account', 'amount', 'status', 'tx_hash', 'created_at'
+        ]
+        read_only_fields = fields
+
+
+class EscrowJobSerializer(serializers.ModelSerializer):
+    """Serializer for queued escrow deposit and release jobs."""
+    
+    class Meta:
+        model = EscrowJob
+        fields = [
+            'id', 'job_type', 'status', 'investment', 'milestone',
+            'tx_hash', 'last_error', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+
 class WalletConnectSerializer(serializers.Serializer):
     """Serializer for wallet connection verification."""
     wallet_type = serializers.ChoiceField(choices=['HashPack', 'Blade'])
@@ -1,3 +1,151 @@
+from decimal import Decimal
+from unittest import mock
+
 from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import User
+from SME.models import Startup
+from fund.models import FundingRequest, Milestone
+from blockchain.services.escrow_service import escrow_service
+from blockchain.services.topic_pool import topic_pool_service
+from .models import Investment, EscrowReleaseLeg, EscrowLegKind, EscrowLegStatus
+from .views import InvestmentViewSet
+
+
+class BatchedEscrowTests(TestCase):
+    """Batched milestone releases and refunds"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user('0.0.100', role='ADMIN')
+        owner = User.objects.create_user('0.0.1001', role='STARTUP')
+        startup = Startup.objects.create(
+            owner=owner, name='Acme', sector='Agriculture', country='Egypt', description='Acme'
+        )
+        self.funding_request = FundingRequest.objects.create(
+            startup=startup,
+            title='Irrigation',
+            description='Irrigation',
+            total_amount=Decimal('1000.00'),
+            hedera_hcs_topic_id='0.0.5005'
+        )
+        self.milestone = Milestone.objects.create(
+            funding_request=self.funding_request,
+            title='Pumps',
+            description='Pumps',
+            target_amount=Decimal('500.00'),
+            percentage_of_request=50,
+            status='VERIFIED'
+        )
+        self.investments = [
+            Investment.objects.create(
+                funding_request=self.funding_request,
+                lender=User.objects.create_user(f'0.0.200{i}', role='LENDER'),
+                amount=Decimal('100.00'),
+                status='DEPOSITED'
+            )
+            for i in range(2)
+        ]
+
+    def post(self, action, data):
+        view = InvestmentViewSet.as_view({'post': action})
+        request = APIRequestFactory().post(f'/api/investments/{action}/', data, format='json')
+        force_authenticate(request, user=self.admin)
+        return view(request)
+
+    def release(self):
+        return self.post('release_milestone', {
+            'milestone_id': str(self.milestone.id),
+            'recipient_account': '0.0.1001'
+        })
+
+    def test_partial_release_retries_only_failed_legs(self):
+        with mock.patch.object(escrow_service, 'batch_release', return_value=['0.0.9@1.1', None]):
+            response = self.release()
+        self.assertEqual(response.data['failed_legs'], 1)
+        self.milestone.refresh_from_db()
+        self.assertEqual(self.milestone.status, 'VERIFIED')
+
+        with mock.patch.object(
+            escrow_service, 'batch_release', return_value=['0.0.9@2.2']
+        ) as transfer:
+            response = self.release()
+        self.assertEqual(len(transfer.call_args[0][0]), 1)
+        self.assertEqual(response.data['failed_legs'], 0)
+        self.milestone.refresh_from_db()
+        self.assertEqual(self.milestone.status, 'RELEASED')
+
+    def test_pending_legs_are_not_paid_again(self):
+        EscrowReleaseLeg.objects.create(
+            batch_id=self.milestone.id,
+            kind=EscrowLegKind.RELEASE,
+            investment=self.investments[0],
+            milestone=self.milestone,
+            recipient_account='0.0.1001',
+            amount=Decimal('50.00'),
+            status=EscrowLegStatus.PENDING
+        )
+        with mock.patch.object(
+            escrow_service, 'batch_release', return_value=['0.0.9@1.1']
+        ) as transfer:
+            self.release()
+        self.assertEqual(transfer.call_args[0][0], [('0.0.1001', Decimal('50.00'))])
+
+    def test_release_survives_hcs_failure(self):
+        with mock.patch.object(escrow_service, 'batch_release', return_value=['0.0.9@1.1'] * 2), \
+                mock.patch.object(topic_pool_service, 'enqueue_event', side_effect=RuntimeError('down')):
+            response = self.release()
+        self.assertEqual(response.status_code, 200)
+        self.milestone.refresh_from_db()
+        self.assertEqual(self.milestone.status, 'RELEASED')
+
+    def test_refund_replay_skips_refunded_investments(self):
+        data = {'funding_request_id': str(self.funding_request.id), 'reason': 'Cancelled'}
+        with mock.patch.object(escrow_service, 'batch_release', return_value=['0.0.9@1.1', None]):
+            self.post('batch_refund', data)
+
+        with mock.patch.object(
+            escrow_service, 'batch_release', return_value=['0.0.9@2.2']
+        ) as transfer:
+            response = self.post('batch_refund', data)
+        self.assertEqual(len(transfer.call_args[0][0]), 1)
+        self.assertEqual(response.data['failed_legs'], 0)
+        self.assertFalse(
+            Investment.objects.filter(funding_request=self.funding_request, status='DEPOSITED').exists()
+        )
+
+    def test_refund_returns_only_unreleased_amount(self):
+        self.milestone.percentage_of_request = 50
+        self.milestone.save(update_fields=['percentage_of_request'])
+        with mock.patch.object(escrow_service, 'batch_release', return_value=['0.0.9@1.1'] * 2):
+            self.release()
+
+        data = {'funding_request_id': str(self.funding_request.id), 'reason': 'Cancelled'}
+        with mock.patch.object(
+            escrow_service, 'batch_release', return_value=['0.0.9@2.2'] * 2
+        ) as transfer:
+            response = self.post('batch_refund', data)
+
+        self.assertEqual(
+            [amount for _, amount in transfer.call_args[0][0]],
+            [Decimal('50.00'), Decimal('50.00')]
+        )
+        self.assertEqual(response.data['total_amount'], Decimal('100.00'))
+
+    def test_refund_skips_release_in_flight(self):
+        EscrowReleaseLeg.objects.create(
+            batch_id=self.milestone.id,
+            kind=EscrowLegKind.RELEASE,
+            investment=self.investments[0],
+            milestone=self.milestone,
+            recipient_account='0.0.1001',
+            amount=Decimal('50.00'),
+            status=EscrowLegStatus.PENDING
+        )
+        data = {'funding_request_id': str(self.funding_request.id), 'reason': 'Cancelled'}
+        with mock.patch.object(
+            escrow_service, 'batch_release', return_value=['0.0.9@1.1']
+        ) as transfer:
+            self.post('batch_refund', data)
 
-# Create your tests here.
+        self.assertEqual(len(transfer.call_args[0][0]), 1)
@@ -4,7 +4,8 @@ URL configuration for investments app.
 from django.urls import path
 from .views import (
     LenderDashboardAPIView, StartupDashboardAPIView, AdminDashboardAPIView,
-    BlockchainStatusAPIView, WalletConnectAPIView, HealthCheckAPIView
+    BlockchainStatusAPIView, WalletConnectAPIView, HealthCheckAPIView,
+    EscrowJobStatusAPIView
 )
 
 app_name = 'investments'
@@ -18,6 +19,7 @@ urlpatterns = [
     # Blockchain integration
     path('blockchain-status/', BlockchainStatusAPIView.as_view(), name='blockchain-status'),
     path('wallet-connect/', WalletConnectAPIView.as_view(), name='wallet-connect'),
+    path('escrow-jobs/<uuid:pk>/', EscrowJobStatusAPIView.as_view(), name='escrow-job-status'),
     
     # Health check
     path('health/', HealthCheckAPIView.as_view(), name='health-check'),
@@ -25,7 +27,10 @@ urlpatterns = [
 
 # Note: CRUD operations for investments are handled by the router in main urls.py
 # Additional endpoints:
-# - POST /api/investments/{id}/deposit_funds_blockchain/
-# - POST /api/investments/{id}/release_funds/ (admin)
+# - POST /api/investments/{id}/deposit_funds_blockchain/ (202, escrow job)
+# - POST /api/investments/{id}/release_funds/ (admin, 202, escrow job)
+# - POST /api/investments/release_milestone/ (admin, batched)
+# - POST /api/investments/batch_refund/ (admin, batched)
 # - POST /api/investments/{id}/request_refund/
-# - GET /api/investments/my_investments/ (lender)
\ No newline at end of file
+# - GET /api/investments/my_investments/ (lender)
+# - GET /api/audit-logs/{id}/inclusion_proof/ (admin)
\ No newline at end of file
@@ -7,11 +7,13 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Q, Count, Sum, Avg
 from datetime import timedelta
 from decimal import Decimal
+import uuid
 
-from .models import Investment, AuditLog
+from .models import Investment, AuditLog, EscrowReleaseLeg, EscrowLegKind, EscrowLegStatus
 from .serializers import (
     InvestmentCreateSerializer, InvestmentDetailSerializer,
     InvestmentListSerializer, InvestmentStatusSerializer,
@@ -19,13 +21,18 @@ from .serializers import (
     InvestmentStatsSerializer, LenderDashboardSerializer,
     StartupDashboardSerializer, AdminDashboardSerializer,
     BlockchainStatusSerializer, RefundRequestSerializer,
-    EscrowReleaseSerializer, WalletConnectSerializer
+    EscrowReleaseSerializer, WalletConnectSerializer, InclusionProofSerializer,
+    BatchReleaseSerializer, BatchRefundSerializer, EscrowJobSerializer
 )
 from accounts.permissions import (
     IsAdminUser, IsLenderOrAdmin, IsOwnerOrAdmin, IsOwnerOrAdminOrReadOnly
 )
-from blockchain.services.hcs_service import log_event_to_hcs
-from blockchain.services.escrow_service import deposit_funds, release_funds, get_escrow_balance
+from blockchain.services.topic_pool import topic_pool_service
+from blockchain.services.hcs_anchor import hcs_anchor_service
+from blockchain.services.escrow_ledger import escrow_ledger
+from blockchain.services.escrow_jobs import enqueue_escrow_job
+from blockchain.models import EscrowJob, EscrowJobType
+from blockchain.services.escrow_service import escrow_service
 from blockchain.services.mirror_node_service import get_transaction, get_account_balance
 
 
@@ -80,27 +87,8 @@ class InvestmentViewSet(viewsets.ModelViewSet):
         
         funding_request.save(update_fields=['current_amount', 'status'])
         
-        # Log investment to HCS
-        try:
-            if funding_request.hcs_topic_id:
-                hcs_message_id = log_event_to_hcs(
-                    topic_id=funding_request.hcs_topic_id,
-                    event_type='DEPOSIT',
-                    payload={
-                        'investment_id': str(investment.id),
-                        'lender_id': str(self.request.user.id),
-                        'amount': str(investment.amount),
-                        'funding_request_id': str(funding_request.id),
-                        'timestamp': timezone.now().isoformat()
-                    }
-                )
-                investment.hcs_deposit_message_id = hcs_message_id
-                investment.save(update_fields=['hcs_deposit_message_id'])
-        except Exception as e:
-            print(f"HCS logging failed: {e}")
-        
         # Log in audit trail
-        AuditLog.objects.create(
+        audit_log = AuditLog.objects.create(
             event_type='INVESTMENT_CREATED',
             user=self.request.user,
             payload={
@@ -109,10 +97,32 @@ class InvestmentViewSet(viewsets.ModelViewSet):
                 'amount': str(investment.amount)
             }
         )
+        
+        # Queue investment for HCS; the relay fills in hcs_deposit_message_id
+        try:
+            topic_pool_service.enqueue_event(
+                funding_request,
+                event_type='DEPOSIT',
+                payload={
+                    'investment_id': str(investment.id),
+                    'lender_id': str(self.request.user.id),
+                    'amount': str(investment.amount),
+                    'funding_request_id': str(funding_request.id),
+                    'timestamp': timezone.now().isoformat()
+                },
+                audit_log=audit_log,
+                target=investment,
+                target_field='hcs_deposit_message_id'
+            )
+        except Exception as e:
+            print(f"HCS logging failed: {e}")
     
     @action(detail=True, methods=['post'])
     def deposit_funds_blockchain(self, request, pk=None):
-        """Deposit funds to escrow account (simulates wallet transaction)."""
+        """
+        Queue a deposit to the escrow account (simulates wallet transaction).
+        Returns 202 with an escrow job; poll /api/investments/escrow-jobs/{id}/.
+        """
         investment = self.get_object()
         
         # Check permissions
@@ -129,37 +139,22 @@ class InvestmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        try:
-            # Simulate deposit to custodial escrow
-            tx_hash = deposit_funds(
-                amount=investment.amount,
-                metadata={
-                    'investment_id': str(investment.id),
-                    'lender_account': investment.lender.hedera_account_id,
-                    'funding_request_id': str(investment.funding_request.id)
-                }
-            )
-            
-            # Update investment
-            investment.status = 'DEPOSITED'
-            investment.deposit_tx_hash = tx_hash
-            investment.save(update_fields=['status', 'deposit_tx_hash'])
-            
-            return Response({
-                'message': 'Funds deposited successfully',
-                'transaction_hash': tx_hash,
-                'investment': InvestmentDetailSerializer(investment).data
-            })
-            
-        except Exception as e:
-            return Response(
-                {'error': f'Deposit failed: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        # Queue the deposit; the escrow job worker executes the transfer
+        job, created = enqueue_escrow_job(
+            EscrowJobType.DEPOSIT,
+            investment,
+            user=request.user,
+            client_key=request.headers.get('Idempotency-Key')
+        )
+        
+        return _escrow_job_response(job, created)
     
     @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
     def release_funds(self, request, pk=None):
-        """Release funds to startup (admin only, after milestone verification)."""
+        """
+        Queue a release to the startup (admin only, after milestone verification).
+        Returns 202 with an escrow job; poll /api/investments/escrow-jobs/{id}/.
+        """
         investment = self.get_object()
         serializer = EscrowReleaseSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -170,7 +165,7 @@ class InvestmentViewSet(viewsets.ModelViewSet):
         admin_notes = serializer.validated_data.get('admin_notes', '')
         
         # Verify milestone exists and is verified
-        from funding.models import Milestone
+        from fund.models import Milestone
         try:
             milestone = Milestone.objects.get(
                 id=milestone_id,
@@ -183,54 +178,222 @@ class InvestmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        try:
-            # Release funds from escrow
-            tx_hash = release_funds(
-                to_account=recipient_account,
-                amount=release_amount
-            )
-            
-            # Update milestone
-            milestone.status = 'RELEASED'
-            milestone.release_tx_hash = tx_hash
-            milestone.save(update_fields=['status', 'release_tx_hash'])
+        # Queue the release; the escrow job worker executes the transfer
+        job, created = enqueue_escrow_job(
+            EscrowJobType.RELEASE,
+            investment,
+            params={
+                'release_amount': str(release_amount),
+                'recipient_account': recipient_account,
+                'admin_notes': admin_notes
+            },
+            milestone=milestone,
+            user=request.user,
+            client_key=request.headers.get('Idempotency-Key')
+        )
+        
+        return _escrow_job_response(job, created)
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def release_milestone(self, request):
+        """
+        Release a verified milestone's share of every deposit (admin only).
+        Each investment gets its own leg, but the legs are packed into as
+        few escrow transfers as possible. Legs are recorded before the
+        transfer and an investment with a pending or submitted leg is never
+        paid again, so a partially failed release can simply be repeated.
+        The funding request row is locked while legs are recorded, so
+        releases and refunds of the same request never overlap.
+        """
+        serializer = BatchReleaseSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        milestone_id = serializer.validated_data['milestone_id']
+        recipient_account = serializer.validated_data['recipient_account']
+        
+        from fund.models import FundingRequest, Milestone
+        batch_id = uuid.uuid4()
+        with transaction.atomic():
+            funding_request_id = Milestone.objects.filter(
+                id=milestone_id
+            ).values_list('funding_request_id', flat=True).first()
+            try:
+                _lock_funding_request(funding_request_id)
+                milestone = Milestone.objects.select_for_update().select_related(
+                    'funding_request'
+                ).get(
+                    id=milestone_id,
+                    status='VERIFIED'
+                )
+            except (FundingRequest.DoesNotExist, Milestone.DoesNotExist):
+                return Response(
+                    {'error': 'Milestone not found or not verified'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             
-            # Update investment if fully released
-            if release_amount >= investment.amount:
-                investment.status = 'COMPLETED'
-                investment.save(update_fields=['status'])
+            investments = Investment.objects.filter(
+                funding_request=milestone.funding_request,
+                status='DEPOSITED'
+            ).exclude(
+                pk__in=_claimed_leg_investments(EscrowLegKind.RELEASE, milestone=milestone)
+            ).exclude(
+                pk__in=_claimed_leg_investments(EscrowLegKind.REFUND)
+            )
+            share = Decimal(milestone.percentage_of_request) / 100
+            legs = EscrowReleaseLeg.objects.bulk_create([
+                EscrowReleaseLeg(
+                    batch_id=batch_id,
+                    kind=EscrowLegKind.RELEASE,
+                    investment=investment,
+                    milestone=milestone,
+                    recipient_account=recipient_account,
+                    amount=(investment.amount * share).quantize(Decimal('0.01'))
+                )
+                for investment in investments
+            ])
+        if not legs:
+            return Response(
+                {'error': 'No unreleased deposits for this milestone'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        _execute_escrow_legs(legs, f"NileFi milestone {milestone.id}")
+        submitted = [leg for leg in legs if leg.status == EscrowLegStatus.SUBMITTED]
+        tx_hashes = sorted({leg.tx_hash for leg in submitted})
+        
+        with transaction.atomic():
+            for leg in submitted:
+                escrow_ledger.record_release(leg.investment, leg.amount, milestone, leg.tx_hash)
             
-            # Log to HCS
-            if investment.funding_request.hcs_topic_id:
-                log_event_to_hcs(
-                    topic_id=investment.funding_request.hcs_topic_id,
+            outstanding = Investment.objects.filter(
+                funding_request=milestone.funding_request,
+                status='DEPOSITED'
+            ).exclude(
+                pk__in=EscrowReleaseLeg.objects.filter(
+                    kind=EscrowLegKind.RELEASE,
+                    milestone=milestone,
+                    status=EscrowLegStatus.SUBMITTED
+                ).values('investment_id')
+            )
+            if submitted and not outstanding.exists():
+                milestone.status = 'RELEASED'
+                milestone.release_tx_hash = tx_hashes[0]
+                milestone.save(update_fields=['status', 'release_tx_hash'])
+        
+        # Queue for HCS; the transfers have already been recorded
+        try:
+            if submitted:
+                topic_pool_service.enqueue_event(
+                    milestone.funding_request,
                     event_type='RELEASE_FUNDS',
                     payload={
-                        'milestone_id': str(milestone_id),
-                        'investment_id': str(investment.id),
-                        'release_amount': str(release_amount),
+                        'milestone_id': str(milestone.id),
+                        'batch_id': str(batch_id),
+                        'release_amount': str(sum(leg.amount for leg in submitted)),
                         'recipient_account': recipient_account,
-                        'tx_hash': tx_hash,
+                        'leg_count': len(submitted),
+                        'tx_hashes': tx_hashes,
                         'admin_id': str(request.user.id),
                         'timestamp': timezone.now().isoformat()
                     }
                 )
-            
-            return Response({
-                'message': 'Funds released successfully',
-                'transaction_hash': tx_hash,
-                'milestone': {
-                    'id': milestone.id,
-                    'status': milestone.status,
-                    'release_tx_hash': tx_hash
-                }
-            })
-            
         except Exception as e:
+            print(f"HCS logging failed: {e}")
+        
+        return _escrow_batch_response(batch_id, legs, submitted, tx_hashes)
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def batch_refund(self, request):
+        """
+        Refund every deposit in a funding request in batched transfers (admin only).
+        As with milestone releases, an investment with a pending or
+        submitted refund leg is skipped, so repeating the call only retries
+        failed legs. Each lender gets back what has not already been
+        released; investments with a release in flight are skipped.
+        """
+        serializer = BatchRefundSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        funding_request_id = serializer.validated_data['funding_request_id']
+        reason = serializer.validated_data['reason']
+        
+        from fund.models import FundingRequest
+        batch_id = uuid.uuid4()
+        with transaction.atomic():
+            try:
+                _lock_funding_request(funding_request_id)
+            except FundingRequest.DoesNotExist:
+                return Response(
+                    {'error': 'Funding request not found'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            investments = Investment.objects.filter(
+                funding_request_id=funding_request_id,
+                status='DEPOSITED',
+                lender__hedera_account_id__isnull=False
+            ).exclude(
+                pk__in=_claimed_leg_investments(EscrowLegKind.REFUND)
+            ).exclude(
+                pk__in=EscrowReleaseLeg.objects.filter(
+                    kind=EscrowLegKind.RELEASE,
+                    status=EscrowLegStatus.PENDING
+                ).values('investment_id')
+            ).annotate(
+                released=Sum(
+                    'escrow_legs__amount',
+                    filter=Q(
+                        escrow_legs__kind=EscrowLegKind.RELEASE,
+                        escrow_legs__status=EscrowLegStatus.SUBMITTED
+                    ),
+                    default=Decimal('0')
+                )
+            ).select_related('lender', 'funding_request')
+            legs = EscrowReleaseLeg.objects.bulk_create([
+                EscrowReleaseLeg(
+                    batch_id=batch_id,
+                    kind=EscrowLegKind.REFUND,
+                    investment=investment,
+                    recipient_account=investment.lender.hedera_account_id,
+                    amount=investment.amount - investment.released
+                )
+                for investment in investments
+                if investment.amount > investment.released
+            ])
+        if not legs:
             return Response(
-                {'error': f'Fund release failed: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'error': 'No unrefunded deposits in this funding request'},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        
+        _execute_escrow_legs(legs, "NileFi refund")
+        submitted = [leg for leg in legs if leg.status == EscrowLegStatus.SUBMITTED]
+        tx_hashes = sorted({leg.tx_hash for leg in submitted})
+        for leg in submitted:
+            leg.investment.refund(leg.tx_hash, leg.amount)
+        
+        # Queue for HCS; the transfers have already been recorded
+        funding_request = legs[0].investment.funding_request
+        try:
+            if submitted:
+                topic_pool_service.enqueue_event(
+                    funding_request,
+                    event_type='REFUND',
+                    payload={
+                        'funding_request_id': str(funding_request_id),
+                        'batch_id': str(batch_id),
+                        'refund_amount': str(sum(leg.amount for leg in submitted)),
+                        'leg_count': len(submitted),
+                        'tx_hashes': tx_hashes,
+                        'reason': reason,
+                        'admin_id': str(request.user.id),
+                        'timestamp': timezone.now().isoformat()
+                    }
+                )
+        except Exception as e:
+            print(f"HCS logging failed: {e}")
+        
+        return _escrow_batch_response(batch_id, legs, submitted, tx_hashes)
     
     @action(detail=True, methods=['post'])
     def request_refund(self, request, pk=None):
@@ -281,6 +444,60 @@ class InvestmentViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
+def _escrow_job_response(job, created):
+    """202 for a newly queued job; a repeated idempotency key returns the original job"""
+    return Response(
+        EscrowJobSerializer(job).data,
+        status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK
+    )
+
+
+def _lock_funding_request(funding_request_id):
+    """Lock a funding request row for the rest of the transaction"""
+    from fund.models import FundingRequest
+    return FundingRequest.objects.select_for_update().get(pk=funding_request_id)
+
+
+def _claimed_leg_investments(kind, milestone=None):
+    """Investments with a pending or submitted leg of `kind`, which must not be paid again"""
+    legs = EscrowReleaseLeg.objects.filter(
+        kind=kind,
+        status__in=[EscrowLegStatus.PENDING, EscrowLegStatus.SUBMITTED]
+    )
+    if milestone is not None:
+        legs = legs.filter(milestone=milestone)
+    return legs.values('investment_id')
+
+
+def _execute_escrow_legs(legs, memo):
+    """Submit escrow legs in batched transfers and record each leg's transaction"""
+    tx_hashes = escrow_service.batch_release(
+        [(leg.recipient_account, leg.amount) for leg in legs],
+        memo
+    )
+    for leg, tx_hash in zip(legs, tx_hashes):
+        leg.tx_hash = tx_hash
+        leg.status = EscrowLegStatus.SUBMITTED if tx_hash else EscrowLegStatus.FAILED
+    EscrowReleaseLeg.objects.bulk_update(legs, ['tx_hash', 'status'])
+
+
+def _escrow_batch_response(batch_id, legs, submitted, tx_hashes):
+    """Summary response for a batched release or refund"""
+    if not submitted:
+        return Response(
+            {'error': 'Escrow transfers failed', 'batch_id': batch_id},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    
+    return Response({
+        'message': f'{len(submitted)} of {len(legs)} legs submitted',
+        'batch_id': batch_id,
+        'transaction_hashes': tx_hashes,
+        'failed_legs': len(legs) - len(submitted),
+        'total_amount': sum(leg.amount for leg in submitted)
+    })
+
+
 class LenderDashboardAPIView(generics.RetrieveAPIView):
     """
     Lender dashboard data.
@@ -510,14 +727,18 @@ class BlockchainStatusAPIView(generics.RetrieveAPIView):
     def get(self, request, *args, **kwargs):
         """Get blockchain status."""
         try:
-            # Get escrow account balance
-            escrow_balance = get_escrow_balance()
+            # Escrow balance from the local ledger; the chain is only read
+            # by the reconcile_escrow_ledger job
+            solvency = escrow_ledger.solvency()
             
             # TODO: Implement actual status checks
             status_data = {
                 'hedera_network_status': 'online',
                 'mirror_node_status': 'online',
-                'escrow_account_balance': escrow_balance,
+                'escrow_account_balance': solvency['ledger_balance'],
+                'escrow_onchain_balance': solvency['onchain_balance'],
+                'escrow_solvent': solvency['solvent'],
+                'escrow_reconciled_at': solvency['reconciled_at'],
                 'hcs_topic_count': 0,  # TODO: Count HCS topics
                 'recent_transactions': [],  # TODO: Get recent transactions
                 'ipfs_status': 'online',
@@ -537,6 +758,21 @@ class BlockchainStatusAPIView(generics.RetrieveAPIView):
             )
 
 
+class EscrowJobStatusAPIView(generics.RetrieveAPIView):
+    """
+    Status of a queued escrow deposit or release.
+    GET /api/investments/escrow-jobs/{id}/
+    """
+    serializer_class = EscrowJobSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        """Requesters see their own jobs; admins see all."""
+        if self.request.user.role == 'ADMIN':
+            return EscrowJob.objects.all()
+        return EscrowJob.objects.filter(requested_by=self.request.user)
+
+
 class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for audit log (read-only).
@@ -550,6 +786,20 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         """Get audit log entries."""
         return AuditLog.objects.all()
+    
+    @action(detail=True, methods=['get'])
+    def inclusion_proof(self, request, pk=None):
+        """Get the Merkle inclusion proof anchoring this event to HCS."""
+        audit_log = self.get_object()
+        proof = hcs_anchor_service.get_inclusion_proof(audit_log)
+        
+        if proof is None:
+            return Response(
+                {'error': 'Audit event has not been anchored yet'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        return Response(InclusionProofSerializer(proof).data)
 
 
 class WalletConnectAPIView(generics.CreateAPIView):
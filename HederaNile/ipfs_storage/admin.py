@@ -1,3 +1,53 @@
+"""
+Django admin configuration for ipfs_storage app.
+"""
+
 from django.contrib import admin
+from django.utils import timezone
+from .models import PinnedContent, StoredDocument
+
+
+@admin.register(PinnedContent)
+class PinnedContentAdmin(admin.ModelAdmin):
+    """Admin interface for PinnedContent model"""
+    
+    list_display = ['cid', 'filename', 'size', 'upload_count', 'pinned_at', 'last_uploaded_at']
+    search_fields = ['cid', 'sha256', 'filename']
+    ordering = ['-last_uploaded_at']
+    readonly_fields = ['cid', 'size', 'pinned_at', 'last_uploaded_at']
+
 
-# Register your models here.
+@admin.register(StoredDocument)
+class StoredDocumentAdmin(admin.ModelAdmin):
+    """Admin interface for StoredDocument model"""
+    
+    list_display = ['filename', 'startup', 'document_type', 'status', 'attempts', 'cid', 'created_at']
+    list_filter = ['status', 'document_type', 'created_at']
+    search_fields = ['filename', 'cid', 'startup__name']
+    ordering = ['-created_at']
+    readonly_fields = ['size', 'sha256', 'staged_path', 'created_at', 'claimed_at', 'uploaded_at']
+    
+    fieldsets = (
+        ('Document', {
+            'fields': ('startup', 'uploaded_by', 'filename', 'content_type', 'size',
+                       'document_type', 'description')
+        }),
+        ('Upload', {
+            'fields': ('status', 'cid', 'sha256', 'attempts', 'last_error',
+                       'next_attempt_at', 'staged_path')
+        }),
+        ('Timestamps', {
+            'fields': ('created_at', 'claimed_at', 'uploaded_at'),
+            'classes': ('collapse',)
+        }),
+    )
+    
+    actions = ['requeue_documents']
+    
+    def requeue_documents(self, request, queryset):
+        """Requeue failed uploads whose staged file is still on disk"""
+        count = queryset.filter(status='FAILED').exclude(staged_path='').update(
+            status='PENDING', attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f"{count} documents requeued.")
+    requeue_documents.short_description = "Requeue failed uploads"
@@ -0,0 +1,39 @@
+"""
+Upload staged documents to IPFS.
+
+Usage:
+    python manage.py process_document_uploads            # run continuously
+    python manage.py process_document_uploads --once     # process one batch and exit
+"""
+
+import time
+from django.core.management.base import BaseCommand
+
+from ipfs_storage.services.upload_queue import DocumentUploadWorker
+
+
+class Command(BaseCommand):
+    help = "Upload staged documents to IPFS with a pool of workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=20,
+                            help='Maximum documents claimed per batch')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Concurrent uploads (default: IPFS_UPLOAD_WORKERS)')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds to sleep when no uploads are due')
+        parser.add_argument('--once', action='store_true',
+                            help='Process a single batch and exit')
+
+    def handle(self, *args, **options):
+        worker = DocumentUploadWorker(workers=options['workers'])
+
+        while True:
+            processed = worker.run_batch(options['batch_size'])
+            if processed:
+                self.stdout.write(f"Processed {processed} document upload(s)")
+
+            if options['once']:
+                break
+            if not processed:
+                time.sleep(options['interval'])
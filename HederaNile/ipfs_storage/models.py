@@ -1 +1,116 @@
+"""
+IPFS storage models for NileFi - pinned content index and upload queue.
+"""
+
+import uuid
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+
+class DocumentStatus(models.TextChoices):
+    """Stored document upload status choices"""
+    PENDING = 'PENDING', 'Staged for Upload'
+    PROCESSING = 'PROCESSING', 'Uploading'
+    UPLOADED = 'UPLOADED', 'Pinned to IPFS'
+    FAILED = 'FAILED', 'Failed'
+
+
+class PinnedContent(models.Model):
+    """
+    Content known to be pinned, keyed by its CIDv1.
+    Uploads whose locally computed CID is already here skip the network
+    upload entirely.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    cid = models.CharField(max_length=100, unique=True, help_text="IPFS CIDv1 (base32)")
+    size = models.BigIntegerField(help_text="File size in bytes")
+    sha256 = models.CharField(max_length=64, blank=True, default='', db_index=True)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True, default='')
+
+    upload_count = models.PositiveIntegerField(
+        default=1,
+        help_text="Number of uploads that resolved to this content"
+    )
+    pinned_at = models.DateTimeField(default=timezone.now)
+    last_uploaded_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'pinned_content'
+        verbose_name = 'Pinned Content'
+        verbose_name_plural = 'Pinned Content'
+        ordering = ['-last_uploaded_at']
+
+    def __str__(self):
+        return f"{self.filename} ({self.cid})"
+
+
+class StoredDocument(models.Model):
+    """
+    Document staged to local disk and uploaded to IPFS in the background
+    (`manage.py process_document_uploads`), so upload requests return
+    without waiting on the pinning service. The CID is filled in once the
+    upload succeeds.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    startup = models.ForeignKey(
+        'SME.Startup',
+        on_delete=models.CASCADE,
+        related_name='stored_documents'
+    )
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='stored_documents'
+    )
+
+    # Document details
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True, default='')
+    size = models.BigIntegerField(help_text="File size in bytes")
+    document_type = models.CharField(max_length=100)
+    description = models.CharField(max_length=500, blank=True, default='')
+    staged_path = models.CharField(
+        max_length=500,
+        blank=True,
+        default='',
+        help_text="Local staging file; removed once pinned"
+    )
+
+    # Upload state
+    status = models.CharField(
+        max_length=20,
+        choices=DocumentStatus.choices,
+        default=DocumentStatus.PENDING
+    )
+    cid = models.CharField(max_length=100, blank=True, default='')
+    sha256 = models.CharField(max_length=64, blank=True, default='')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+
+    # Worker lease; PROCESSING rows whose lease has expired are requeued
+    claim_token = models.UUIDField(null=True, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    # Timestamps
+    created_at = models.DateTimeField(default=timezone.now)
+    uploaded_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'stored_documents'
+        verbose_name = 'Stored Document'
+        verbose_name_plural = 'Stored Documents'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['status', 'claimed_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} - {self.status}"
@@ -0,0 +1,18 @@
+"""
+Django REST Framework serializers for ipfs_storage app.
+"""
+from rest_framework import serializers
+from .models import StoredDocument
+
+
+class StoredDocumentSerializer(serializers.ModelSerializer):
+    """Serializer for documents queued for IPFS upload."""
+    
+    class Meta:
+        model = StoredDocument
+        fields = [
+            'id', 'startup', 'filename', 'size', 'document_type', 'description',
+            'status', 'cid', 'sha256', 'attempts', 'last_error',
+            'created_at', 'uploaded_at'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,287 @@
+"""
+IPFS storage backends for NileFi.
+Every backend pins a file and returns its CIDv1, unpins by CID and streams
+content back by CID, so the storage path behaves the same against Pinata,
+a self-hosted Kubo node or the local filesystem.
+
+The backend is chosen by IPFS_STORAGE_BACKEND: 'pinata', 'kubo', 'local'
+or a dotted path to a StorageBackend subclass. Without the setting,
+Pinata is used when credentials are configured and the local store
+otherwise.
+"""
+
+import json
+import os
+import tempfile
+import time
+from typing import Dict, Iterable, Iterator, Optional
+import requests
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.utils.module_loading import import_string
+
+from .cid import CIDBuilder
+from .multipart import DEFAULT_CHUNK_SIZE, StreamingMultipartEncoder, iter_file_chunks
+
+
+class IPFSUploadError(RuntimeError):
+    """Raised when the pinning service rejects or fails an upload"""
+
+
+class StorageBackend:
+    """
+    Interface for IPFS storage backends.
+    `pin` sends `chunks` when given (e.g. a tee'd UploadPipeline stream)
+    and otherwise reads `file`; `file` always supplies the size.
+    """
+
+    name = ''
+
+    def __init__(self):
+        self.gateway_url = getattr(settings, 'IPFS_GATEWAY', 'https://ipfs.io/ipfs/')
+        self.chunk_size = getattr(settings, 'IPFS_UPLOAD_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+    def pin(
+        self,
+        file: UploadedFile,
+        filename: str,
+        metadata: Optional[Dict] = None,
+        chunks: Optional[Iterable[bytes]] = None
+    ) -> Dict:
+        """
+        Store and pin a file.
+
+        Returns:
+            Dict with cid, size and timestamp
+
+        Raises:
+            IPFSUploadError: If the backend rejected the upload
+        """
+        raise NotImplementedError
+
+    def unpin(self, cid: str) -> bool:
+        """Remove a pin; True if the content is no longer pinned"""
+        raise NotImplementedError
+
+    def fetch(self, cid: str) -> Iterator[bytes]:
+        """Stream a file's content by CID"""
+        raise NotImplementedError
+
+    def url(self, cid: str) -> str:
+        """URL the content can be retrieved from"""
+        return f"{self.gateway_url}{cid}"
+
+    def _encoder(
+        self,
+        file: UploadedFile,
+        filename: str,
+        fields: Dict,
+        chunks: Optional[Iterable[bytes]]
+    ) -> StreamingMultipartEncoder:
+        return StreamingMultipartEncoder(
+            fields=fields,
+            file_field='file',
+            filename=filename,
+            file=file,
+            file_content_type=file.content_type,
+            chunk_size=self.chunk_size,
+            chunks=chunks
+        )
+
+
+class PinataBackend(StorageBackend):
+    """Pinata pinning API, read back through the configured gateway"""
+
+    name = 'pinata'
+
+    def __init__(self):
+        super().__init__()
+        self.api_key = getattr(settings, 'PINATA_API_KEY', '')
+        self.secret_key = getattr(settings, 'PINATA_SECRET_KEY', '')
+        self.jwt_token = getattr(settings, 'PINATA_JWT', '')
+
+        self.base_url = "https://api.pinata.cloud"
+        self.pin_url = f"{self.base_url}/pinning/pinFileToIPFS"
+        self.unpin_url = f"{self.base_url}/pinning/unpin"
+
+        # Setup headers
+        self.session = requests.Session()
+        if self.jwt_token:
+            self.session.headers.update({
+                "Authorization": f"Bearer {self.jwt_token}"
+            })
+        else:
+            self.session.headers.update({
+                "pinata_api_key": self.api_key,
+                "pinata_secret_api_key": self.secret_key
+            })
+
+    def pin(self, file, filename, metadata=None, chunks=None) -> Dict:
+        encoder = self._encoder(file, filename, {
+            "pinataMetadata": {
+                "name": filename,
+                "keyvalues": metadata or {}
+            },
+            "pinataOptions": {"cidVersion": 1}
+        }, chunks)
+
+        response = self.session.post(
+            self.pin_url,
+            data=encoder,
+            headers={"Content-Type": encoder.content_type},
+            timeout=60
+        )
+        if response.status_code != 200:
+            raise IPFSUploadError(f"Pinata upload failed: {response.status_code} - {response.text}")
+
+        result = response.json()
+        return {
+            "cid": result["IpfsHash"],
+            "size": result["PinSize"],
+            "timestamp": result["Timestamp"]
+        }
+
+    def unpin(self, cid: str) -> bool:
+        response = self.session.delete(f"{self.unpin_url}/{cid}", timeout=10)
+        return response.status_code == 200
+
+    def fetch(self, cid: str) -> Iterator[bytes]:
+        with self.session.get(self.url(cid), stream=True, timeout=60) as response:
+            response.raise_for_status()
+            yield from response.iter_content(self.chunk_size)
+
+
+class KuboBackend(StorageBackend):
+    """
+    Kubo (go-ipfs) node HTTP RPC API at IPFS_KUBO_API_URL.
+    Files are added with the same DAG parameters Pinata uses for CIDv1,
+    so CIDs match the locally computed ones. Kubo has no pin metadata,
+    so `metadata` is ignored.
+    """
+
+    name = 'kubo'
+
+    def __init__(self):
+        super().__init__()
+        self.api_url = getattr(settings, 'IPFS_KUBO_API_URL', 'http://127.0.0.1:5001').rstrip('/')
+        self.session = requests.Session()
+
+    def pin(self, file, filename, metadata=None, chunks=None) -> Dict:
+        encoder = self._encoder(file, filename, {}, chunks)
+        response = self.session.post(
+            f"{self.api_url}/api/v0/add",
+            params={
+                'cid-version': 1,
+                'raw-leaves': 'true',
+                'chunker': 'size-262144',
+                'pin': 'true',
+                'quieter': 'true',
+            },
+            data=encoder,
+            headers={"Content-Type": encoder.content_type},
+            timeout=60
+        )
+        if response.status_code != 200:
+            raise IPFSUploadError(f"Kubo add failed: {response.status_code} - {response.text}")
+
+        # One JSON object per line; the last one is the file root
+        result = json.loads(response.text.strip().splitlines()[-1])
+        return {
+            "cid": result["Hash"],
+            "size": int(result["Size"]),
+            "timestamp": time.time()
+        }
+
+    def unpin(self, cid: str) -> bool:
+        response = self.session.post(
+            f"{self.api_url}/api/v0/pin/rm", params={'arg': cid}, timeout=10
+        )
+        # Kubo answers 500 "not pinned" for content that is already unpinned
+        return response.status_code == 200 or 'not pinned' in response.text
+
+    def fetch(self, cid: str) -> Iterator[bytes]:
+        with self.session.post(
+            f"{self.api_url}/api/v0/cat", params={'arg': cid}, stream=True, timeout=60
+        ) as response:
+            response.raise_for_status()
+            yield from response.iter_content(self.chunk_size)
+
+
+class LocalBackend(StorageBackend):
+    """
+    Content-addressed store on the local filesystem.
+    Files are saved under IPFS_LOCAL_STORE_DIR by their real CIDv1, so it
+    stands in for a pinning service in development and offline
+    throughput tests.
+    """
+
+    name = 'local'
+
+    def __init__(self):
+        super().__init__()
+        self.root = getattr(
+            settings, 'IPFS_LOCAL_STORE_DIR', os.path.join(settings.MEDIA_ROOT, 'ipfs_store')
+        )
+        self.local_url = getattr(settings, 'IPFS_LOCAL_URL', f"{settings.MEDIA_URL}ipfs_store/")
+
+    def pin(self, file, filename, metadata=None, chunks=None) -> Dict:
+        if chunks is None:
+            chunks = iter_file_chunks(file, self.chunk_size)
+
+        os.makedirs(self.root, exist_ok=True)
+        builder = CIDBuilder()
+        fd, temp_path = tempfile.mkstemp(dir=self.root, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in chunks:
+                    builder.update(chunk)
+                    out.write(chunk)
+            cid = builder.cid()
+            os.replace(temp_path, self._path(cid))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        return {
+            "cid": cid,
+            "size": builder.size,
+            "timestamp": time.time()
+        }
+
+    def unpin(self, cid: str) -> bool:
+        try:
+            os.remove(self._path(cid))
+        except FileNotFoundError:
+            pass
+        return True
+
+    def fetch(self, cid: str) -> Iterator[bytes]:
+        with open(self._path(cid), 'rb') as stored:
+            yield from iter_file_chunks(stored, self.chunk_size)
+
+    def url(self, cid: str) -> str:
+        return f"{self.local_url}{cid}"
+
+    def _path(self, cid: str) -> str:
+        if not cid.isalnum():
+            raise ValueError(f"Invalid CID: {cid}")
+        return os.path.join(self.root, cid)
+
+
+BACKENDS = {
+    PinataBackend.name: PinataBackend,
+    KuboBackend.name: KuboBackend,
+    LocalBackend.name: LocalBackend,
+}
+
+
+def get_backend(name: Optional[str] = None) -> StorageBackend:
+    """Instantiate the named backend, or the one selected by settings"""
+    if name is None:
+        name = getattr(settings, 'IPFS_STORAGE_BACKEND', None)
+    if name is None:
+        configured = getattr(settings, 'PINATA_API_KEY', '') or getattr(settings, 'PINATA_JWT', '')
+        name = PinataBackend.name if configured else LocalBackend.name
+
+    backend_class = BACKENDS.get(name) or import_string(name)
+    return backend_class()
@@ -0,0 +1,165 @@
+"""
+Local IPFS CIDv1 computation.
+Reproduces the DAG that `ipfs add --cid-version=1` (as used by Pinata with
+cidVersion 1) builds for a file: fixed 256 KiB chunks stored as raw leaves,
+joined by a balanced UnixFS dag-pb tree of at most 174 links per node.
+The file is hashed in one streaming pass; only the links of the nodes
+still being built are kept in memory.
+"""
+
+import base64
+import hashlib
+from typing import BinaryIO, List, NamedTuple
+
+from .multipart import iter_file_chunks
+
+
+CHUNK_SIZE = 256 * 1024
+MAX_LINKS = 174
+
+CODEC_RAW = 0x55
+CODEC_DAG_PB = 0x70
+MULTIHASH_SHA2_256 = 0x12
+
+UNIXFS_FILE = 2
+
+
+class DagLink(NamedTuple):
+    """Link to a leaf or subtree: CID bytes, total DAG size, file bytes covered"""
+    cid: bytes
+    tsize: int
+    filesize: int
+
+
+class CIDBuilder:
+    """
+    Incremental CIDv1 calculator. Feed the file content in any chunking:
+
+        builder = CIDBuilder()
+        for chunk in file.chunks():
+            builder.update(chunk)
+        cid = builder.cid()
+    """
+
+    def __init__(self):
+        self.size = 0
+        self._buffer = bytearray()
+        self._levels: List[List[DagLink]] = [[]]
+        self._cid = None
+
+    def update(self, data: bytes):
+        if self._cid is not None:
+            raise ValueError("CID already computed")
+
+        self.size += len(data)
+        self._buffer += data
+        while len(self._buffer) >= CHUNK_SIZE:
+            self._add_leaf(bytes(self._buffer[:CHUNK_SIZE]))
+            del self._buffer[:CHUNK_SIZE]
+
+    def cid(self) -> str:
+        """Finish the DAG and return the root CID (base32 CIDv1)"""
+        if self._cid is None:
+            # The trailing partial chunk, or the single empty leaf of an empty file
+            if self._buffer or not self._levels[0]:
+                self._add_leaf(bytes(self._buffer))
+                self._buffer.clear()
+            self._cid = encode_cid(self._root().cid)
+        return self._cid
+
+    def _add_leaf(self, data: bytes):
+        leaf = DagLink(cid_bytes(CODEC_RAW, data), len(data), len(data))
+        self._push(0, leaf)
+
+    def _push(self, level: int, link: DagLink):
+        """
+        Add a link to a level. A full level is only closed once another link
+        arrives, so the last node of each level is built by _root().
+        """
+        if level == len(self._levels):
+            self._levels.append([])
+        if len(self._levels[level]) == MAX_LINKS:
+            self._push(level + 1, _file_node(self._levels[level]))
+            self._levels[level] = []
+        self._levels[level].append(link)
+
+    def _root(self) -> DagLink:
+        level = 0
+        while True:
+            top = level == len(self._levels) - 1
+            links = self._levels[level]
+            if top and len(links) == 1:
+                return links[0]
+            if links:
+                node = _file_node(links)
+                self._levels[level] = []
+                if top:
+                    return node
+                # A full parent level is closed first, adding a tree level
+                self._push(level + 1, node)
+            level += 1
+
+
+def compute_cid(file: BinaryIO) -> str:
+    """CIDv1 of a file or upload, read once in CHUNK_SIZE chunks"""
+    builder = CIDBuilder()
+    for chunk in iter_file_chunks(file, CHUNK_SIZE):
+        builder.update(chunk)
+    return builder.cid()
+
+
+def cid_bytes(codec: int, block: bytes) -> bytes:
+    """Binary CIDv1 of a block with a sha2-256 multihash"""
+    digest = hashlib.sha256(block).digest()
+    return (
+        _varint(1) + _varint(codec)
+        + _varint(MULTIHASH_SHA2_256) + _varint(len(digest)) + digest
+    )
+
+
+def encode_cid(cid: bytes) -> str:
+    """Multibase base32 (lowercase, unpadded) string form of a CID"""
+    return 'b' + base64.b32encode(cid).decode().lower().rstrip('=')
+
+
+def _file_node(links: List[DagLink]) -> DagLink:
+    """Encode a UnixFS file node over `links` as a dag-pb block"""
+    filesize = sum(link.filesize for link in links)
+
+    unixfs = _field(1, _varint(UNIXFS_FILE), wire_type=0) + _field(3, _varint(filesize), wire_type=0)
+    for link in links:
+        unixfs += _field(4, _varint(link.filesize), wire_type=0)
+
+    # dag-pb canonical order: Links (field 2) before Data (field 1)
+    block = b''
+    for link in links:
+        pb_link = (
+            _field(1, _length_prefixed(link.cid))
+            + _field(2, _length_prefixed(b''))
+            + _field(3, _varint(link.tsize), wire_type=0)
+        )
+        block += _field(2, _length_prefixed(pb_link))
+    block += _field(1, _length_prefixed(unixfs))
+
+    tsize = len(block) + sum(link.tsize for link in links)
+    return DagLink(cid_bytes(CODEC_DAG_PB, block), tsize, filesize)
+
+
+def _field(number: int, payload: bytes, wire_type: int = 2) -> bytes:
+    return _varint((number << 3) | wire_type) + payload
+
+
+def _length_prefixed(data: bytes) -> bytes:
+    return _varint(len(data)) + data
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
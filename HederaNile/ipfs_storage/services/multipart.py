@@ -0,0 +1,153 @@
+"""
+Streaming multipart/form-data encoder for IPFS uploads.
+The request body is produced chunk by chunk from the uploaded file, so
+memory per upload stays at one chunk regardless of the document size.
+Works with in-memory and temporary (on-disk) Django uploads, and with any
+seekable binary file object.
+"""
+
+import json
+import os
+import uuid
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional, Union
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class StreamingMultipartEncoder:
+    """
+    File-like multipart body that can be passed as `data=` to requests.
+    requests sends it with a Content-Length taken from `len()` and reads
+    it with `read(size)`, so the body is never materialised in memory:
+
+        encoder = StreamingMultipartEncoder(fields, 'file', name, file, mime)
+        requests.post(url, data=encoder, headers={'Content-Type': encoder.content_type})
+    """
+
+    def __init__(
+        self,
+        fields: Dict[str, Union[str, Dict]],
+        file_field: str,
+        filename: str,
+        file: BinaryIO,
+        file_content_type: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        chunks: Optional[Iterable[bytes]] = None
+    ):
+        """
+        Args:
+            chunks: Optional iterable of the file's content to send instead
+                of reading `file` (e.g. an UploadPipeline stream); `file`
+                is then only used for its size
+        """
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.chunk_size = chunk_size
+        self.file = file
+        self.chunks = chunks
+
+        self._head = b''.join(
+            self._part_header(name) + self._encode_value(value) + b'\r\n'
+            for name, value in fields.items()
+        ) + self._part_header(
+            file_field, filename, file_content_type or 'application/octet-stream'
+        )
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode()
+        self._length = len(self._head) + file_size(file) + len(self._tail)
+
+        self._parts = self._generate()
+        self._buffer = b''
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def read(self, size: int = -1) -> bytes:
+        """Read up to `size` bytes of the encoded body (all if size < 0)"""
+        while size < 0 or len(self._buffer) < size:
+            part = next(self._parts, None)
+            if part is None:
+                break
+            self._buffer += part
+
+        if size < 0:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def _generate(self) -> Iterator[bytes]:
+        yield self._head
+        chunks = self.chunks
+        if chunks is None:
+            chunks = iter_file_chunks(self.file, self.chunk_size)
+        for chunk in chunks:
+            yield chunk
+        yield self._tail
+
+    def _part_header(
+        self,
+        name: str,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None
+    ) -> bytes:
+        disposition = f'form-data; name="{_quote(name)}"'
+        if filename is not None:
+            disposition += f'; filename="{_quote(filename)}"'
+
+        header = f"--{self.boundary}\r\nContent-Disposition: {disposition}\r\n"
+        if content_type:
+            header += f"Content-Type: {content_type}\r\n"
+        return (header + "\r\n").encode()
+
+    @staticmethod
+    def _encode_value(value: Union[str, Dict]) -> bytes:
+        if not isinstance(value, str):
+            value = json.dumps(value)
+        return value.encode()
+
+
+def iter_file_chunks(file: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yield a file's content from the start in chunks of at most `chunk_size`.
+    Django uploads are read through `chunks()`, which streams temporary
+    uploads from disk.
+    """
+    if hasattr(file, 'chunks'):
+        yield from file.chunks(chunk_size)
+        return
+
+    file.seek(0)
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def file_size(file: BinaryIO) -> int:
+    """Size in bytes of an upload or seekable file, without reading it"""
+    size = getattr(file, 'size', None)
+    if size is not None:
+        return size
+
+    try:
+        return os.fstat(file.fileno()).st_size
+    except (AttributeError, OSError):
+        position = file.tell()
+        file.seek(0, os.SEEK_END)
+        size = file.tell()
+        file.seek(position)
+        return size
+
+
+def _quote(value: str) -> str:
+    """Escape a Content-Disposition parameter value"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\r', '').replace('\n', '')
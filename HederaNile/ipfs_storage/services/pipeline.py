@@ -0,0 +1,146 @@
+"""
+Single-pass upload pipeline.
+Each chunk of an upload is read once and passed through every stage
+(size enforcement, MIME sniffing, SHA-256, CID, optional extra checks),
+either ahead of the upload or while it is being streamed to IPFS.
+"""
+
+import hashlib
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import magic
+
+from .cid import CIDBuilder
+
+
+# Bytes inspected by the MIME sniffer
+SNIFF_BYTES = 2048
+
+
+class UploadRejected(ValueError):
+    """Raised by a stage when an upload fails validation"""
+
+
+class PipelineStage:
+    """
+    Base class for pipeline stages.
+    `update` sees every chunk in order; `finish` runs once after the last
+    chunk and records the stage's output in the shared result dict. Either
+    may raise UploadRejected.
+    """
+
+    def update(self, chunk: bytes):
+        pass
+
+    def finish(self, result: Dict):
+        pass
+
+
+class SizeLimit(PipelineStage):
+    """Enforces the maximum size on the bytes actually read"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.size = 0
+
+    def update(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.size > self.max_size:
+            raise UploadRejected(f"File too large: more than {self.max_size} bytes")
+
+    def finish(self, result: Dict):
+        result['size'] = self.size
+
+
+class MimeSniffer(PipelineStage):
+    """Checks the MIME type detected from the first SNIFF_BYTES bytes"""
+
+    def __init__(self, allowed: Sequence[str], sniff_bytes: int = SNIFF_BYTES):
+        self.allowed = allowed
+        self.sniff_bytes = sniff_bytes
+        self.mime_type: Optional[str] = None
+        self._head = b''
+        self._sniffed = False
+
+    def update(self, chunk: bytes):
+        if not self._sniffed:
+            self._head += chunk[:self.sniff_bytes - len(self._head)]
+            if len(self._head) >= self.sniff_bytes:
+                self._sniff()
+
+    def finish(self, result: Dict):
+        if not self._sniffed:
+            self._sniff()
+        result['mime_type'] = self.mime_type
+
+    def _sniff(self):
+        self._sniffed = True
+        try:
+            self.mime_type = magic.from_buffer(self._head, mime=True)
+        except Exception as e:
+            print(f"MIME type check failed: {e}")
+            # Continue anyway in development
+            return
+
+        if self.mime_type not in self.allowed:
+            raise UploadRejected(f"MIME type not allowed: {self.mime_type}")
+
+
+class SHA256Digest(PipelineStage):
+    def __init__(self):
+        self._hash = hashlib.sha256()
+
+    def update(self, chunk: bytes):
+        self._hash.update(chunk)
+
+    def finish(self, result: Dict):
+        result['sha256'] = self._hash.hexdigest()
+
+
+class CIDDigest(PipelineStage):
+    """IPFS CIDv1 of the content, as computed by cid.CIDBuilder"""
+
+    def __init__(self):
+        self._builder = CIDBuilder()
+
+    def update(self, chunk: bytes):
+        self._builder.update(chunk)
+
+    def finish(self, result: Dict):
+        result['cid'] = self._builder.cid()
+
+
+class UploadPipeline:
+    """
+    Runs chunks through a list of stages.
+
+    Ahead of an upload:
+        result = pipeline.run(iter_file_chunks(file))
+
+    Tee'd into an upload (the request aborts if a stage rejects):
+        body_chunks = pipeline.stream(iter_file_chunks(file))
+        ... upload body_chunks ...
+        result = pipeline.result
+    """
+
+    def __init__(self, stages: List[PipelineStage]):
+        self.stages = stages
+        self.result: Dict = {}
+        self.finished = False
+
+    def stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Yield each chunk after every stage has seen it, then finish"""
+        for chunk in chunks:
+            for stage in self.stages:
+                stage.update(chunk)
+            yield chunk
+
+        for stage in self.stages:
+            stage.finish(self.result)
+        self.finished = True
+
+    def run(self, chunks: Iterable[bytes]) -> Dict:
+        """Consume all chunks and return the combined stage results"""
+        for _ in self.stream(chunks):
+            pass
+        return self.result
@@ -1,42 +1,47 @@
 """
-IPFS storage service for NileFi using Pinata.
-Handles document uploads and retrieval via IPFS.
+IPFS storage service for NileFi.
+Handles document uploads and retrieval via IPFS through the configured
+storage backend (Pinata, Kubo or the local filesystem).
 """
 
+import itertools
 import os
-import requests
-import magic
-from typing import Dict, Optional, BinaryIO
+from typing import Dict, Iterator, Optional, BinaryIO
 from django.conf import settings
 from django.core.files.uploadedfile import UploadedFile
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from ipfs_storage.models import PinnedContent
+from .backends import get_backend
+from .multipart import DEFAULT_CHUNK_SIZE, iter_file_chunks
+from .pipeline import (
+    CIDDigest, MimeSniffer, SHA256Digest, SizeLimit, UploadPipeline, UploadRejected
+)
+
+
+# Acceptable MIME types for uploaded documents
+ACCEPTABLE_MIME_TYPES = [
+    'application/pdf',
+    'application/msword',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'application/vnd.ms-excel',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+]
 
 
 class IPFSStorageService:
     """
-    IPFS storage service using Pinata API.
+    IPFS storage service over a pluggable storage backend.
     Provides document upload, pinning, and retrieval functionality.
     """
     
-    def __init__(self):
-        self.api_key = settings.PINATA_API_KEY
-        self.secret_key = settings.PINATA_SECRET_KEY
-        self.jwt_token = settings.PINATA_JWT
-        self.gateway_url = settings.IPFS_GATEWAY
-        
-        self.base_url = "https://api.pinata.cloud"
-        self.pin_url = f"{self.base_url}/pinning/pinFileToIPFS"
-        self.unpin_url = f"{self.base_url}/pinning/unpin"
-        
-        # Setup headers
-        if self.jwt_token:
-            self.headers = {
-                "Authorization": f"Bearer {self.jwt_token}"
-            }
-        else:
-            self.headers = {
-                "pinata_api_key": self.api_key,
-                "pinata_secret_api_key": self.secret_key
-            }
+    def __init__(self, backend=None):
+        self.backend = backend or get_backend()
+        self.chunk_size = getattr(settings, 'IPFS_UPLOAD_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+        self.dedup_enabled = getattr(settings, 'IPFS_DEDUP_ENABLED', True)
+        self.extra_stages = getattr(settings, 'IPFS_UPLOAD_STAGES', [])
     
     def upload_file(
         self,
@@ -45,7 +50,7 @@ class IPFSStorageService:
         metadata: Optional[Dict] = None
     ) -> Optional[Dict]:
         """
-        Upload a file to IPFS via Pinata.
+        Upload a file to IPFS.
         
         Args:
             file: Django UploadedFile object
@@ -55,59 +60,81 @@ class IPFSStorageService:
         Returns:
             Dict with CID and upload info, or None if failed
         """
+        try:
+            return self.upload(file, filename, metadata)
+        except UploadRejected as e:
+            print(f"File validation failed: {file.name}: {e}")
+            return None
+        except Exception as e:
+            print(f"Error uploading to IPFS: {e}")
+            return None
+    
+    def upload(
+        self,
+        file: UploadedFile,
+        filename: Optional[str] = None,
+        metadata: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Upload a file to IPFS, raising on failure.
+        The file is validated and hashed in a single pass. With dedup
+        enabled that pass runs first and already-pinned content is not
+        uploaded again; otherwise it runs while the file streams to the
+        storage backend.
         
-        # Validate file
+        Returns:
+            Dict with CID and upload info
+        
+        Raises:
+            UploadRejected: If the file failed validation
+            IPFSUploadError: If the storage backend rejected the upload
+        """
+        # Validate file name and declared size; content checks run in the pipeline
         if not self._validate_file(file):
-            print(f"File validation failed: {file.name}")
-            return None
+            raise UploadRejected("File validation failed")
         
-        try:
-            # Prepare file
-            file_name = filename or file.name
-            files = {
-                'file': (file_name, file.read(), file.content_type)
-            }
-            
-            # Prepare metadata
-            pin_metadata = {
-                "name": file_name,
-                "keyvalues": metadata or {}
-            }
-            
-            data = {
-                "pinataMetadata": str(pin_metadata),
-                "pinataOptions": str({"cidVersion": 1})
-            }
-            
-            # Upload to Pinata
-            if not self.api_key:
-                # Mock mode for development without Pinata credentials
-                return self._mock_upload(file_name)
+        file_name = filename or file.name
+        pipeline = self._build_pipeline()
+        chunks = iter_file_chunks(file, self.chunk_size)
+        
+        digest = None
+        body = None
+        if self.dedup_enabled:
+            digest = pipeline.run(chunks)
             
-            response = requests.post(
-                self.pin_url,
-                files=files,
-                data=data,
-                headers=self.headers,
-                timeout=60
+            # Skip the upload if this content is already pinned
+            pinned = self._touch_pinned(digest['cid'])
+            if pinned:
+                return self._pinned_result(pinned, file_name)
+        else:
+            # Tee the pipeline into the upload; the first chunk is pulled
+            # now so the MIME check runs before the upload starts
+            body = pipeline.stream(chunks)
+            first = next(body, None)
+            body = itertools.chain([] if first is None else [first], body)
+        
+        result = self.backend.pin(file, file_name, metadata, chunks=body)
+        
+        digest = digest or pipeline.result
+        if digest['cid'] == result["cid"]:
+            self._record_pin(result["cid"], digest, file_name)
+        else:
+            # Dedup looks content up by its local CID, so indexing the
+            # backend's CID would never be hit; leave it out of the index
+            print(
+                f"ERROR: local CID {digest['cid']} does not match {self.backend.name} "
+                f"CID {result['cid']} for {file_name}; not indexed for dedup"
             )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return {
-                    "cid": result["IpfsHash"],
-                    "size": result["PinSize"],
-                    "timestamp": result["Timestamp"],
-                    "filename": file_name,
-                    "url": f"{self.gateway_url}{result['IpfsHash']}"
-                }
-            else:
-                print(f"Pinata upload failed: {response.status_code} - {response.text}")
-                return None
-                
-        except Exception as e:
-            print(f"Error uploading to IPFS: {e}")
-            return None
+        return {
+            "cid": result["cid"],
+            "size": result["size"],
+            "timestamp": result["timestamp"],
+            "filename": file_name,
+            "url": self.backend.url(result["cid"]),
+            "sha256": digest['sha256'],
+            "mime_type": digest['mime_type'],
+            "deduplicated": False
+        }
     
     def get_file_url(self, cid: str) -> str:
         """
@@ -119,11 +146,23 @@ class IPFSStorageService:
         Returns:
             Full gateway URL
         """
-        return f"{self.gateway_url}{cid}"
+        return self.backend.url(cid)
+    
+    def fetch_file(self, cid: str) -> Iterator[bytes]:
+        """
+        Stream a file's content from the storage backend.
+        
+        Args:
+            cid: IPFS Content Identifier
+        
+        Returns:
+            Iterator over the content in chunks
+        """
+        return self.backend.fetch(cid)
     
     def unpin_file(self, cid: str) -> bool:
         """
-        Unpin a file from Pinata (remove from storage).
+        Unpin a file from the storage backend (remove from storage).
         Use with caution - only for truly unused files.
         
         Args:
@@ -132,13 +171,11 @@ class IPFSStorageService:
         Returns:
             True if successful
         """
-        if not self.api_key:
-            return True  # Mock mode
-        
         try:
-            url = f"{self.unpin_url}/{cid}"
-            response = requests.delete(url, headers=self.headers, timeout=10)
-            return response.status_code == 200
+            if not self.backend.unpin(cid):
+                return False
+            PinnedContent.objects.filter(cid=cid).delete()
+            return True
         except Exception as e:
             print(f"Error unpinning file {cid}: {e}")
             return False
@@ -146,7 +183,8 @@ class IPFSStorageService:
     def _validate_file(self, file: UploadedFile) -> bool:
         """
         Validate uploaded file.
-        Checks size and file type.
+        Checks declared size and file extension; the content itself is
+        checked by the upload pipeline.
         """
         # Check size
         max_size = settings.MAX_UPLOAD_SIZE
@@ -161,50 +199,66 @@ class IPFSStorageService:
         if file_ext not in allowed_types:
             print(f"File type not allowed: {file_ext}")
             return False
-        
-        # Additional MIME type check using python-magic
-        try:
-            file.seek(0)
-            file_content = file.read(2048)  # Read first 2KB
-            file.seek(0)  # Reset
-            
-            mime = magic.from_buffer(file_content, mime=True)
-            
-            # Define acceptable MIME types
-            acceptable_mimes = [
-                'application/pdf',
-                'application/msword',
-                'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                'application/vnd.ms-excel',
-                'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            ]
-            
-            if mime not in acceptable_mimes:
-                print(f"MIME type not allowed: {mime}")
-                return False
-                
-        except Exception as e:
-            print(f"MIME type check failed: {e}")
-            # Continue anyway in development
-        
+
         return True
     
-    def _mock_upload(self, filename: str) -> Dict:
-        """Generate mock upload result for development"""
-        import hashlib
-        import time
-        
-        # Generate fake CID
-        mock_cid = hashlib.sha256(f"{filename}{time.time()}".encode()).hexdigest()[:46]
-        
+    def _build_pipeline(self) -> UploadPipeline:
+        """Validation and hashing stages, plus any IPFS_UPLOAD_STAGES"""
+        stages = [
+            SizeLimit(settings.MAX_UPLOAD_SIZE),
+            MimeSniffer(ACCEPTABLE_MIME_TYPES),
+            SHA256Digest(),
+            CIDDigest(),
+        ]
+        stages += [import_string(path)() for path in self.extra_stages]
+        return UploadPipeline(stages)
+    
+    def _touch_pinned(self, cid: str) -> Optional[PinnedContent]:
+        """Return the index entry for a CID, counting the repeat upload"""
+        updated = PinnedContent.objects.filter(cid=cid).update(
+            upload_count=F('upload_count') + 1,
+            last_uploaded_at=timezone.now()
+        )
+        return PinnedContent.objects.filter(cid=cid).first() if updated else None
+    
+    def _record_pin(self, cid: str, digest: Dict, filename: str):
+        """Add newly pinned content to the dedup index"""
+        PinnedContent.objects.get_or_create(
+            cid=cid,
+            defaults={
+                'size': digest['size'],
+                'sha256': digest['sha256'],
+                'filename': filename,
+                'content_type': digest['mime_type'] or '',
+            }
+        )
+    
+    def _pinned_result(self, pinned: PinnedContent, filename: str) -> Dict:
+        """Upload result for content that is already pinned"""
         return {
-            "cid": f"Qm{mock_cid}",
-            "size": 1024,
-            "timestamp": time.time(),
+            "cid": pinned.cid,
+            "size": pinned.size,
+            "timestamp": pinned.pinned_at.isoformat(),
             "filename": filename,
-            "url": f"{self.gateway_url}Qm{mock_cid}"
+            "url": self.backend.url(pinned.cid),
+            "sha256": pinned.sha256,
+            "mime_type": pinned.content_type,
+            "deduplicated": True
         }
 
 
 # Singleton instance
 ipfs_storage_service = IPFSStorageService()
+
+
+def upload_file_to_ipfs(file: UploadedFile, metadata: Optional[Dict] = None) -> str:
+    """
+    Upload a file and return its CID.
+    
+    Raises:
+        ValueError: If the upload was rejected or failed
+    """
+    result = ipfs_storage_service.upload_file(file, metadata=metadata)
+    if not result:
+        raise ValueError(f"IPFS upload failed for {file.name}")
+    return result["cid"]
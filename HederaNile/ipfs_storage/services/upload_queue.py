@@ -0,0 +1,242 @@
+"""
+Background IPFS upload queue for NileFi.
+Upload endpoints stage the file to local disk and record a PENDING
+StoredDocument; the upload worker pushes staged files to IPFS, fills in
+the CID and applies the document to its startup, so HTTP workers never
+wait on the pinning service.
+"""
+
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import List, Optional
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ipfs_storage.models import DocumentStatus, StoredDocument
+from .multipart import iter_file_chunks
+from .pipeline import UploadRejected
+from .storage_service import ipfs_storage_service
+
+
+def staging_dir() -> str:
+    return getattr(
+        settings, 'IPFS_STAGING_DIR', os.path.join(settings.MEDIA_ROOT, 'ipfs_staging')
+    )
+
+
+def stage_document(
+    file: UploadedFile,
+    startup,
+    document_type: str,
+    description: str = '',
+    user=None
+) -> StoredDocument:
+    """
+    Stage an upload to local disk and queue it for IPFS.
+    Temporary uploads are moved into place rather than copied.
+
+    Returns:
+        The PENDING StoredDocument
+    """
+    document = StoredDocument(
+        startup=startup,
+        uploaded_by=user,
+        filename=file.name,
+        content_type=file.content_type or '',
+        size=file.size,
+        document_type=document_type,
+        description=description,
+    )
+
+    os.makedirs(staging_dir(), exist_ok=True)
+    path = os.path.join(staging_dir(), str(document.id))
+    if hasattr(file, 'temporary_file_path'):
+        file_move_safe(file.temporary_file_path(), path)
+    else:
+        with open(path, 'wb') as staged:
+            for chunk in iter_file_chunks(file):
+                staged.write(chunk)
+
+    document.staged_path = path
+    document.save()
+    return document
+
+
+class DocumentUploadWorker:
+    """
+    Worker pool that uploads staged documents to IPFS.
+    Documents are claimed with a conditional update, as in the HCS outbox
+    relay. Uploads are content-addressed, so failures are retried with
+    backoff; files rejected by validation fail immediately. Documents left
+    PROCESSING by a worker that died are requeued once
+    IPFS_UPLOAD_CLAIM_TIMEOUT seconds have passed.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or getattr(settings, 'IPFS_UPLOAD_WORKERS', 4)
+        self.max_attempts = getattr(settings, 'IPFS_UPLOAD_MAX_ATTEMPTS', 5)
+        self.retry_delay = getattr(settings, 'IPFS_UPLOAD_RETRY_DELAY', 30)
+        self.claim_timeout = getattr(settings, 'IPFS_UPLOAD_CLAIM_TIMEOUT', 600)
+
+    def run_batch(self, batch_size: int = 20) -> int:
+        """
+        Upload up to `batch_size` due documents concurrently.
+
+        Returns:
+            Number of documents processed
+        """
+        reclaimed = self.reclaim_expired()
+        if reclaimed:
+            print(f"Requeued {reclaimed} document upload(s) with expired claims")
+
+        claimed = self._claim(batch_size)
+        if not claimed:
+            return 0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(self._upload, claimed))
+
+        return len(claimed)
+
+    def reclaim_expired(self) -> int:
+        """
+        Return documents whose claim has expired to PENDING.
+
+        Returns:
+            Number of documents requeued
+        """
+        cutoff = timezone.now() - timedelta(seconds=self.claim_timeout)
+        return StoredDocument.objects.filter(
+            Q(claimed_at__lt=cutoff) | Q(claimed_at__isnull=True),
+            status=DocumentStatus.PROCESSING
+        ).update(
+            status=DocumentStatus.PENDING,
+            claim_token=None,
+            claimed_at=None,
+            next_attempt_at=timezone.now()
+        )
+
+    def _claim(self, batch_size: int) -> List[StoredDocument]:
+        """Claim due PENDING documents by flipping them to PROCESSING"""
+        candidates = list(
+            StoredDocument.objects.filter(
+                status=DocumentStatus.PENDING,
+                next_attempt_at__lte=timezone.now()
+            ).values_list('id', flat=True)[:batch_size]
+        )
+        if not candidates:
+            return []
+
+        token = uuid.uuid4()
+        StoredDocument.objects.filter(
+            pk__in=candidates, status=DocumentStatus.PENDING
+        ).update(status=DocumentStatus.PROCESSING, claim_token=token, claimed_at=timezone.now())
+        return list(
+            StoredDocument.objects.select_related('startup').filter(claim_token=token)
+        )
+
+    def _upload(self, document: StoredDocument):
+        """Upload one staged document and record the outcome"""
+        try:
+            with open(document.staged_path, 'rb') as staged:
+                result = ipfs_storage_service.upload(
+                    UploadedFile(
+                        staged,
+                        name=document.filename,
+                        content_type=document.content_type,
+                        size=document.size
+                    ),
+                    metadata={
+                        'startup_id': str(document.startup_id),
+                        'document_type': document.document_type,
+                        'description': document.description,
+                        'uploaded_at': document.created_at.isoformat()
+                    }
+                )
+        except UploadRejected as e:
+            self._fail(document, str(e))
+            return
+        except Exception as e:
+            self._retry(document, str(e))
+            print(f"Document upload {document.id} failed: {e}")
+            return
+
+        try:
+            self._complete(document, result)
+        except Exception as e:
+            print(f"Recording document upload {document.id} failed: {e}")
+            # If the retry cannot be recorded either, the expired claim requeues it
+            try:
+                if StoredDocument.objects.filter(
+                    pk=document.pk, status=DocumentStatus.PROCESSING
+                ).exists():
+                    self._retry(document, str(e))
+            except Exception:
+                pass
+
+    def _complete(self, document: StoredDocument, result: dict):
+        """Record the CID, add the document to its startup and rescore"""
+        from SME.models import Startup
+        from scoring.services.scoring_service import calculate_credit_score, startup_scoring_data
+
+        with transaction.atomic():
+            document.status = DocumentStatus.UPLOADED
+            document.cid = result['cid']
+            document.sha256 = result.get('sha256', '')
+            document.uploaded_at = timezone.now()
+            document.save(update_fields=['status', 'cid', 'sha256', 'uploaded_at'])
+
+            # Lock the startup so concurrent uploads don't drop each other's docs
+            startup = Startup.objects.select_for_update().get(pk=document.startup_id)
+            startup.ipfs_docs = list(startup.ipfs_docs or [])
+            startup.ipfs_docs.append({
+                'cid': document.cid,
+                'filename': document.filename,
+                'document_type': document.document_type,
+                'description': document.description,
+                'uploaded_at': document.uploaded_at.isoformat()
+            })
+            startup.save(update_fields=['ipfs_docs'])
+
+        # Recalculate credit score with new document count
+        try:
+            scoring_result = calculate_credit_score(startup_scoring_data(startup))
+            startup.credit_score = scoring_result['score']
+            startup.save(update_fields=['credit_score'])
+        except Exception as e:
+            print(f"Credit score recalculation failed: {e}")
+
+        self._remove_staged(document)
+
+    def _retry(self, document: StoredDocument, error: str):
+        """Return a document to PENDING with linear backoff, or mark it FAILED"""
+        document.attempts += 1
+        document.last_error = error
+        if document.attempts >= self.max_attempts:
+            document.status = DocumentStatus.FAILED
+        else:
+            document.status = DocumentStatus.PENDING
+            document.next_attempt_at = timezone.now() + timedelta(
+                seconds=self.retry_delay * document.attempts
+            )
+        document.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at'])
+
+    def _fail(self, document: StoredDocument, error: str):
+        """Reject a document that failed validation; it is not retried"""
+        document.status = DocumentStatus.FAILED
+        document.last_error = error
+        document.save(update_fields=['status', 'last_error'])
+        self._remove_staged(document)
+
+    def _remove_staged(self, document: StoredDocument):
+        try:
+            os.remove(document.staged_path)
+        except OSError:
+            pass
+        StoredDocument.objects.filter(pk=document.pk).update(staged_path='')
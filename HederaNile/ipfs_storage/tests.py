@@ -1,3 +1,177 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from accounts.models import User
+from SME.models import Startup
+from .models import DocumentStatus, StoredDocument
+from .services import cid as cid_module
+from .services.cid import CIDBuilder, encode_cid
+from .services.storage_service import ipfs_storage_service
+from .services.upload_queue import DocumentUploadWorker
+
+
+class DocumentUploadWorkerTests(TestCase):
+    """Claiming, lease expiry and failure handling of staged uploads"""
+
+    def setUp(self):
+        owner = User.objects.create_user('0.0.1001', role='STARTUP')
+        self.startup = Startup.objects.create(
+            owner=owner, name='Acme', sector='Agriculture', country='Egypt', description='Acme'
+        )
+        staged = tempfile.NamedTemporaryFile(delete=False)
+        staged.write(b'%PDF-1.4 plan')
+        staged.close()
+        self.addCleanup(lambda: os.path.exists(staged.name) and os.remove(staged.name))
+        self.document = StoredDocument.objects.create(
+            startup=self.startup,
+            filename='plan.pdf',
+            content_type='application/pdf',
+            size=13,
+            document_type='business_plan',
+            staged_path=staged.name
+        )
+        self.worker = DocumentUploadWorker(workers=1)
+
+    def test_claim_marks_documents_processing(self):
+        claimed = self.worker._claim(10)
+
+        self.assertEqual([d.pk for d in claimed], [self.document.pk])
+        self.assertEqual(claimed[0].status, DocumentStatus.PROCESSING)
+        self.assertEqual(self.worker._claim(10), [])
+
+    def test_expired_claims_are_requeued(self):
+        self.worker._claim(10)
+        StoredDocument.objects.filter(pk=self.document.pk).update(
+            claimed_at=timezone.now() - timedelta(seconds=self.worker.claim_timeout + 1)
+        )
+
+        self.assertEqual(self.worker.reclaim_expired(), 1)
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.status, DocumentStatus.PENDING)
+
+    def test_live_claims_are_kept(self):
+        self.worker._claim(10)
+
+        self.assertEqual(self.worker.reclaim_expired(), 0)
+
+    def test_upload_records_cid(self):
+        result = {'cid': 'bafkreitest', 'sha256': 'ab' * 32}
+        with mock.patch.object(ipfs_storage_service, 'upload', return_value=result), \
+                mock.patch('scoring.services.scoring_service.calculate_credit_score',
+                           return_value={'score': 50}):
+            for document in self.worker._claim(10):
+                self.worker._upload(document)
+
+        self.document.refresh_from_db()
+        self.startup.refresh_from_db()
+        self.assertEqual(self.document.status, DocumentStatus.UPLOADED)
+        self.assertEqual(self.document.cid, 'bafkreitest')
+        self.assertEqual([doc['cid'] for doc in self.startup.ipfs_docs], ['bafkreitest'])
+
+    def test_recording_failure_requeues_document(self):
+        result = {'cid': 'bafkreitest', 'sha256': 'ab' * 32}
+        with mock.patch.object(ipfs_storage_service, 'upload', return_value=result), \
+                mock.patch.object(DocumentUploadWorker, '_complete',
+                                  side_effect=DatabaseError('database is locked')):
+            for document in self.worker._claim(10):
+                self.worker._upload(document)
+
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.status, DocumentStatus.PENDING)
+        self.assertEqual(self.document.attempts, 1)
+        self.assertIn('database is locked', self.document.last_error)
+
+
+def reference_cid(chunks):
+    """
+    Root CID of the go-ipfs balanced layout, built top-down: the root has
+    the smallest depth whose capacity covers every leaf, and each child
+    subtree is filled to its full depth from the left.
+    """
+    leaves = [
+        cid_module.DagLink(cid_module.cid_bytes(cid_module.CODEC_RAW, chunk), len(chunk), len(chunk))
+        for chunk in chunks
+    ]
+    if len(leaves) == 1:
+        return encode_cid(leaves[0].cid)
+
+    def build(links, depth):
+        if depth == 1:
+            return cid_module._file_node(links)
+        per_child = cid_module.MAX_LINKS ** (depth - 1)
+        return cid_module._file_node([
+            build(links[i:i + per_child], depth - 1)
+            for i in range(0, len(links), per_child)
+        ])
+
+    depth = 1
+    while cid_module.MAX_LINKS ** depth < len(leaves):
+        depth += 1
+    return encode_cid(build(leaves, depth).cid)
+
+
+class CIDBuilderTests(SimpleTestCase):
+    """
+    CIDs of `ipfs add --cid-version=1 --raw-leaves`. Single-block files
+    are checked against their published CIDs; multi-chunk files against
+    the balanced layout reference above.
+    """
+
+    def builder_cid(self, chunks):
+        builder = CIDBuilder()
+        for chunk in chunks:
+            builder.update(chunk)
+        return builder.cid()
+
+    def chunks(self, count, size=cid_module.CHUNK_SIZE):
+        return [bytes([index % 256]) * size for index in range(count)]
+
+    def test_empty_file(self):
+        self.assertEqual(
+            self.builder_cid([]),
+            'bafkreihdwdcefgh4dqkjv67uzcmw7ojee6xedzdetojuzjevtenxquvyku'
+        )
+
+    def test_single_chunk(self):
+        self.assertEqual(
+            self.builder_cid([b'hello world']),
+            'bafkreifzjut3te2nhyekklss27nh3k72ysco7y32koao5eei66wof36n5e'
+        )
+
+    def test_two_chunks(self):
+        chunks = self.chunks(2)
+        self.assertEqual(self.builder_cid(chunks), reference_cid(chunks))
+        self.assertTrue(self.builder_cid(chunks).startswith('bafybei'))
+
+    def test_uneven_feed_matches_chunked_feed(self):
+        data = b''.join(self.chunks(3))[:-100]
+        pieces = [data[i:i + 100_000] for i in range(0, len(data), 100_000)]
+        chunks = [data[i:i + cid_module.CHUNK_SIZE] for i in range(0, len(data), cid_module.CHUNK_SIZE)]
+        self.assertEqual(self.builder_cid(pieces), reference_cid(chunks))
+
+    def test_175_chunks(self):
+        chunks = self.chunks(175)
+        self.assertEqual(self.builder_cid(chunks), reference_cid(chunks))
+
+    def test_full_two_level_tree_adds_a_level(self):
+        # 174^2 + 1 one-byte leaves: the last leaf needs a third level
+        with mock.patch.object(cid_module, 'CHUNK_SIZE', 1):
+            chunks = self.chunks(cid_module.MAX_LINKS ** 2 + 1, size=1)
+            file_node = cid_module._file_node
+            widths = []
+
+            def recording_file_node(links):
+                widths.append(len(links))
+                return file_node(links)
+
+            with mock.patch.object(cid_module, '_file_node', recording_file_node):
+                cid = self.builder_cid([b''.join(chunks)])
+
+        self.assertLessEqual(max(widths), cid_module.MAX_LINKS)
+        self.assertEqual(cid, reference_cid(chunks))
@@ -0,0 +1,12 @@
+"""
+URL configuration for ipfs_storage app.
+"""
+from django.urls import path
+from .views import StoredDocumentStatusAPIView
+
+app_name = 'ipfs_storage'
+
+urlpatterns = [
+    # Background upload status
+    path('<uuid:pk>/', StoredDocumentStatusAPIView.as_view(), name='document-status'),
+]
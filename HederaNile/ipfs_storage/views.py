@@ -1,3 +1,23 @@
-from django.shortcuts import render
+"""
+Django REST Framework views for ipfs_storage app.
+"""
+from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
 
-# Create your views here.
+from .models import StoredDocument
+from .serializers import StoredDocumentSerializer
+
+
+class StoredDocumentStatusAPIView(generics.RetrieveAPIView):
+    """
+    Upload status of a staged document.
+    GET /api/documents/{id}/
+    """
+    serializer_class = StoredDocumentSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        """Startup owners see their own documents; admins see all."""
+        if self.request.user.role == 'ADMIN':
+            return StoredDocument.objects.all()
+        return StoredDocument.objects.filter(startup__owner=self.request.user)
@@ -0,0 +1,115 @@
+"""
+Compare per-worker memory for unpickled and memory-mapped ML models.
+
+Each mode forks a master process that, like gunicorn, forks the workers:
+`pickle` workers each joblib.load their own copy of the model, `mmap`
+workers share the exported artefacts the master mapped before forking.
+Memory is read from /proc/<pid>/smaps_rollup (Linux).
+
+Usage:
+    python manage.py export_scoring_model
+    python manage.py benchmark_model_memory --workers 8
+"""
+
+import gc
+import multiprocessing
+from typing import Dict
+from django.core.management.base import BaseCommand, CommandError
+
+from scoring.services.model_artefacts import artefacts_available
+from scoring.services.scoring_service import MLCreditScoringService
+
+MODES = ('pickle', 'mmap')
+
+MEMORY_FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+
+
+def memory_usage(pid='self') -> Dict[str, int]:
+    """Memory totals in kB from /proc/<pid>/smaps_rollup"""
+    usage = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            field, _, value = line.partition(':')
+            if field in MEMORY_FIELDS:
+                usage[field] = int(value.split()[0])
+    usage['Private'] = usage['Private_Clean'] + usage['Private_Dirty']
+    return usage
+
+
+def _worker(service, rows, results, release):
+    """Score a batch (loading the model if the master did not) and report memory"""
+    service.batch_score_ml(rows)
+    results.put(memory_usage())
+    # Stay alive until every worker has reported, so PSS splits shared pages
+    release.wait()
+
+
+def _master(context, mode, workers, rows, results, release):
+    service = MLCreditScoringService()
+    service.use_mapped = mode == 'mmap'
+    if mode == 'mmap':
+        service.preload()
+        gc.freeze()
+
+    processes = [
+        context.Process(target=_worker, args=(service, rows, results, release))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+class Command(BaseCommand):
+    help = "Report resident memory per worker with pickled vs memory-mapped model artefacts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Worker processes per mode')
+        parser.add_argument('--rows', type=int, default=1000,
+                            help='Rows each worker scores before memory is measured')
+        parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES),
+                            help='Modes to benchmark')
+
+    def handle(self, *args, **options):
+        try:
+            memory_usage()
+        except OSError:
+            raise CommandError("/proc/self/smaps_rollup is not available on this system")
+        if 'mmap' in options['modes'] and not artefacts_available(MLCreditScoringService().artefacts_dir):
+            raise CommandError("No exported artefacts; run `python manage.py export_scoring_model` first")
+
+        context = multiprocessing.get_context('fork')
+        rows = [{}] * options['rows']
+        summary = {}
+
+        for mode in options['modes']:
+            results, release = context.Queue(), context.Event()
+            master = context.Process(
+                target=_master,
+                args=(context, mode, options['workers'], rows, results, release)
+            )
+            master.start()
+            usages = [results.get(timeout=300) for _ in range(options['workers'])]
+            release.set()
+            master.join()
+
+            self.stdout.write(f"\n{mode}:")
+            self.stdout.write(f"  {'worker':>6}  {'RSS MiB':>8}  {'PSS MiB':>8}  {'private MiB':>11}")
+            for i, usage in enumerate(usages):
+                self.stdout.write(
+                    f"  {i:>6}  {usage['Rss'] / 1024:>8.1f}  {usage['Pss'] / 1024:>8.1f}  "
+                    f"{usage['Private'] / 1024:>11.1f}"
+                )
+            summary[mode] = usages
+
+        self.stdout.write("\nPer worker (mean) and total across workers:")
+        for mode, usages in summary.items():
+            rss = sum(usage['Rss'] for usage in usages) / 1024
+            pss = sum(usage['Pss'] for usage in usages) / 1024
+            private = sum(usage['Private'] for usage in usages) / 1024
+            self.stdout.write(
+                f"  {mode:<6}  RSS {rss / len(usages):.1f} MiB, PSS {pss / len(usages):.1f} MiB, "
+                f"private {private / len(usages):.1f} MiB; total PSS {pss:.1f} MiB"
+            )
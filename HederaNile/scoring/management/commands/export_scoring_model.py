@@ -0,0 +1,63 @@
+"""
+Export the pickled ML credit model as memory-mappable NumPy arrays.
+
+Usage:
+    python manage.py export_scoring_model
+    python manage.py export_scoring_model --output /srv/nilefi/model-artefacts
+"""
+
+import os
+import warnings
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from scoring.services.model_artefacts import export_artefacts, load_artefacts
+from scoring.services.scoring_service import MLCreditScoringService
+
+
+class Command(BaseCommand):
+    help = "Write the scaler and model as raw .npy arrays that workers can share with mmap"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=None,
+                            help='Output directory (default: AI_MODEL_ARTEFACTS_DIR)')
+        parser.add_argument('--check-rows', type=int, default=1000,
+                            help='Random rows used to compare predictions with the pickled model')
+
+    def handle(self, *args, **options):
+        import joblib
+
+        service = MLCreditScoringService()
+        output = options['output'] or service.artefacts_dir
+        try:
+            scaler = joblib.load(os.path.join(service.model_path, service.SCALER_FILE))
+            model = joblib.load(os.path.join(service.model_path, service.MODEL_FILE))
+        except OSError as e:
+            raise CommandError(f"Could not load the pickled model: {e}")
+
+        manifest = export_artefacts(scaler, model, output)
+        self.stdout.write(
+            f"Exported {len(manifest['feature_names'])} features and "
+            f"{len(model.classes_)} classes to {output}"
+        )
+
+        if not options['check_rows']:
+            return
+
+        # The mapped model must reproduce the pickled one
+        mapped_scaler, mapped_model = load_artefacts(output)
+        samples = np.random.default_rng(0).standard_normal(
+            (options['check_rows'], len(manifest['feature_names']))
+        )
+        rows = mapped_scaler.mean_ + samples * mapped_scaler.scale_
+        with warnings.catch_warnings():
+            warnings.filterwarnings('ignore', message='X does not have valid feature names')
+            expected = model.predict_proba(scaler.transform(rows))
+        actual = mapped_model.predict_proba(mapped_scaler.transform(rows))
+
+        difference = float(np.abs(expected - actual).max())
+        if difference > 1e-9:
+            raise CommandError(f"Exported model differs from the pickle by up to {difference:.3g}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Verified {len(rows)} predictions (max difference {difference:.3g})"
+        ))
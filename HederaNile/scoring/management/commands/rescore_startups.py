@@ -0,0 +1,92 @@
+"""
+Recalculate credit scores for the startup portfolio, e.g. after changing
+scoring weights or sector risks.
+
+Usage:
+    python manage.py rescore_startups                          # rescore every startup
+    python manage.py rescore_startups --sector fintech --dry-run
+    python manage.py rescore_startups --since 2025-01-01 --processes 4
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time as dt_time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from scoring.services.rescoring import pk_ranges, rescore_shard
+
+
+class Command(BaseCommand):
+    help = "Rescore startups in chunks with the batch engine and bulk-update changed scores"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sector', default=None,
+                            help='Only rescore startups in this sector')
+        parser.add_argument('--since', default=None,
+                            help='Only rescore startups updated on or after this date/datetime')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Startups fetched, scored and written per chunk')
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Worker processes, each rescoring one primary-key range')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report score changes without writing them')
+        parser.add_argument('--show', type=int, default=20,
+                            help='Number of individual score changes to print')
+
+    def handle(self, *args, **options):
+        shards = [
+            {
+                'sector': options['sector'],
+                'since': self._parse_since(options['since']),
+                'pk_range': pk_range,
+                'chunk_size': options['chunk_size'],
+                'dry_run': options['dry_run'],
+                'max_changes': options['show'],
+            }
+            for pk_range in pk_ranges(max(options['processes'], 1))
+        ]
+
+        if len(shards) == 1:
+            results = [rescore_shard(shards[0])]
+        else:
+            # Children must open their own database connections
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=len(shards), initializer=_init_worker) as executor:
+                results = list(executor.map(rescore_shard, shards))
+
+        scored = sum(counts['scored'] for counts, _ in results)
+        changed = sum(counts['changed'] for counts, _ in results)
+        changes = [change for _, shard_changes in results for change in shard_changes]
+
+        for change in changes[:options['show']]:
+            self.stdout.write(
+                f"{change.pk} {change.name}: {change.old_score} ({change.old_risk}) "
+                f"-> {change.new_score} ({change.new_risk})"
+            )
+
+        verb = 'would change' if options['dry_run'] else 'updated'
+        self.stdout.write(self.style.SUCCESS(
+            f"Rescored {scored} startup(s); {verb} {changed}"
+        ))
+
+    def _parse_since(self, value):
+        if not value:
+            return None
+
+        since = parse_datetime(value)
+        if since is None:
+            day = parse_date(value)
+            if day is None:
+                raise CommandError(f"Invalid --since value: {value}")
+            since = datetime.combine(day, dt_time.min)
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+
+def _init_worker():
+    """Make sure Django is set up in spawned worker processes"""
+    import django
+    django.setup()
@@ -0,0 +1,150 @@
+"""
+Memory-mapped ML model artefacts for NileFi.
+The fitted StandardScaler and LogisticRegression are exported as raw .npy
+arrays, which are opened with mmap_mode='r'. Loaded before the web server
+forks, every worker reads the same page-cache pages instead of
+unpickling its own copy of the model. Exports write new files and
+rename them into place, so running workers keep their mapping of the
+old model until they reload.
+"""
+
+import json
+import os
+import tempfile
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+MANIFEST_FILE = 'manifest.json'
+FORMAT_VERSION = 1
+
+# Array name -> (object, attribute) it is exported from
+ARRAYS = {
+    'mean': ('scaler', 'mean_'),
+    'scale': ('scaler', 'scale_'),
+    'coef': ('model', 'coef_'),
+    'intercept': ('model', 'intercept_'),
+    'classes': ('model', 'classes_'),
+}
+
+
+class MappedScaler:
+    """StandardScaler.transform over memory-mapped mean and scale arrays"""
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray, feature_names):
+        self.mean_ = mean
+        self.scale_ = scale
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return (np.asarray(X, dtype=float) - self.mean_) / self.scale_
+
+
+class MappedLogisticModel:
+    """LogisticRegression.predict_proba over memory-mapped coefficients"""
+
+    def __init__(self, coef: np.ndarray, intercept: np.ndarray, classes: np.ndarray):
+        self.coef_ = coef
+        self.intercept_ = intercept
+        self.classes_ = classes
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        return X @ self.coef_.T + self.intercept_
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        scores = self.decision_function(X)
+        if len(self.classes_) == 2:
+            positive = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+
+        # Multinomial: softmax over the classes
+        scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+        return scores / scores.sum(axis=1, keepdims=True)
+
+
+def export_artefacts(scaler, model, directory: str) -> Dict:
+    """
+    Write a fitted StandardScaler and LogisticRegression as raw arrays.
+
+    Args:
+        scaler: Fitted StandardScaler (with feature_names_in_)
+        model: Fitted binary or multinomial LogisticRegression
+        directory: Output directory, created if needed
+
+    Returns:
+        The manifest written alongside the arrays
+    """
+    if getattr(model, 'multi_class', 'auto') == 'ovr' and len(model.classes_) > 2:
+        raise ValueError("One-vs-rest models with more than two classes are not supported")
+
+    n_features = len(scaler.feature_names_in_)
+    sources = {'scaler': scaler, 'model': model}
+    arrays = {}
+    for name, (source, attribute) in ARRAYS.items():
+        value = getattr(sources[source], attribute, None)
+        arrays[name] = None if value is None else np.ascontiguousarray(value)
+
+    # with_mean=False / with_std=False leave the statistics unset
+    if arrays['mean'] is None:
+        arrays['mean'] = np.zeros(n_features)
+    if arrays['scale'] is None:
+        arrays['scale'] = np.ones(n_features)
+
+    os.makedirs(directory, exist_ok=True)
+    for name, value in arrays.items():
+        _replace_file(
+            os.path.join(directory, f"{name}.npy"),
+            lambda f, value=value: np.save(f, value, allow_pickle=False)
+        )
+
+    # The manifest goes last; loaders never see it ahead of its arrays
+    manifest = {
+        'format': FORMAT_VERSION,
+        'feature_names': [str(name) for name in scaler.feature_names_in_],
+        'shapes': {name: list(value.shape) for name, value in arrays.items()},
+    }
+    _replace_file(
+        os.path.join(directory, MANIFEST_FILE),
+        lambda f: f.write(json.dumps(manifest, indent=2).encode())
+    )
+    return manifest
+
+
+def _replace_file(path: str, write):
+    """
+    Write `path` through a temporary file in the same directory and rename
+    it over the old one. Existing memory maps keep the old inode, so they
+    never see a truncated or half-written array.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_artefacts(directory: str, mmap_mode: str = 'r') -> Tuple[MappedScaler, MappedLogisticModel]:
+    """Open exported artefacts; arrays are memory-mapped read-only by default"""
+    with open(os.path.join(directory, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get('format') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model artefact format: {manifest.get('format')}")
+
+    arrays = {
+        name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+        for name in ARRAYS
+    }
+    scaler = MappedScaler(arrays['mean'], arrays['scale'], manifest['feature_names'])
+    model = MappedLogisticModel(arrays['coef'], arrays['intercept'], arrays['classes'])
+    return scaler, model
+
+
+def artefacts_available(directory: str) -> bool:
+    return os.path.exists(os.path.join(directory, MANIFEST_FILE))
@@ -0,0 +1,146 @@
+"""
+Bulk credit rescoring for NileFi.
+Streams startups in primary-key order, scores each chunk with the
+vectorised engine and writes changed scores back with one bulk_update per
+chunk. Work can be sharded by primary-key range across processes.
+"""
+
+import uuid
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from django.db import connections, transaction
+
+from .batch_scoring import columns_from_financial_data
+
+
+SCORE_FIELDS = ['credit_score', 'risk_level', 'score_explanation']
+
+PkRange = Tuple[Optional[uuid.UUID], Optional[uuid.UUID]]
+
+
+class ScoreChange(NamedTuple):
+    pk: uuid.UUID
+    name: str
+    old_score: Optional[Decimal]
+    new_score: Decimal
+    old_risk: Optional[str]
+    new_risk: str
+
+
+def pk_ranges(shards: int) -> List[PkRange]:
+    """Split the UUID key space into `shards` half-open [low, high) ranges"""
+    bounds = [uuid.UUID(int=(i << 128) // shards) for i in range(1, shards)]
+    return list(zip([None] + bounds, bounds + [None]))
+
+
+def startup_queryset(sector: Optional[str] = None, since=None, pk_range: Optional[PkRange] = None):
+    """Startups to rescore, in primary-key order"""
+    from SME.models import Startup
+
+    queryset = Startup.objects.all()
+    if sector:
+        queryset = queryset.filter(sector__iexact=sector)
+    if since:
+        queryset = queryset.filter(updated_at__gte=since)
+    if pk_range:
+        low, high = pk_range
+        if low is not None:
+            queryset = queryset.filter(pk__gte=low)
+        if high is not None:
+            queryset = queryset.filter(pk__lt=high)
+    return queryset.order_by('pk')
+
+
+def rescore(
+    queryset,
+    chunk_size: int = 2000,
+    dry_run: bool = False,
+    max_changes: int = 0,
+    service=None
+) -> Tuple[Dict[str, int], List[ScoreChange]]:
+    """
+    Rescore a Startup queryset chunk by chunk.
+
+    Args:
+        queryset: Startups to rescore
+        chunk_size: Rows fetched, scored and written per chunk
+        dry_run: Compute changes without writing them
+        max_changes: Number of ScoreChange records to return
+        service: CreditScoringService (default: the singleton)
+
+    Returns:
+        (counts of scored and changed startups, first `max_changes` changes)
+    """
+    if service is None:
+        from .scoring_service import credit_scoring_service
+        service = credit_scoring_service
+
+    engine = service.batch_engine()
+    counts = {'scored': 0, 'changed': 0}
+    changes: List[ScoreChange] = []
+
+    rows = queryset.only('pk', 'name', 'sector', 'financial_data', 'ipfs_docs', *SCORE_FIELDS)
+    chunk = []
+    for startup in rows.iterator(chunk_size=chunk_size):
+        chunk.append(startup)
+        if len(chunk) >= chunk_size:
+            _rescore_chunk(engine, chunk, dry_run, max_changes, counts, changes)
+            chunk = []
+    if chunk:
+        _rescore_chunk(engine, chunk, dry_run, max_changes, counts, changes)
+
+    return counts, changes
+
+
+def rescore_shard(options: Dict) -> Tuple[Dict[str, int], List[ScoreChange]]:
+    """Process-pool entry point: rescore one primary-key range"""
+    queryset = startup_queryset(options['sector'], options['since'], options['pk_range'])
+    try:
+        return rescore(
+            queryset,
+            chunk_size=options['chunk_size'],
+            dry_run=options['dry_run'],
+            max_changes=options['max_changes']
+        )
+    finally:
+        connections.close_all()
+
+
+def _rescore_chunk(engine, chunk, dry_run, max_changes, counts, changes):
+    """Score one chunk and bulk-update the startups whose score changed"""
+    batch = engine.score_columns(
+        np.array([startup.pk for startup in chunk], dtype=object),
+        [startup.sector for startup in chunk],
+        columns_from_financial_data(
+            [startup.financial_data for startup in chunk],
+            [startup.ipfs_docs for startup in chunk]
+        )
+    )
+
+    changed = []
+    for i, startup in enumerate(chunk):
+        score = Decimal(str(batch.scores[i])).quantize(Decimal('0.01'))
+        risk = str(batch.risk_levels[i])
+        explanation = batch.explanation(i)
+        if (startup.credit_score == score and startup.risk_level == risk
+                and startup.score_explanation == explanation):
+            continue
+
+        if len(changes) < max_changes:
+            changes.append(ScoreChange(
+                startup.pk, startup.name, startup.credit_score, score, startup.risk_level, risk
+            ))
+        startup.credit_score = score
+        startup.risk_level = risk
+        startup.score_explanation = explanation
+        changed.append(startup)
+
+    if changed and not dry_run:
+        from SME.models import Startup
+        with transaction.atomic():
+            Startup.objects.bulk_update(changed, SCORE_FIELDS, batch_size=len(changed))
+
+    counts['scored'] += len(chunk)
+    counts['changed'] += len(changed)
@@ -3,10 +3,20 @@ AI Credit Scoring Service for NileFi.
 Provides credit score calculation and explainability for SME loan applications.
 """
 
+import hashlib
+import json
+import os
+import threading
+import time
+import warnings
 import numpy as np
 from decimal import Decimal
 from typing import Dict, Tuple, List
 from django.conf import settings
+from django.core.cache import cache
+
+from .batch_scoring import BatchScoringEngine, ScoreBatch
+from .model_artefacts import MANIFEST_FILE, artefacts_available, load_artefacts
 
 
 class CreditScoringService:
@@ -42,10 +52,15 @@ class CreditScoringService:
             'education': 0.4,
             'default': 0.5,
         }
+        
+        self.cache_timeout = getattr(settings, 'SCORING_CACHE_TIMEOUT', 24 * 60 * 60)
     
     def calculate_score(self, startup_data: Dict) -> Tuple[float, str, Dict]:
         """
         Calculate credit score for a startup.
+        Results are memoised under the fingerprint of the normalised
+        features and the scoring version, so unchanged inputs are answered
+        from the cache and any change to weights or sector risks misses.
         
         Args:
             startup_data: Dict containing startup financial and business data
@@ -62,6 +77,34 @@ class CreditScoringService:
         # Extract features
         features = self._extract_features(startup_data)
         
+        cache_key = self.cache_key(features)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return tuple(cached)
+        
+        result = self._score_features(features)
+        cache.set(cache_key, result, self.cache_timeout)
+        return result
+    
+    def scoring_version(self) -> str:
+        """
+        Fingerprint of everything besides the features that affects a
+        score. Subclasses that score with a model include its artefacts.
+        """
+        config = json.dumps(
+            {'weights': self.weights, 'sector_risks': self.sector_risks},
+            sort_keys=True
+        )
+        return hashlib.sha256(config.encode()).hexdigest()[:16]
+    
+    def cache_key(self, features: Dict) -> str:
+        """Cache key for a normalised feature vector under the current version"""
+        vector = json.dumps(features, sort_keys=True)
+        fingerprint = hashlib.sha256(vector.encode()).hexdigest()
+        return f"credit_score:{type(self).__name__}:{self.scoring_version()}:{fingerprint}"
+    
+    def _score_features(self, features: Dict) -> Tuple[float, str, Dict]:
+        """Score, risk level and explanation for normalised features"""
         # Calculate weighted score
         score = self._calculate_weighted_score(features)
         
@@ -80,8 +123,10 @@ class CreditScoringService:
         revenue = float(data.get('revenue', 0))
         revenue_score = min(revenue / 1_000_000, 1.0)  # Cap at 1M
         
-        # Business age feature (normalize to 0-1)
-        business_age_months = int(data.get('business_age_months', 0))
+        # Business age feature (normalize to 0-1); `business_age` is in years
+        business_age_months = int(
+            data.get('business_age_months', float(data.get('business_age', 0)) * 12)
+        )
         age_score = min(business_age_months / 60, 1.0)  # Cap at 5 years
         
         # Monthly sales feature (normalize to 0-1)
@@ -93,7 +138,7 @@ class CreditScoringService:
         sector_score = 1.0 - self.sector_risks.get(sector, self.sector_risks['default'])
         
         # Document completeness (0-1)
-        docs_uploaded = len(data.get('ipfs_docs', []))
+        docs_uploaded = int(data.get('docs_uploaded', len(data.get('ipfs_docs', []))))
         doc_score = min(docs_uploaded / 5, 1.0)  # Expect at least 5 docs
         
         # Previous funding (0-1)
@@ -172,128 +217,262 @@ class CreditScoringService:
         Calculate scores for multiple startups in batch.
         Useful for batch processing and analytics.
         """
-        results = []
-        for startup in startups:
-            result = self.calculate_score(startup)
-            results.append(result)
-        return results
+        return list(self.batch_engine().score_dicts(startups).results())
+    
+    def score_queryset(self, queryset) -> ScoreBatch:
+        """
+        Score a Startup queryset with whole-array operations.
+        
+        Returns:
+            ScoreBatch with scores, risk levels and contributions per row
+        """
+        return self.batch_engine().score_queryset(queryset)
+    
+    def batch_engine(self) -> BatchScoringEngine:
+        """Vectorised engine using the current weights and sector risks"""
+        return BatchScoringEngine(self.weights, self.sector_risks, self.enabled)
+
+
+def startup_scoring_data(startup) -> Dict:
+    """Scoring input for a Startup from its financial data and documents"""
+    financial = startup.financial_data or {}
+    data = {
+        'revenue': financial.get('revenue') or 0,
+        'monthly_sales': financial.get('monthly_sales') or 0,
+        'business_age': financial.get('business_age') or 0,
+        'previous_funding': financial.get('previous_funding') or 0,
+        'sector': startup.sector or '',
+        'docs_uploaded': len(startup.ipfs_docs or []),
+    }
+    if financial.get('business_age_months') is not None:
+        data['business_age_months'] = financial['business_age_months']
+    return data
+
+
+def calculate_credit_score(startup_data: Dict) -> Dict:
+    """
+    Memoised credit score in the format the startup views expect.
+    
+    Returns:
+        Dict with score, risk_bucket, feature_importance and explanation
+    """
+    score, risk_level, explanation = credit_scoring_service.calculate_score(startup_data)
+    features = explanation.get('features', {})
+    summary = explanation.get('methodology', 'Credit scoring disabled')
+    if features:
+        summary += (
+            f". Strengths: {', '.join(explanation['top_strengths'])}"
+            f"; weaknesses: {', '.join(explanation['top_weaknesses'])}"
+        )
+    
+    return {
+        'score': score,
+        'risk_bucket': risk_level,
+        'feature_importance': {
+            name: details['contribution_to_score'] for name, details in features.items()
+        },
+        'explanation': summary,
+    }
 
 
 class MLCreditScoringService(CreditScoringService):
     """
     ML-based credit scoring using scikit-learn.
-    To be implemented when sufficient training data is available.
+    Loads the fitted scaler (`data_scaler.pkl`) and classifier
+    (`credit_model.pkl`) from AI_MODEL_PATH once per process, on first use.
+    A failed load is retried after AI_MODEL_RETRY_SECONDS.
+    Inputs are aligned to the scaler's `feature_names_in_` columns through
+    a precomputed name -> column index, and batches are scored with a
+    single `transform` and `predict_proba` call.
     
-    Upgrade steps:
-    1. Collect historical data (startups + outcomes)
-    2. Train Random Forest or Gradient Boosting model
-    3. Use SHAP for explainability
-    4. Deploy model and switch to this service
+    When artefacts exported by `export_scoring_model` exist (in
+    AI_MODEL_ARTEFACTS_DIR), they are memory-mapped instead of unpickled;
+    call `preload()` before forking so workers share them.
     """
     
+    SCALER_FILE = 'data_scaler.pkl'
+    MODEL_FILE = 'credit_model.pkl'
+    
+    # The model's positive class (1) is bankruptcy
+    BANKRUPT_CLASS = 1
+    
     def __init__(self):
         super().__init__()
+        self.model_path = getattr(settings, 'AI_MODEL_PATH', None) or os.path.dirname(__file__)
+        self.artefacts_dir = getattr(
+            settings, 'AI_MODEL_ARTEFACTS_DIR', os.path.join(self.model_path, 'artefacts')
+        )
+        self.use_mapped = getattr(settings, 'AI_MODEL_MMAP', True)
+        self.scaler = None
         self.model = None
-        self.model_path = settings.AI_MODEL_PATH
-        # self._load_model()
+        self.feature_names: List[str] = []
+        self.feature_index: Dict[str, int] = {}
+        self._bankrupt_column = None
+        self.retry_seconds = getattr(settings, 'AI_MODEL_RETRY_SECONDS', 60)
+        self._loaded = False
+        self._retry_at = 0.0
+        self._load_lock = threading.Lock()
     
-    def _load_model(self):
-        """Load trained ML model from disk"""
-        import joblib
-        try:
-            data_scaler = joblib.load('data_scaler.pkl')
-            credit_model = joblib.load('credit_model.pkl')
+    def _load_model(self) -> bool:
+        """
+        Load the scaler and model once; True if they are available.
+        After a failure the next call past the retry interval tries again.
+        """
+        if self._loaded or time.monotonic() < self._retry_at:
+            return self._loaded
+        
+        with self._load_lock:
+            if self._loaded or time.monotonic() < self._retry_at:
+                return self._loaded
             
-            # Get the 95 feature names the model was trained on
-            MODEL_FEATURES = data_scaler.feature_names_in_
-            print("AI models loaded successfully.")
+            try:
+                self._set_artefacts(*self._read_artefacts())
+                self._loaded = True
+                print("AI models loaded successfully.")
+            except Exception as e:
+                self._retry_at = time.monotonic() + self.retry_seconds
+                print(f"CRITICAL ERROR: Could not load models: {e}")
             
-        except Exception as e:
-            print(f"CRITICAL ERROR: Could not load models: {e}")
-            data_scaler = None
-            credit_model = None
-            MODEL_FEATURES = []
-
+            return self._loaded
     
-        pass
+    def _read_artefacts(self):
+        """(scaler, model): memory-mapped arrays if exported, else the pickles"""
+        if self.use_mapped and artefacts_available(self.artefacts_dir):
+            return load_artefacts(self.artefacts_dir)
+        
+        import joblib
+        scaler = joblib.load(os.path.join(self.model_path, self.SCALER_FILE))
+        model = joblib.load(os.path.join(self.model_path, self.MODEL_FILE))
+        return scaler, model
+    
+    def preload(self) -> bool:
+        """
+        Load the model now, e.g. in the server's master process before it
+        forks workers. Memory-mapped arrays are then shared by every worker.
+        """
+        return self._load_model()
+    
+    def _set_artefacts(self, scaler, model):
+        """Install a fitted scaler and model and precompute the feature index"""
+        # Get the 95 feature names the model was trained on
+        self.feature_names = [str(name) for name in scaler.feature_names_in_]
+        self.feature_index = {name: i for i, name in enumerate(self.feature_names)}
+        self._bankrupt_column = list(model.classes_).index(self.BANKRUPT_CLASS)
+        self.scaler = scaler
+        self.model = model
+    
+    def scoring_version(self) -> str:
+        """Include the model artefacts, so retrained models miss the cache"""
+        stats = []
+        paths = [os.path.join(self.model_path, self.SCALER_FILE),
+                 os.path.join(self.model_path, self.MODEL_FILE)]
+        if self.use_mapped:
+            paths.append(os.path.join(self.artefacts_dir, MANIFEST_FILE))
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                stats.append(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+            except OSError:
+                stats.append(f"{path}:missing")
+        artefacts = hashlib.sha256('|'.join(stats).encode()).hexdigest()[:16]
+        return f"{super().scoring_version()}-{artefacts}"
+    
+    def feature_matrix(self, rows: List[Dict]) -> np.ndarray:
+        """
+        Align SME data dicts to the model's feature columns.
+        Unknown keys are ignored; missing or non-numeric values are 0.
+        """
+        matrix = np.zeros((len(rows), len(self.feature_names)))
+        for i, row in enumerate(rows):
+            for name, value in row.items():
+                j = self.feature_index.get(name)
+                if j is None:
+                    continue
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    continue
+                if np.isfinite(value):
+                    matrix[i, j] = value
+        return matrix
+    
+    def predict_bankruptcy_many(self, rows: List[Dict]) -> np.ndarray:
+        """
+        Probability of bankruptcy for each row, from one batched prediction.
+        Rows are 0.5 ("undetermined") when the model is unavailable.
+        """
+        if not rows or not self._load_model():
+            return np.full(len(rows), 0.5)
+        
+        with warnings.catch_warnings():
+            # Columns are aligned by index; skip sklearn's feature-name check
+            warnings.filterwarnings('ignore', message='X does not have valid feature names')
+            scaled = self.scaler.transform(self.feature_matrix(rows))
+            return self.model.predict_proba(scaled)[:, self._bankrupt_column]
     
     def calculate_score_ml(self, startup_data: Dict) -> Tuple[float, str, Dict]:
-    """
+        """
         Calculates the credit score from a dictionary of SME data.
         
         Args:
-            sme_data: A dictionary where keys are the feature names.
-                    The function will automatically align this with the 95 
-                    required features, filling in 0 for any missing data.
-
-        Returns:
-            A list: [probability_of_bankruptcy, probability_of_not_bankruptcy]
-    """
-    if not credit_model or not data_scaler:
-        print("Models are not loaded. Cannot predict.")
-        # Return a default "undetermined" score
-        return [0.5, 0.5] 
-        
-    try:
-        # 1. Create a pandas Series aligned to the model's 95 features.
-        # - It ensures all 95 features are present.
-        # - It puts them in the correct order.
-        # - .fillna(0) sets any data not provided by the user to 0.
-        input_series = pd.Series(sme_data, index=MODEL_FEATURES).fillna(0)
-        
-        # 2. Convert the Series to a single-row DataFrame.
-        input_df = input_series.to_frame().T
-        
-        # 3. Ensure all data is numeric (in case of errors).
-        input_df = input_df.apply(pd.to_numeric)
-
-        # 4. Scale the data using the loaded scaler.
-        scaled_data = data_scaler.transform(input_df)
+            startup_data: A dictionary where keys are the feature names.
+                    Values are aligned with the 95 required features,
+                    filling in 0 for any missing data.
         
-        # 5. Predict the probabilities.
-        # The model's classes are [0, 1] (Not Bankrupt, Bankrupt).
-        # predict_proba() returns [[prob_not_bankrupt, prob_bankrupt]]
-        probabilities = credit_model.predict_proba(scaled_data)
+        Returns:
+            Tuple of (score, risk_level, explanation); the score is the
+            probability of not going bankrupt, as 0-100
+        """
+        if not self._load_model():
+            print("Models are not loaded. Cannot predict.")
+            return self._ml_result(0.5)
         
-        prediction = probabilities[0]
+        row = self.feature_matrix([startup_data])[0]
+        cache_key = self.row_cache_key(row)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return tuple(cached)
         
-        prob_not_bankrupt = prediction[0]
-        prob_bankrupt = prediction[1]
+        # Only real predictions are cached, never the neutral fallback
+        try:
+            probability = float(self.predict_bankruptcy_many([startup_data])[0])
+        except Exception as e:
+            print(f"Error during prediction: {e}")
+            return self._ml_result(0.5)
         
-        # 6. Return in your requested format:
-        # [percentage of bankruptcy, percentage of not bankruptcy]
-        return [prob_bankrupt, prob_not_bankrupt]
-
-    except Exception as e:
-        print(f"Error during prediction: {e}")
-        return [0.5, 0.5] # Return "undetermined" on error
-
-        raise NotImplementedError("ML model not yet trained")
+        result = self._ml_result(probability)
+        cache.set(cache_key, result, self.cache_timeout)
+        return result
+    
+    def row_cache_key(self, row: np.ndarray) -> str:
+        """Cache key for an aligned feature row under the current version"""
+        fingerprint = hashlib.sha256(row.tobytes()).hexdigest()
+        return f"credit_score:{type(self).__name__}:{self.scoring_version()}:{fingerprint}"
+    
+    def batch_score_ml(self, startups: List[Dict]) -> List[Tuple[float, str, Dict]]:
+        """Score many SMEs with a single transform and predict_proba call"""
+        try:
+            probabilities = self.predict_bankruptcy_many(startups)
+        except Exception as e:
+            print(f"Error during prediction: {e}")
+            probabilities = np.full(len(startups), 0.5)
+        return [self._ml_result(float(p)) for p in probabilities]
+    
+    def _ml_result(self, prob_bankrupt: float) -> Tuple[float, str, Dict]:
+        score = round((1.0 - prob_bankrupt) * 100, 2)
+        return score, self._determine_risk_level(score), {
+            'final_score': score,
+            'probability_of_bankruptcy': round(prob_bankrupt, 4),
+            'probability_of_not_bankruptcy': round(1.0 - prob_bankrupt, 4),
+            'methodology': 'Logistic regression on standardised financial ratios',
+        }
 
 
 # Singleton instance
 credit_scoring_service = CreditScoringService()
-import joblib
-import pandas as pd
-import numpy as np
-
-# --- 1. Load Models ---
-# Load these once when your application starts.
-try:
-    data_scaler = joblib.load('data_scaler.pkl')
-    credit_model = joblib.load('credit_model.pkl')
-    
-    # Get the 95 feature names the model was trained on
-    MODEL_FEATURES = data_scaler.feature_names_in_
-    print("AI models loaded successfully.")
-    
-except Exception as e:
-    print(f"CRITICAL ERROR: Could not load models: {e}")
-    data_scaler = None
-    credit_model = None
-    MODEL_FEATURES = []
+ml_credit_scoring_service = MLCreditScoringService()
 
-# --- 2. The Prediction Function ---
 
-def get_credit_score(sme_data: dict):
-    
\ No newline at end of file
+def preload_scoring_models() -> bool:
+    """Pre-fork hook: load the ML model in the master process"""
+    return ml_credit_scoring_service.preload()
@@ -1,3 +1,352 @@
-from django.test import TestCase
+import importlib.util
+import os
+import tempfile
+import warnings
+from datetime import date
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from SME.models import Startup
+
+from .services.model_artefacts import export_artefacts, load_artefacts
+from .services.rescoring import pk_ranges, rescore, startup_queryset
+from .services.scoring_service import (
+    CreditScoringService, MLCreditScoringService, startup_scoring_data
+)
+
+User = get_user_model()
+
+SKLEARN_AVAILABLE = importlib.util.find_spec('sklearn') is not None
+
+
+class FakeScaler:
+    feature_names_in_ = np.array(['Cash Ratio', 'Debt Ratio'])
+
+    def transform(self, matrix):
+        return matrix
+
+
+class FakeModel:
+    classes_ = np.array([0, 1])
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict_proba(self, matrix):
+        self.calls += 1
+        bankrupt = np.clip(matrix[:, 1], 0.0, 1.0)
+        return np.column_stack([1.0 - bankrupt, bankrupt])
+
+
+def random_startup_data(rng):
+    """Scoring input in whole currency units, where rounding ties are common"""
+    data = {
+        'revenue': int(rng.integers(0, 1_200_000)),
+        'monthly_sales': int(rng.integers(0, 120_000)),
+        'previous_funding': int(rng.integers(0, 600_000)),
+        'sector': str(rng.choice(['Technology', 'fintech', 'retail', 'Agriculture', 'space', ''])),
+        'docs_uploaded': int(rng.integers(0, 8)),
+    }
+    if rng.random() < 0.5:
+        data['business_age_months'] = int(rng.integers(0, 90))
+    else:
+        data['business_age'] = round(float(rng.uniform(0, 8)), 1)
+    return data
+
+
+def create_startup(owner, data, name='Startup'):
+    """Startup whose financial_data and documents hold `data`"""
+    data = dict(data)
+    return Startup.objects.create(
+        owner=owner,
+        name=name,
+        sector=data.pop('sector', ''),
+        country='Kenya',
+        description='Test startup',
+        ipfs_docs=[{'cid': f'Qm{j}'} for j in range(data.pop('docs_uploaded', 0))],
+        financial_data=data,
+    )
+
+
+class ScoreMemoTests(SimpleTestCase):
+    """calculate_score memoisation by feature fingerprint and scoring version"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.service = CreditScoringService()
+        self.service.enabled = True
+        self.data = {'revenue': 250_000, 'monthly_sales': 20_000, 'sector': 'fintech'}
+
+    def score(self, data=None):
+        with mock.patch.object(
+            self.service, '_score_features', wraps=self.service._score_features
+        ) as score_features:
+            result = self.service.calculate_score(data or self.data)
+        return result, score_features.call_count
+
+    def test_repeated_inputs_are_served_from_cache(self):
+        first, computed = self.score()
+        second, recomputed = self.score()
+
+        self.assertEqual((computed, recomputed), (1, 0))
+        self.assertEqual(first, second)
+
+    def test_inputs_with_equal_features_share_an_entry(self):
+        self.score({'revenue': 2_000_000})
+
+        _, computed = self.score({'revenue': 5_000_000})
+
+        self.assertEqual(computed, 0)
+
+    def test_weight_change_invalidates_cached_scores(self):
+        before, _ = self.score()
+        self.service.weights = {**self.service.weights, 'revenue': 0.5, 'monthly_sales': 0.0}
+
+        after, computed = self.score()
+
+        self.assertEqual(computed, 1)
+        self.assertNotEqual(before[0], after[0])
+
+    def test_sector_risk_change_invalidates_cached_scores(self):
+        before, _ = self.score()
+        self.service.sector_risks = {**self.service.sector_risks, 'fintech': 0.9}
+
+        after, computed = self.score()
+
+        self.assertEqual(computed, 1)
+        self.assertLess(after[0], before[0])
+
+    def test_retrained_model_changes_scoring_version(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        service = MLCreditScoringService()
+        service.model_path = tmp.name
+        service.use_mapped = False
+        model_file = os.path.join(tmp.name, service.MODEL_FILE)
+        with open(model_file, 'wb') as f:
+            f.write(b'old model')
+        before = service.scoring_version()
+
+        with open(model_file, 'wb') as f:
+            f.write(b'retrained model')
+
+        self.assertNotEqual(service.scoring_version(), before)
+
+
+class BatchScoringParityTests(TestCase):
+    """The vectorised engine matches calculate_score row for row"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.service = CreditScoringService()
+        self.service.enabled = True
+        self.rng = np.random.default_rng(21)
+
+    def test_batch_score_matches_calculate_score(self):
+        rows = [random_startup_data(self.rng) for _ in range(2000)]
+        # Contributions of x.xx5 that np.round and round() resolve differently
+        rows += [
+            {'previous_funding': 251_750, 'revenue': 946_200},
+            {'previous_funding': 454_250, 'monthly_sales': 3_020},
+        ]
+
+        batch = self.service.batch_score(rows)
+
+        for data, result in zip(rows, batch):
+            self.assertEqual(result, self.service.calculate_score(data), data)
+
+    def test_score_queryset_matches_calculate_score(self):
+        owner = User.objects.create_user('0.0.1001', role='STARTUP')
+        for i in range(50):
+            create_startup(owner, random_startup_data(self.rng), f'Startup {i}')
+        create_startup(owner, {}, 'Empty')
+
+        batch = self.service.score_queryset(Startup.objects.all())
+        startups = Startup.objects.in_bulk(list(batch.ids))
+
+        self.assertEqual(len(batch.ids), 51)
+        for i, pk in enumerate(batch.ids):
+            expected = self.service.calculate_score(startup_scoring_data(startups[pk]))
+            self.assertEqual(batch.result(i), expected)
+
+
+class RescoreTests(TestCase):
+    """Chunked bulk rescoring of the startup portfolio"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.service = CreditScoringService()
+        self.service.enabled = True
+        owner = User.objects.create_user('0.0.1001', role='STARTUP')
+        rng = np.random.default_rng(22)
+        for i in range(5):
+            create_startup(owner, random_startup_data(rng), f'Startup {i}')
+
+    def assert_scores_current(self):
+        for startup in Startup.objects.all():
+            score, risk_level, explanation = self.service.calculate_score(
+                startup_scoring_data(startup)
+            )
+            self.assertEqual(startup.credit_score, Decimal(str(score)).quantize(Decimal('0.01')))
+            self.assertEqual(startup.risk_level, risk_level)
+            self.assertEqual(startup.score_explanation, explanation)
+
+    def test_rescore_writes_scores_across_chunks(self):
+        counts, _ = rescore(Startup.objects.order_by('pk'), chunk_size=2, service=self.service)
+
+        self.assertEqual(counts, {'scored': 5, 'changed': 5})
+        self.assert_scores_current()
+
+    def test_unchanged_scores_are_not_written(self):
+        rescore(Startup.objects.order_by('pk'), service=self.service)
+
+        counts, changes = rescore(Startup.objects.order_by('pk'), service=self.service)
+
+        self.assertEqual(counts, {'scored': 5, 'changed': 0})
+        self.assertEqual(changes, [])
+
+    def test_weight_change_rescores_portfolio(self):
+        rescore(Startup.objects.order_by('pk'), service=self.service)
+        self.service.weights = {**self.service.weights, 'revenue': 0.5, 'previous_funding': 0.0}
+
+        counts, _ = rescore(Startup.objects.order_by('pk'), service=self.service)
+
+        self.assertEqual(counts['changed'], 5)
+        self.assert_scores_current()
+
+    def test_dry_run_reports_changes_without_writing(self):
+        counts, changes = rescore(
+            Startup.objects.order_by('pk'), dry_run=True, max_changes=2, service=self.service
+        )
+
+        self.assertEqual(counts, {'scored': 5, 'changed': 5})
+        self.assertEqual(len(changes), 2)
+        self.assertIsNone(changes[0].old_score)
+        self.assertFalse(Startup.objects.filter(credit_score__isnull=False).exists())
+
+    def test_pk_ranges_partition_startups(self):
+        shards = [set(startup_queryset(pk_range=r).values_list('pk', flat=True)) for r in pk_ranges(4)]
+
+        self.assertEqual(sum(len(shard) for shard in shards), 5)
+        self.assertEqual(set().union(*shards), set(Startup.objects.values_list('pk', flat=True)))
+
+
+class MLCreditScoringServiceTests(SimpleTestCase):
+    """Caching and model loading of the ML scoring service"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.service = MLCreditScoringService()
+        self.model = FakeModel()
+
+    def install_model(self):
+        self.service._set_artefacts(FakeScaler(), self.model)
+        self.service._loaded = True
+
+    def test_non_json_values_are_scored(self):
+        self.install_model()
+
+        score, risk_level, _ = self.service.calculate_score_ml({
+            'Cash Ratio': Decimal('0.5'),
+            'Debt Ratio': Decimal('0.25'),
+            'founded': date(2020, 1, 1),
+        })
+
+        self.assertEqual(score, 75.0)
+        self.assertEqual(risk_level, 'Low')
+
+    def test_equal_values_share_a_cache_entry(self):
+        self.install_model()
+
+        first = self.service.calculate_score_ml({'Debt Ratio': '0.25', 'Unknown': 'x'})
+        second = self.service.calculate_score_ml({'Debt Ratio': 0.25})
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.model.calls, 1)
+
+    def test_prediction_error_is_not_cached(self):
+        self.install_model()
+        with mock.patch.object(self.model, 'predict_proba', side_effect=ValueError('bad input')):
+            self.assertEqual(self.service.calculate_score_ml({'Debt Ratio': 0.25})[0], 50.0)
+
+        self.assertEqual(self.service.calculate_score_ml({'Debt Ratio': 0.25})[0], 75.0)
+
+    def test_failed_load_is_retried(self):
+        self.service.retry_seconds = 0
+        artefacts = (FakeScaler(), self.model)
+        with mock.patch.object(
+            self.service, '_read_artefacts',
+            side_effect=[FileNotFoundError('credit_model.pkl'), artefacts]
+        ):
+            self.assertFalse(self.service._load_model())
+            self.assertTrue(self.service._load_model())
+
+    def test_failed_load_waits_for_retry_interval(self):
+        with mock.patch.object(
+            self.service, '_read_artefacts', side_effect=FileNotFoundError('credit_model.pkl')
+        ) as read:
+            self.assertFalse(self.service._load_model())
+            self.assertFalse(self.service._load_model())
+
+        self.assertEqual(read.call_count, 1)
+
+
+@skipUnless(SKLEARN_AVAILABLE, "scikit-learn is not installed")
+class ModelArtefactTests(SimpleTestCase):
+    """Memory-mapped export of the fitted scaler and model"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = tmp.name
+        self.rng = np.random.default_rng(7)
+
+    def fit(self, classes=2):
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.preprocessing import StandardScaler
+
+        X = self.rng.normal(size=(200, 4))
+        y = self.rng.integers(0, classes, size=200)
+        scaler = StandardScaler().fit(X)
+        scaler.feature_names_in_ = np.array(['a', 'b', 'c', 'd'], dtype=object)
+        model = LogisticRegression().fit(scaler.transform(X), y)
+        return scaler, model
+
+    def test_mapped_model_matches_pickled_model(self):
+        for classes in (2, 3):
+            with self.subTest(classes=classes):
+                scaler, model = self.fit(classes)
+                export_artefacts(scaler, model, self.directory)
+                mapped_scaler, mapped_model = load_artefacts(self.directory)
+
+                X = self.rng.normal(size=(50, 4))
+                with warnings.catch_warnings():
+                    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+                    expected = model.predict_proba(scaler.transform(X))
+                np.testing.assert_allclose(
+                    mapped_model.predict_proba(mapped_scaler.transform(X)),
+                    expected,
+                    rtol=1e-10, atol=1e-12
+                )
+
+    def test_export_keeps_live_mappings_on_old_model(self):
+        first_scaler, first_model = self.fit()
+        export_artefacts(first_scaler, first_model, self.directory)
+        _, live_model = load_artefacts(self.directory)
+        old_coef = np.array(live_model.coef_)
+        old_inode = os.stat(os.path.join(self.directory, 'coef.npy')).st_ino
+
+        export_artefacts(*self.fit(), self.directory)
+
+        np.testing.assert_array_equal(live_model.coef_, old_coef)
+        self.assertNotEqual(os.stat(os.path.join(self.directory, 'coef.npy')).st_ino, old_inode)
+        self.assertFalse([name for name in os.listdir(self.directory) if name.startswith('.tmp-')])